@@ -1 +1,18 @@
-from . import agent
\ No newline at end of file
+"""
+ADK Supervisor package - google.adk is heavy, so the agent tree is only imported
+the first time `agent` or `root_agent` is accessed (PEP 562 module __getattr__)
+"""
+
+import importlib
+
+from dotenv import load_dotenv
+
+# The only load_dotenv of the ADK tree; sub-agent modules read the environment it sets
+load_dotenv()
+
+def __getattr__(name):
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    if name == "root_agent":
+        return importlib.import_module(f"{__name__}.agent").root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
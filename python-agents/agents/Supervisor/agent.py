@@ -1,18 +1,29 @@
 from google.adk.agents import Agent
-from .sub_agents.googleMapsAgent.agent import googleMapsAgent
-from .sub_agents.tripPlannerAgent.agent import tripPlannerAgent
-from .sub_agents.bookingAgent.agent import bookingAgent
+from .delegation import delegate
+from .response_cache import get_response_cache
+from .stand_in_model import agent_model
 
+# Repeated first-turn questions are answered from the response cache
+response_cache = get_response_cache()
+
+# Sub-agents are not imported here: `delegate` builds each one the first time
+# the Supervisor hands it a request. They run as tools (AgentTool), not through
+# ADK transfer, so they see only the request text, not the session history
 root_agent= Agent(
     name="Supervisor",
-    model="gemini-2.0-flash",
+    model=agent_model(),
     description="A supervisor agent that coordinates other agents to provide travel-related information.",
     instruction="""
     You are a Supervisor agent. Your task is to greet, convere and satisfy the user and complete their requests by interacting with the sub agents available if necessary.
-    You can access the following sub-agents:
-    - `GoogleMapsAgent`: Find tourist spots, weather or any location related or weather related field for a given location name.
-    - `TripPlannerAgent`: A sub-agent that helps to plan a trip to a given location name.
-    - `BookingAgent`: A sub-agent that gets information about and helps to book hotels, flights, and other travel-related services.
+    Use the `delegate` tool to hand a request to one of the following sub-agents. A sub-agent does not see this
+    conversation and cannot ask the user anything, so write each request with every detail it needs (location,
+    dates, duration, preferences, results from other sub-agents) and ask the user yourself for anything a
+    sub-agent reports missing:
+    - `googleMapsAgent`: Find tourist spots, weather or any location related or weather related field for a given location name.
+    - `tripPlannerAgent`: A sub-agent that helps to plan a trip to a given location name.
+    - `bookingAgent`: A sub-agent that gets information about and helps to book hotels, flights, and other travel-related services.
     """,
-    sub_agents=[googleMapsAgent, tripPlannerAgent, bookingAgent],
-)
\ No newline at end of file
+    tools=[delegate],
+    before_model_callback=response_cache.before_model_callback,
+    after_model_callback=response_cache.after_model_callback,
+)
@@ -0,0 +1,30 @@
+"""
+Delegation tool - Lets the Supervisor hand requests to sub-agents that are built on first use
+"""
+
+from typing import Any, Dict
+
+from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.tool_context import ToolContext
+
+from .sub_agents import SUB_AGENTS, get_sub_agent_registry
+
+# One AgentTool per sub-agent, created with the agent itself
+_agent_tools: Dict[str, AgentTool] = {}
+
+async def delegate(agent_name: str, request: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Hand a request to a specialist sub-agent and return its answer.
+    agent_name is one of googleMapsAgent, tripPlannerAgent or bookingAgent.
+    request is a complete, self-contained description of what the sub-agent should do:
+    the sub-agent does not see the conversation, so include the location, dates and any
+    earlier results it needs. If the answer says information is missing, ask the user for it.
+    """
+    if agent_name not in SUB_AGENTS:
+        return {"status": "error", "error_message": f"Unknown agent '{agent_name}', use one of {', '.join(SUB_AGENTS)}"}
+
+    agent_tool = _agent_tools.get(agent_name)
+    if agent_tool is None:
+        agent_tool = _agent_tools[agent_name] = AgentTool(agent=get_sub_agent_registry().get(agent_name))
+    answer = await agent_tool.run_async(args={"request": request}, tool_context=tool_context)
+    return {"status": "success", "agent": agent_name, "answer": answer}
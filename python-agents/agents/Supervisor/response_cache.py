@@ -0,0 +1,170 @@
+"""
+LLM Response Cache - Reuses model responses to repeated first-turn questions
+"""
+
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.metrics import get_metrics_registry
+from core.shared_cache import get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+# Session state key; a truthy value turns the cache off for that session
+OPT_OUT_STATE_KEY = "llm_cache_disabled"
+
+# Key prefix of whole-invocation answers, kept apart from per-agent model responses
+FINAL_ANSWER = "final_answer"
+
+CacheKey = Tuple[str, str, str]
+
+def normalize_prompt(text: str) -> str:
+    """Case-, accent-, punctuation- and whitespace-insensitive form of a user message"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+def tool_data_version(namespaces=None) -> str:
+    """
+    Version of the tool data an answer may be built from: the current
+    freshness window of each shared-cache namespace, plus LLM_CACHE_DATA_VERSION.
+    A cached answer therefore never outlives the data its tools would return.
+    """
+    ttls = get_shared_cache().ttls
+    now = time.time()
+    windows = [f"{ns}:{int(now // ttls[ns])}" for ns in sorted(namespaces or ttls) if ttls.get(ns)]
+    return "|".join([os.getenv('LLM_CACHE_DATA_VERSION', '1')] + windows)
+
+def _first_turn_text(llm_request) -> Optional[str]:
+    """The user's text when the request is a conversation's first turn (user text only), else None"""
+    contents = getattr(llm_request, "contents", None) or []
+    if not contents:
+        return None
+    texts = []
+    for content in contents:
+        if content.role != "user":
+            return None
+        for part in content.parts or []:
+            if part.text is None:
+                return None
+            texts.append(part.text)
+    return " ".join(texts) if texts else None
+
+def _is_final_text(llm_response) -> bool:
+    """True when every part of a model response is answer text, with no tool call to replay"""
+    parts = llm_response.content.parts or []
+    return bool(parts) and all(
+        part.text is not None and part.function_call is None and part.function_response is None
+        for part in parts
+    )
+
+class LlmResponseCache:
+    """
+    ADK before/after model callbacks that serve repeated first-turn questions
+    from memory.
+
+    The key is the agent name, the normalized user text and the tool data
+    version, so "Plan a trip to Paris!" and "plan a trip to paris" share an
+    entry until the weather window rolls over. Only first turns are cached:
+    later turns depend on the conversation so far. Only answers are cached:
+    a response that calls a tool (the Supervisor's `delegate`) would replay
+    the call and still pay for the sub-agent and a second model call, so the
+    Supervisor's final answer is cached whole, through `cached_answer` and
+    `store_answer`, by the escalation path that runs it. Entries expire after
+    LLM_CACHE_TTL seconds and the least recently used are evicted beyond
+    LLM_CACHE_MAX_ENTRIES. Sessions whose state sets `llm_cache_disabled`
+    always reach the model. LLM_CACHE_ENABLED=false turns the cache off.
+    """
+
+    def __init__(self, namespaces=None):
+        self.enabled = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl = int(os.getenv('LLM_CACHE_TTL', 3600))
+        self.max_entries = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 512))
+        self.namespaces = namespaces
+        self.entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self.pending: Dict[Tuple[str, str], CacheKey] = {}
+        self.requests = get_metrics_registry().counter(
+            "llm_response_cache_requests_total", "Model calls by response cache result", ("agent", "result")
+        )
+
+    def key(self, agent_name: str, text: str) -> CacheKey:
+        return agent_name, normalize_prompt(text), tool_data_version(self.namespaces)
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.time() - stored_at > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return response
+
+    def set(self, key: CacheKey, response: Any):
+        self.entries[key] = (time.time(), response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def before_model_callback(self, callback_context, llm_request):
+        """ADK hook: return the cached response for a repeated first turn, skipping the model"""
+        agent_name = callback_context.agent_name
+        if not self.enabled:
+            return None
+        if callback_context.state.get(OPT_OUT_STATE_KEY):
+            self.requests.inc(agent_name, "opted_out")
+            return None
+        text = _first_turn_text(llm_request)
+        if text is None:
+            return None
+
+        key = self.key(agent_name, text)
+        cached = self.get(key)
+        if cached is not None:
+            self.requests.inc(agent_name, "hit")
+            logger.debug("LLM response cache hit for %s", agent_name)
+            return cached.model_copy(deep=True)
+        self.requests.inc(agent_name, "miss")
+        if len(self.pending) >= self.max_entries:
+            self.pending.clear()  # misses whose model call failed never reach after_model_callback
+        self.pending[(callback_context.invocation_id, agent_name)] = key
+        return None
+
+    def after_model_callback(self, callback_context, llm_response):
+        """ADK hook: store the model's answer to a first turn that missed; never replaces it"""
+        key = self.pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if key is None or llm_response.partial or llm_response.error_code or not llm_response.content:
+            return None
+        if _is_final_text(llm_response):
+            self.set(key, llm_response.model_copy(deep=True))
+        return None
+
+    def cached_answer(self, text: str) -> Optional[str]:
+        """The final answer a whole invocation gave to this first-turn question, if still fresh"""
+        if not self.enabled:
+            return None
+        answer = self.get(self.key(FINAL_ANSWER, text))
+        self.requests.inc(FINAL_ANSWER, "miss" if answer is None else "hit")
+        return answer
+
+    def store_answer(self, text: str, answer: str):
+        if self.enabled and answer:
+            self.set(self.key(FINAL_ANSWER, text), answer)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self.entries), "max_entries": self.max_entries, "ttl": self.ttl}
+
+_cache: Optional[LlmResponseCache] = None
+
+def get_response_cache() -> LlmResponseCache:
+    """Return the process-wide LLM response cache"""
+    global _cache
+    if _cache is None:
+        _cache = LlmResponseCache()
+    return _cache
@@ -0,0 +1,39 @@
+"""
+Stand-in Model - Deterministic local replacement for gemini in tests and benchmarks
+"""
+
+import asyncio
+import os
+from typing import AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+class StandInLlm(BaseLlm):
+    """
+    Answers every request with a fixed echo of the latest user text after
+    STAND_IN_LATENCY_MS, so agent callbacks (response cache, tool compaction)
+    can be exercised and timed without network or credentials.
+    """
+
+    model: str = "stand-in"
+    latency_ms: float = float(os.getenv('STAND_IN_LATENCY_MS', 300))
+    calls: int = 0
+
+    @classmethod
+    def supported_models(cls):
+        return [r"stand-in"]
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        texts = [part.text for content in llm_request.contents if content.role == "user"
+                 for part in content.parts or [] if part.text]
+        reply = f"[stand-in] {texts[-1] if texts else ''}"
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=reply)]))
+
+def agent_model(default: str = "gemini-2.0-flash"):
+    """Model for an ADK agent: ADK_MODEL=stand-in selects StandInLlm, any other value names a model"""
+    name = os.getenv('ADK_MODEL', default)
+    return StandInLlm() if name == "stand-in" else name
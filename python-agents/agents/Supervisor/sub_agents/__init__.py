@@ -1,3 +1,55 @@
-from .googleMapsAgent import agent
-from .tripPlannerAgent import agent
-from .bookingAgent import agent
\ No newline at end of file
+"""
+ADK sub-agents - each `<name>.agent` module is imported on first attribute access,
+so tools and helpers in this package can be used without loading google.adk
+"""
+
+import importlib
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SUB_AGENTS = ("googleMapsAgent", "tripPlannerAgent", "bookingAgent")
+
+def __getattr__(name):
+    if name in SUB_AGENTS:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class SubAgentRegistry:
+    """
+    Builds each sub-agent the first time it is asked for.
+
+    Importing `<name>.agent` constructs its Agent (and its tools), so a worker
+    whose conversations never reach the booking path never pays for it.
+    Construction time per agent is kept in `load_ms`.
+    """
+
+    def __init__(self):
+        self.agents: Dict[str, Any] = {}
+        self.load_ms: Dict[str, float] = {}
+
+    def get(self, name: str) -> Any:
+        agent = self.agents.get(name)
+        if agent is None:
+            if name not in SUB_AGENTS:
+                raise KeyError(f"Unknown sub-agent: {name}")
+            started = time.perf_counter()
+            agent = importlib.import_module(f"{__name__}.{name}.agent").root_agent
+            self.load_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+            self.agents[name] = agent
+            logger.info("Loaded sub-agent %s in %sms", name, self.load_ms[name])
+        return agent
+
+    def loaded(self):
+        return list(self.agents)
+
+_registry: Optional[SubAgentRegistry] = None
+
+def get_sub_agent_registry() -> SubAgentRegistry:
+    """Return the process-wide sub-agent registry"""
+    global _registry
+    if _registry is None:
+        _registry = SubAgentRegistry()
+    return _registry
@@ -1,17 +1,18 @@
 from google.adk.agents import Agent
-from dotenv import load_dotenv
-import os
 
-load_dotenv()
+from agents.Supervisor.stand_in_model import agent_model
 
 root_agent = Agent(
     name="bookingAgent",
-    model="gemini-2.0-flash",
+    model=agent_model(),
     description="A sub-agent that books hotels and flights and deals with other travel-related queries.",
     instruction="""
     You are a Booking Agent agent. Your task is to book flights and hotels for the agent.
-    You have access to the following tools:
-    If the agent cannot resolve the request, Delegate the request back to the Supervisor agent.
+    You have no booking tools yet: describe the options and the details a booking would need.
+    You are called by the Supervisor agent as a tool: you only see the single request it sends you,
+    not the conversation with the user, and you cannot hand control back or ask the user anything.
+    Answer the request completely in one reply. If you cannot resolve it, say so and name the
+    information that is missing; the Supervisor will ask the user for it.
     """,
     tools=[],
 )
\ No newline at end of file
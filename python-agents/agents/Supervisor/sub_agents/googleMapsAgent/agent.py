@@ -1,45 +1,35 @@
 from google.adk.agents import Agent
-from dotenv import load_dotenv
-import os
 
-load_dotenv()
-apiKey= os.getenv("GOOGLE_MAPS_API_KEY")
-baseURL = os.getenv("GOOGLE_MAPS_BASE_URL")
+from agents.Supervisor.stand_in_model import agent_model
+from agents.Supervisor.tool_compaction import ToolOutputCompactor
+from agents.Supervisor.turn_executor import TurnToolExecutor
+from .tools import find_tourist_spots, get_weather_info, geocode_location
 
-def find_tourist_spots(latitude: float, longitude: float, radius_km: int, max_results: int)-> list:
-    """
-    Find tourist spots for a given location name within a specified radius.
-    """
-    return []
+# Function calls emitted together in one model turn start concurrently and
+# identical calls share one execution
+tool_executor = TurnToolExecutor([find_tourist_spots, get_weather_info, geocode_location])
 
-def get_weather_info(latitude: float, longitude: float) -> dict:
-    """
-    Get weather information for a given location name.
-    """
-    return {}
+# Results are compacted to a token budget before they are added to the prompt
+tool_compactor = ToolOutputCompactor()
 
-def geocode_location(location_name: str) -> dict:
-    """
-    Geocode a location name to get its latitude and longitude.
-    """
-    # Example implementation, replace with actual API call
-    if location_name:
-        return {
-            "latitude": 0.0,
-            "longitude": 0.0,
-        }
 root_agent = Agent(
     name="googleMapsAgent",
-    model="gemini-2.0-flash",
+    model=agent_model(),
     description="A sub-agent that interacts with Google Maps to find tourist spots, weather, or any location-related information.",
     instruction="""
     You are a Google Maps agent. Your task is to find tourist spots, weather, or any location-related information or weather-related information for a given location name.
     You have access to the following tools:
-    - `find_tourist_spots`: Find tourist spots for given latitude and Longitude.
-    - `get_weather_info`: Get weather information for a given latitude and Longitude.
     - `geocode_location`: Geocode a location name to get its latitude and longitude.
-    
-    If the agent cannot resolve the request, Delegate the request back to the Supervisor agent.
+    - `find_tourist_spots`: Find tourist spots for a location name and its latitude and longitude.
+    - `get_weather_info`: Get weather information for a location name and its latitude and longitude.
+
+    Geocode the location first when you only have its name.
+    You are called by the Supervisor agent as a tool: you only see the single request it sends you,
+    not the conversation with the user, and you cannot hand control back or ask the user anything.
+    Answer the request completely in one reply. If you cannot resolve it, say so and name the
+    information that is missing; the Supervisor will ask the user for it.
     """,
-    tools=[find_tourist_spots, get_weather_info, geocode_location],
-)
\ No newline at end of file
+    tools=tool_executor.tools,
+    after_model_callback=tool_executor.after_model_callback,
+    after_tool_callback=tool_compactor.after_tool_callback,
+)
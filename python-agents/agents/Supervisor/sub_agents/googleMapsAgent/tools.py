@@ -0,0 +1,53 @@
+"""
+Google Maps tools - Async ADK tools backed by the shared location and weather agents
+"""
+
+from agents.services import ensure_initialized, get_location_agent, get_weather_agent
+
+# Tools are async and go through the same shared agents, cache and upstream
+# limiter as the REST endpoints, so ADK conversations reuse cache warmed by
+# REST traffic and never block the runtime's event loop.
+
+async def find_tourist_spots(location_name: str, latitude: float, longitude: float, radius_km: float, max_results: int) -> dict:
+    """
+    Find tourist spots near the given coordinates within a radius in kilometres.
+    location_name is the place the coordinates belong to.
+    """
+    await ensure_initialized()
+    spots = await get_location_agent().find_tourist_spots(
+        location=location_name,
+        latitude=latitude,
+        longitude=longitude,
+        radius_km=radius_km,
+        max_results=max_results
+    )
+    return {"status": "success", "location": location_name, "spots": spots, "count": len(spots)}
+
+async def get_weather_info(location_name: str, latitude: float, longitude: float) -> dict:
+    """
+    Get current weather and a short forecast for the given coordinates.
+    location_name is the place the coordinates belong to.
+    """
+    await ensure_initialized()
+    weather = await get_weather_agent().get_weather_info(
+        location=location_name,
+        latitude=latitude,
+        longitude=longitude
+    )
+    return {"status": "success", "location": location_name, "weather": weather}
+
+async def geocode_location(location_name: str) -> dict:
+    """
+    Geocode a location name to get its latitude and longitude.
+    """
+    await ensure_initialized()
+    result = await get_location_agent().geocode(location_name)
+    if not result:
+        return {"status": "error", "error_message": f"Could not geocode '{location_name}'"}
+    return {
+        "status": "success",
+        "latitude": result["lat"],
+        "longitude": result["lng"],
+        "formatted_address": result.get("formatted_address"),
+        "country": result.get("country"),
+    }
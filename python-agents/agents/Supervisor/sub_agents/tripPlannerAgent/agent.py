@@ -1,17 +1,18 @@
 from google.adk.agents import Agent
-from dotenv import load_dotenv
-import os
 
-load_dotenv()
+from agents.Supervisor.stand_in_model import agent_model
 
 root_agent = Agent(
     name="tripPlannerAgent",
-    model="gemini-2.0-flash",
+    model=agent_model(),
     description="A sub-agent that takes tourist spots and plans a trip for a given duration.",
     instruction="""
     You are a Trip Planner agent. Your task is to use tourist spots and plan a trip for a given duration.
-    You have access to the following tools:
-    If the agent cannot resolve the request, Delegate the request back to the Supervisor agent.
+    You have no tools: plan from the tourist spots, weather and duration given in the request.
+    You are called by the Supervisor agent as a tool: you only see the single request it sends you,
+    not the conversation with the user, and you cannot hand control back or ask the user anything.
+    Answer the request completely in one reply. If you cannot resolve it, say so and name the
+    information that is missing; the Supervisor will ask the user for it.
     """,
     tools=[],
 )
\ No newline at end of file
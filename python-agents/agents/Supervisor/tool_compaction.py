@@ -0,0 +1,177 @@
+"""
+Tool Output Compaction - Shrinks tool results to what the model needs before they enter the prompt
+"""
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from core.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+# Place types that describe nearly every result and tell the model nothing
+GENERIC_PLACE_TYPES = {'point_of_interest', 'establishment', 'tourist_attraction'}
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a value as the model sees it: compact JSON, ~4 characters per token"""
+    return (len(json.dumps(value, separators=(",", ":"), default=str)) + 3) // 4
+
+def _prune(value: Any) -> Any:
+    """Drop None, empty and 'Unknown' values and round floats to 4 places, recursively"""
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {}, "Unknown")}
+    if isinstance(value, list):
+        return [_prune(item) for item in value]
+    if isinstance(value, float):
+        return round(value, 4)
+    return value
+
+def _hoist_shared(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Move keys whose value is identical in every item out of the items; returns the shared values"""
+    if len(items) < 2:
+        return {}
+    shared = {
+        key: value for key, value in items[0].items()
+        if all(key in item and item[key] == value for item in items[1:])
+    }
+    for item in items:
+        for key in shared:
+            del item[key]
+    return shared
+
+def compact_spot(spot: Dict[str, Any]) -> Dict[str, Any]:
+    """Model-facing view of one LocationAgent spot: no photo URL (it carries the API key), ids or type lists"""
+    kinds = [kind for kind in spot.get('types') or [] if kind not in GENERIC_PLACE_TYPES]
+    compact = {
+        'name': spot.get('name'),
+        'kind': kinds[0].replace('_', ' ') if kinds else None,
+        'rating': round(spot['rating'], 1) if spot.get('rating') else None,
+        'reviews': spot.get('user_ratings_total') or None,
+        'km': round(spot['distance'], 1) if spot.get('distance') is not None else None,
+        'address': spot.get('address') or spot.get('description'),
+        'price_level': spot.get('price_level'),
+    }
+    # description is the same vicinity string as address for Places results
+    if spot.get('description') and spot.get('description') != compact['address']:
+        compact['about'] = spot['description']
+    return compact
+
+def compact_spots_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    spots = [_prune(compact_spot(spot)) for spot in result.get('spots') or []]
+    compact = {key: value for key, value in result.items() if key not in ('spots', 'count')}
+    shared = _hoist_shared(spots)
+    if shared:
+        compact['all_spots'] = shared
+    compact['spots'] = spots
+    return compact
+
+def compact_weather(weather: Dict[str, Any]) -> Dict[str, Any]:
+    """Model-facing view of WeatherAgent data: no icon URIs, integer temperatures, short daily forecast"""
+    def whole(value):
+        return round(value) if isinstance(value, (int, float)) else value
+
+    conditions = weather.get('conditions') or {}
+    return {
+        'temp': whole(weather.get('temperature')),
+        'feels_like': whole(weather.get('feelsLike')),
+        'conditions': weather.get('description'),
+        'humidity': weather.get('humidity'),
+        'wind': whole(weather.get('windSpeed')),
+        'uv': weather.get('uvIndex'),
+        'cloud': conditions.get('cloudiness'),
+        'rain_mm': conditions.get('rain_1h') or None,
+        'snow_mm': conditions.get('snow_1h') or None,
+        'sunrise': weather.get('sunrise'),
+        'sunset': weather.get('sunset'),
+        'days': [
+            {'day': day.get('day_name'), 'hi': whole(day.get('max_temp')), 'lo': whole(day.get('min_temp')),
+             'conditions': day.get('description')}
+            for day in weather.get('dailyForecast') or []
+        ],
+    }
+
+def compact_weather_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    compact = {key: value for key, value in result.items() if key != 'weather'}
+    if result.get('weather'):
+        compact['weather'] = compact_weather(result['weather'])
+    return _prune(compact)
+
+COMPACTORS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    'find_tourist_spots': compact_spots_result,
+    'get_weather_info': compact_weather_result,
+}
+
+def fit_to_budget(payload: Dict[str, Any], budget: int) -> Dict[str, Any]:
+    """Drop trailing entries of the payload's longest top-level or nested list until it fits the token budget"""
+    omitted = 0
+    while estimate_tokens(payload) > budget:
+        lists = [value for value in _lists(payload) if len(value) > 1]
+        if not lists:
+            break
+        max(lists, key=len).pop()
+        omitted += 1
+    if omitted:
+        payload['omitted'] = omitted
+    return payload
+
+def _lists(value: Any):
+    if isinstance(value, dict):
+        for item in value.values():
+            if isinstance(item, list):
+                yield item
+            yield from _lists(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _lists(item)
+
+class ToolOutputCompactor:
+    """
+    ADK `after_tool_callback` that replaces each tool result with a compact
+    encoding before it is added to the conversation.
+
+    Known tools get a field-level view (COMPACTORS); every result is then
+    pruned of empty values, rounded and capped to TOOL_OUTPUT_TOKEN_BUDGET
+    estimated tokens by trimming its longest lists. Error results pass
+    through untouched. TOOL_OUTPUT_COMPACTION=false disables the stage.
+    Tokens before and after are counted per tool in /metrics and logged at
+    DEBUG for every call.
+    """
+
+    def __init__(self, budget: int = None):
+        self.enabled = os.getenv('TOOL_OUTPUT_COMPACTION', 'true').lower() == 'true'
+        self.budget = budget or int(os.getenv('TOOL_OUTPUT_TOKEN_BUDGET', 800))
+        registry = get_metrics_registry()
+        self.tokens = registry.counter(
+            "llm_tool_output_tokens_total", "Estimated tokens of tool results, before and after compaction",
+            ("tool", "stage")
+        )
+        self.saved = registry.histogram(
+            "llm_tool_output_tokens_saved", "Estimated tokens removed from one tool result",
+            ("tool",), buckets=TOKEN_BUCKETS
+        )
+
+    def compact(self, tool_name: str, result: Any) -> Any:
+        if not isinstance(result, dict) or result.get('status') == 'error':
+            return result
+        compactor = COMPACTORS.get(tool_name, _prune)
+        return fit_to_budget(compactor(result), self.budget)
+
+    def after_tool_callback(self, tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict[str, Any]]:
+        """ADK hook: return the compact result, or None to keep the original"""
+        if not self.enabled:
+            return None
+        compact = self.compact(tool.name, tool_response)
+        if compact is tool_response:
+            return None
+
+        before, after = estimate_tokens(tool_response), estimate_tokens(compact)
+        self.tokens.inc(tool.name, "raw", amount=before)
+        self.tokens.inc(tool.name, "compact", amount=after)
+        self.saved.observe(before - after, tool.name)
+        logger.debug("Compacted %s result: %s -> %s tokens", tool.name, before, after)
+        return compact
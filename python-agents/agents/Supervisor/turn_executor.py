@@ -0,0 +1,89 @@
+"""
+Turn Tool Executor - Runs the function calls of one model turn concurrently, once each
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CallKey = Tuple[str, str]
+
+def call_key(name: str, args: Optional[Dict[str, Any]]) -> CallKey:
+    """Identity of a function call: tool name plus canonical JSON of its arguments"""
+    return name, json.dumps(args or {}, sort_keys=True, default=str)
+
+class TurnToolExecutor:
+    """
+    Makes the independent function calls of a model turn run concurrently.
+
+    `after_model_callback` sees the whole model response before ADK executes
+    any tool. When it carries several function calls, each distinct call
+    (same tool and arguments count once) is started as a task right away.
+    ADK then invokes the wrapped tools in the model's order as usual; each
+    wrapper just awaits its already-running task, so the turn takes as long
+    as its slowest call instead of the sum, duplicates run once, and results
+    are still returned in order. Calls that were not started this way (single
+    calls, other callers) run directly.
+    """
+
+    def __init__(self, tools: List[Callable]):
+        self.functions: Dict[str, Callable] = {tool.__name__: tool for tool in tools}
+        self.tools = [self._wrap(tool) for tool in tools]
+        self.turns: Dict[str, Dict[CallKey, asyncio.Task]] = {}
+        self.stats = {"turns": 0, "calls": 0, "deduplicated": 0}
+
+    def after_model_callback(self, callback_context, llm_response):
+        """ADK hook: start every function call of the turn; never replaces the response"""
+        invocation_id = callback_context.invocation_id
+        self._discard(invocation_id)
+
+        content = getattr(llm_response, "content", None)
+        calls = [part.function_call for part in (getattr(content, "parts", None) or [])
+                 if getattr(part, "function_call", None)]
+        if len(calls) < 2:
+            return None
+
+        turn: Dict[CallKey, asyncio.Task] = {}
+        for call in calls:
+            key = call_key(call.name, call.args)
+            if call.name not in self.functions:
+                continue
+            if key in turn:
+                self.stats["deduplicated"] += 1
+                continue
+            turn[key] = asyncio.ensure_future(self.functions[call.name](**(call.args or {})))
+        self.turns[invocation_id] = turn
+        self.stats["turns"] += 1
+        self.stats["calls"] += len(calls)
+        return None
+
+    def _discard(self, invocation_id: str):
+        """Drop the previous turn of this invocation, cancelling calls nobody awaited"""
+        for task in self.turns.pop(invocation_id, {}).values():
+            if not task.done():
+                task.cancel()
+
+    def _wrap(self, func: Callable) -> Callable:
+        name = func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(tool_context=None, **kwargs):
+            turn = self.turns.get(getattr(tool_context, "invocation_id", None))
+            task = turn.get(call_key(name, kwargs)) if turn else None
+            if task is None:
+                return await func(**kwargs)
+            return await asyncio.shield(task)
+
+        # ADK injects tool_context only when the signature asks for it and
+        # leaves it out of the function declaration shown to the model
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("tool_context", inspect.Parameter.KEYWORD_ONLY, default=None),
+        ])
+        return wrapper
@@ -0,0 +1,232 @@
+"""
+Hybrid Router - Answers simple single-intent messages directly and escalates the rest to the LLM supervisor
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from core.metrics import get_metrics_registry
+
+from .location_extractor import ExtractedLocation, get_location_extractor
+from .Supervisor.response_cache import get_response_cache
+from .supervisor import SupervisorAgent
+
+logger = logging.getLogger(__name__)
+
+WEATHER_KEYWORDS = {'weather', 'temperature', 'rain', 'raining', 'sunny', 'forecast', 'climate', 'hot', 'cold'}
+SPOT_KEYWORDS = {'tourist', 'attraction', 'attractions', 'sights', 'sightseeing', 'see', 'visit', 'spots', 'places', 'landmarks', 'things'}
+
+# Requests that need reasoning, several steps or services the fast path does not have
+ESCALATION_PATTERN = re.compile(
+    r"\b(plan|itinerary|trip|days?|week|budget|cheap|book|booking|hotel|flight|compare|versus|vs|better|"
+    r"should|why|how|recommend|best time|instead|between|route|schedule|family|kids)\b"
+)
+
+FAST_PATH_MAX_WORDS = 12
+
+@dataclass
+class Intent:
+    """Routing decision for one message"""
+    name: Optional[str]
+    location: Optional[ExtractedLocation]
+    confidence: float
+    reason: str
+
+class AdkEscalation:
+    """
+    Runs escalated messages through the ADK root_agent, one session per user.
+    Only the ADK_MAX_SESSIONS most recently active users keep a session;
+    older ones are deleted from the session service and start afresh.
+    """
+
+    def __init__(self):
+        self.runner = None
+        self.session_service = None
+        self.max_sessions = int(os.getenv('ADK_MAX_SESSIONS', 1000))
+        self.sessions: "OrderedDict[str, str]" = OrderedDict()
+
+    async def __call__(self, message: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        from google.genai import types
+
+        if self.runner is None:
+            from google.adk.runners import Runner
+            from google.adk.sessions import InMemorySessionService
+            from agents.Supervisor import root_agent
+
+            self.session_service = InMemorySessionService()
+            self.runner = Runner(agent=root_agent, app_name="travelagent", session_service=self.session_service)
+
+        user_id = str(context.get('userId', 'anonymous'))
+        session_id = self.sessions.get(user_id)
+
+        # A repeated first-turn question is answered without running the agent tree
+        cacheable = session_id is None and not context.get('noCache')
+        if cacheable:
+            answer = get_response_cache().cached_answer(message)
+            if answer:
+                return {"agent": "supervisor", "message": answer, "cached": True}
+
+        if session_id is None:
+            # context.noCache opts the session out of the LLM response cache
+            session = await self.session_service.create_session(
+                app_name="travelagent", user_id=user_id,
+                state={"llm_cache_disabled": bool(context.get('noCache'))}
+            )
+            session_id = self.sessions[user_id] = session.id
+            while len(self.sessions) > self.max_sessions:
+                evicted_user, evicted_session = self.sessions.popitem(last=False)
+                await self.session_service.delete_session(
+                    app_name="travelagent", user_id=evicted_user, session_id=evicted_session
+                )
+        self.sessions.move_to_end(user_id)
+
+        reply = None
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        async for event in self.runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+            if event.is_final_response() and event.content and event.content.parts:
+                reply = event.content.parts[0].text
+        if cacheable and reply:
+            get_response_cache().store_answer(message, reply)
+        return {"agent": "supervisor", "message": reply or "I couldn't find an answer to that."}
+
+class HybridRouter:
+    """
+    Front door for supervisor messages.
+
+    Short messages with exactly one clear intent (weather, sights, or both)
+    and a single location are answered straight from the shared
+    LocationAgent/WeatherAgent. Anything open-ended, multi-step or
+    ambiguous escalates: to the ADK root_agent when HYBRID_ESCALATION=adk,
+    otherwise to SupervisorAgent.process_message. HYBRID_FAST_PATH=false
+    sends everything to the escalation target.
+
+    Latency saved is estimated as fast-path hits times the difference
+    between the mean LLM and mean fast-path latency. The LLM mean is only
+    measured from ADK escalations that ran the agent tree; until there are
+    some (always, with the keyword supervisor) no saving is reported.
+    """
+
+    def __init__(self, supervisor: SupervisorAgent):
+        self.supervisor = supervisor
+        self.fast_path_enabled = os.getenv('HYBRID_FAST_PATH', 'true').lower() == 'true'
+        self.min_confidence = float(os.getenv('HYBRID_MIN_CONFIDENCE', 0.8))
+        if os.getenv('HYBRID_ESCALATION', 'supervisor').lower() == 'adk':
+            self.escalate = AdkEscalation()
+        else:
+            self.escalate = supervisor.process_message
+        self.measures_llm = isinstance(self.escalate, AdkEscalation)
+        self.counts = {"fast_path": 0, "escalated": 0, "llm": 0}
+        self.seconds = {"fast_path": 0.0, "escalated": 0.0, "llm": 0.0}
+        registry = get_metrics_registry()
+        self.decisions = registry.counter(
+            "agent_router_decisions_total", "Supervisor messages by route and intent", ("route", "intent")
+        )
+        self.duration = registry.histogram(
+            "agent_router_duration_seconds", "Latency of supervisor messages by route", ("route",)
+        )
+
+    def classify(self, message: str, context: Dict[str, Any] = None) -> Intent:
+        text = message.lower().strip()
+        words = re.findall(r"[a-z']+", text)
+        if not self.fast_path_enabled:
+            return Intent(None, None, 0.0, "fast path disabled")
+        if len(words) > FAST_PATH_MAX_WORDS:
+            return Intent(None, None, 0.0, "long message")
+        if ESCALATION_PATTERN.search(text):
+            return Intent(None, None, 0.0, "open-ended or multi-step")
+
+        wants_weather = any(word in WEATHER_KEYWORDS for word in words)
+        wants_spots = any(word in SPOT_KEYWORDS for word in words)
+        if not (wants_weather or wants_spots):
+            return Intent(None, None, 0.0, "no known intent")
+
+        extractor = get_location_extractor()
+        if not (context and context.get('location')) and len(extractor.places(message)) > 1:
+            return Intent(None, None, 0.3, "several locations")
+        location = extractor.extract(message, context)
+        if location is None:
+            return Intent(None, None, 0.0, "no location")
+        if location.qualifier:
+            # "Paris, Texas": the gazetteer's Paris is the wrong one, leave it to the supervisor
+            return Intent(None, location, 0.5, "qualifier not in gazetteer")
+        if location.latitude is None and any(word in WEATHER_KEYWORDS or word in SPOT_KEYWORDS
+                                             for word in location.name.split()):
+            return Intent(None, location, 0.3, "location unclear")
+
+        name = "weather_and_spots" if wants_weather and wants_spots else ("weather" if wants_weather else "spots")
+        confidence = 1.0 - 0.02 * max(0, len(words) - 6)
+        if location.latitude is None:
+            confidence -= 0.1  # free-text phrase rather than a known place
+        return Intent(name, location, confidence, "keyword match")
+
+    async def handle(self, message: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        context = context or {}
+        intent = self.classify(message, context)
+        started = time.perf_counter()
+
+        if intent.name and intent.confidence >= self.min_confidence:
+            route = "fast_path"
+            response = await self._answer(intent)
+        else:
+            route = "escalated"
+            response = await self.escalate(message, context)
+
+        elapsed = time.perf_counter() - started
+        self.counts[route] += 1
+        self.seconds[route] += elapsed
+        if route == "escalated" and self.measures_llm and not response.get("cached"):
+            self.counts["llm"] += 1
+            self.seconds["llm"] += elapsed
+        self.decisions.inc(route, intent.name or "none")
+        self.duration.observe(elapsed, route)
+        return dict(response, route=route)
+
+    async def _answer(self, intent: Intent) -> Dict[str, Any]:
+        """Same response shape as SupervisorAgent.process_message, minus the LLM"""
+        location = intent.location
+        context = {'location': location.name, 'latitude': location.latitude, 'longitude': location.longitude}
+        agents = {}
+        if intent.name in ("spots", "weather_and_spots"):
+            agents["tourist_info"] = self.supervisor.tourist_agent
+        if intent.name in ("weather", "weather_and_spots"):
+            agents["weather_info"] = self.supervisor.weather_agent
+        results = await asyncio.gather(*(agent.process_message(location.name, context) for agent in agents.values()))
+        response: Dict[str, Any] = {"agent": "supervisor", "location": location.name, **dict(zip(agents, results))}
+
+        if intent.name == "weather_and_spots":
+            response["message"] = "I've coordinated with both our Tourist and Weather agents for you."
+            response["recommendation"] = "Based on both tourist attractions and weather data, here's what I recommend for your trip."
+        elif intent.name == "spots":
+            response["message"] = "I've consulted with our Tourist agent for you."
+            response["recommendation"] = "These are the best tourist spots I found for your location."
+        else:
+            response["message"] = "I've consulted with our Weather agent for you."
+            response["recommendation"] = "Here's the weather information for your location."
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.counts["fast_path"] + self.counts["escalated"]
+        mean_fast_ms = self.seconds["fast_path"] / self.counts["fast_path"] * 1000 if self.counts["fast_path"] else 0.0
+        mean_llm_ms = self.seconds["llm"] / self.counts["llm"] * 1000 if self.counts["llm"] else None
+        return {
+            "messages": total,
+            "fast_path": self.counts["fast_path"],
+            "escalated": self.counts["escalated"],
+            "fast_path_hit_rate": round(self.counts["fast_path"] / total, 4) if total else 0.0,
+            "mean_fast_path_ms": round(mean_fast_ms, 2),
+            "mean_escalated_ms": round(
+                self.seconds["escalated"] / self.counts["escalated"] * 1000 if self.counts["escalated"] else 0.0, 2
+            ),
+            "llm_calls_measured": self.counts["llm"],
+            "llm_latency_ms": round(mean_llm_ms, 2) if mean_llm_ms is not None else None,
+            "estimated_latency_saved_ms": (
+                round(max(0.0, mean_llm_ms - mean_fast_ms) * self.counts["fast_path"], 1)
+                if mean_llm_ms is not None else None
+            ),
+        }
@@ -7,11 +7,63 @@ import logging
 from typing import Dict, Any, List, Optional
 import os
 import json
-import requests
 from dataclasses import dataclass
 
+from core.canonical_location import canonical_location, get_location_canonicalizer
+from core.degraded_store import get_degraded_store
+from core.metrics import timed_agent_method
+from core.tracing import traced
+from core.shared_cache import get_shared_cache, normalize_key
+from core.upstream import fetch_json
+from core.upstream_accounting import bills_to_location, get_upstream_accounting
+
+from .location_extractor import ExtractedLocation, get_location_extractor
+
 logger = logging.getLogger(__name__)
 
+# Generic spots served only for locations that have never been fetched successfully
+MOCK_TOURIST_SPOTS = [
+    {
+        'id': 'mock_1',
+        'name': 'Historic Downtown',
+        'description': 'Beautiful historic district with shops and restaurants',
+        'latitude': 37.7749,
+        'longitude': -122.4194,
+        'rating': 4.5,
+        'address': 'Downtown Area',
+        'distance': 1.2,
+        'photo_url': 'https://images.unsplash.com/photo-1506905925346-21bda4d32df4',
+        'types': ['tourist_attraction'],
+        'user_ratings_total': 1250
+    },
+    {
+        'id': 'mock_2',
+        'name': 'City Museum',
+        'description': 'Local history and culture museum',
+        'latitude': 37.7849,
+        'longitude': -122.4094,
+        'rating': 4.2,
+        'address': 'Museum District',
+        'distance': 2.1,
+        'photo_url': 'https://images.unsplash.com/photo-1518837695005-2083093ee35b',
+        'types': ['museum'],
+        'user_ratings_total': 890
+    },
+    {
+        'id': 'mock_3',
+        'name': 'Scenic Overlook',
+        'description': 'Panoramic views of the city',
+        'latitude': 37.7649,
+        'longitude': -122.4294,
+        'rating': 4.7,
+        'address': 'Hilltop Drive',
+        'distance': 3.5,
+        'photo_url': 'https://images.unsplash.com/photo-1501594907352-04cda38ebc29',
+        'types': ['tourist_attraction', 'point_of_interest'],
+        'user_ratings_total': 2100
+    }
+]
+
 @dataclass
 class TouristSpot:
     id: str
@@ -32,7 +84,10 @@ class LocationAgent:
     
     def __init__(self):
         self.google_api_key = os.getenv('GOOGLE_MAPS_API_KEY')
-        self.places_base_url = os.getenv('GOOGLE_MAPS_BASE_URL')
+        self.places_base_url = os.getenv('GOOGLE_MAPS_BASE_URL', 'https://maps.googleapis.com/maps/api/place')
+        self.geocoding_url = os.getenv('GOOGLE_GEOCODING_URL', 'https://maps.googleapis.com/maps/api/geocode/json')
+        self.cache = get_shared_cache()
+        self.degraded_store = get_degraded_store()
         self.ready = False
         
     async def initialize(self):
@@ -54,19 +109,23 @@ class LocationAgent:
         """Check if the tourist agent is ready"""
         return self.ready
     
+    @timed_agent_method("location")
+    @traced("location.process_message")
     async def process_message(self, message: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process a message about tourist attractions"""
         try:
-            logger.info(f"Tourist agent processing message: {message}")
+            logger.info("Tourist agent processing message: %s", message)
             
             # Extract location from message or context
             location = self._extract_location_from_message(message, context)
             
             if location:
-                spots = await self.find_tourist_spots(location=location)
+                spots = await self.find_tourist_spots(
+                    location=location.name, latitude=location.latitude, longitude=location.longitude
+                )
                 return {
                     "agent": "tourist",
-                    "message": f"I found {len(spots)} tourist attractions near {location}",
+                    "message": f"I found {len(spots)} tourist attractions near {location.name}",
                     "spots": spots,
                     "recommendations": self._generate_spot_recommendations(spots)
                 }
@@ -88,50 +147,101 @@ class LocationAgent:
                 "message": "I'm having trouble finding tourist information. Please try again."
             }
     
+    @timed_agent_method("location")
+    @traced("location.find_tourist_spots")
+    @canonical_location
+    @bills_to_location
     async def find_tourist_spots(self, location: str, latitude: float = None, longitude: float = None, 
                                 radius_km: float = 50.0, max_results: int = 20) -> List[Dict[str, Any]]:
         """
         Find tourist spots near a location using Google Places API
         """
         try:
-            logger.info(f"Finding tourist spots near: {location}")
+            logger.info("Finding tourist spots near: %s", location)
+            
+            spots = None
             
             # If we have coordinates, use them directly
             if latitude and longitude:
-                return await self._search_places_by_coordinates(latitude, longitude, radius_km, max_results)
-            
-            # Otherwise, geocode the location first
-            coords = await self._geocode_location(location)
-            if coords:
-                return await self._search_places_by_coordinates(coords['lat'], coords['lng'], radius_km, max_results)
+                spots = await self._search_places_by_coordinates(latitude, longitude, radius_km, max_results)
+            else:
+                # Otherwise, geocode the location first
+                coords = await self._geocode_location(location)
+                if coords:
+                    spots = await self._search_places_by_coordinates(coords['lat'], coords['lng'], radius_km, max_results)
             
-            # Fallback to mock data if API is not available
-            return self._get_mock_tourist_spots(location)
+            if spots is not None:
+                self.degraded_store.remember("places", location, spots)
+                self._count_photo_urls(spots)
+                return spots
             
         except Exception as e:
             logger.error(f"Error finding tourist spots: {str(e)}")
-            return self._get_mock_tourist_spots(location)
+        
+        # Upstream unavailable: serve last-known-good data, or mock data for unseen locations
+        return self._get_degraded_tourist_spots(location)
+    
+    def _get_degraded_tourist_spots(self, location: str) -> List[Dict[str, Any]]:
+        """Return the last successful spots for this location flagged as stale"""
+        last_known = self.degraded_store.recall("places", location)
+        if last_known:
+            spots, age = last_known
+            logger.warning(f"Serving last-known-good tourist spots for {location} ({age}s old)")
+            self._count_photo_urls(spots)
+            return [dict(spot, stale=True, data_age_seconds=age) for spot in spots]
+        
+        return self._get_mock_tourist_spots(location)
     
-    async def _geocode_location(self, location: str) -> Optional[Dict[str, float]]:
-        """Convert location name to coordinates"""
+    def _count_photo_urls(self, spots: List[Dict[str, Any]]):
+        """Google bills each Place Photo URL when the client loads it"""
+        photo_prefix = f"{self.places_base_url}/photo"
+        count = sum(1 for spot in spots if (spot.get('photo_url') or '').startswith(photo_prefix))
+        get_upstream_accounting().record_photo_urls(count)
+    
+    async def geocode(self, location: str) -> Optional[Dict[str, Any]]:
+        """Coordinates, formatted address and country for a location name, or None"""
+        canonical = get_location_canonicalizer().canonicalize(location)
+        if canonical.latitude is not None:
+            return {
+                'lat': canonical.latitude,
+                'lng': canonical.longitude,
+                'formatted_address': canonical.address,
+                'country': canonical.country or 'Unknown'
+            }
+        return await self._geocode_location(canonical.name)
+    
+    @traced("location.geocode_location")
+    async def _geocode_location(self, location: str) -> Optional[Dict[str, Any]]:
+        """Convert location name to coordinates (the shared geocode cache record)"""
         try:
             if not self.google_api_key:
                 return None
             
-            url = "https://maps.googleapis.com/maps/api/geocode/json"
+            # Geocode entries are shared with the weather agent and other workers
+            cache_key = normalize_key(location)
+            cached = self.cache.get("geocode", cache_key)
+            if cached:
+                return cached
+            
+            url = self.geocoding_url
             params = {
                 'address': location,
                 'key': self.google_api_key
             }
             
-            response = requests.get(url, params=params)
-            data = response.json()
+            data = await fetch_json("geocoding", "geocode", url, params)
             if data['status'] == 'OK' and data['results']:
-                location_data = data['results'][0]['geometry']['location']
-                return {
+                result = data['results'][0]
+                location_data = result['geometry']['location']
+                record = {
                     'lat': location_data['lat'],
-                    'lng': location_data['lng']
+                    'lng': location_data['lng'],
+                    'formatted_address': result.get('formatted_address') or 'Unknown',
+                    'country': result['address_components'][-1]['long_name'] if result.get('address_components') else 'Unknown'
                 }
+                self.cache.set("geocode", cache_key, record)
+                get_location_canonicalizer().remember(location, dict(record, place_id=result.get('place_id')))
+                return record
             
             return None
             
@@ -140,15 +250,20 @@ class LocationAgent:
             return None
     
     async def _search_places_by_coordinates(self, latitude: float, longitude: float, 
-                                          radius_km: float, max_results: int) -> List[Dict[str, Any]]:
-        """Search for places using coordinates"""
+                                          radius_km: float, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Search for places using coordinates, returning None when the API is unavailable"""
         try:
             if not self.google_api_key:
-                return self._get_mock_tourist_spots(f"{latitude},{longitude}")
+                return None
             
             # Convert km to meters
             radius_meters = int(radius_km * 1000)
             
+            cache_key = f"{latitude:.4f},{longitude:.4f}|{radius_meters}|{max_results}"
+            cached = self.cache.get("places", cache_key)
+            if cached is not None:
+                return cached
+            
             # Search for tourist attractions
             url = f"{self.places_base_url}/nearbysearch/json"
             params = {
@@ -157,9 +272,8 @@ class LocationAgent:
                 'type': 'tourist_attraction',
                 'key': self.google_api_key
             }
-            response = requests.get(url, params=params)
-            logger.info(f"Response: {response}")
-            data = response.json()
+            data = await fetch_json("places", "nearbysearch", url, params)
+            logger.debug("Places nearbysearch status %s with %d results", data.get('status'), len(data.get('results', [])))
             
             spots = []
             if data['status'] == 'OK':
@@ -171,8 +285,7 @@ class LocationAgent:
             # If we don't have enough tourist attractions, search for points of interest
             if len(spots) < max_results // 2:
                 params['type'] = 'point_of_interest'
-                response = requests.get(url, params=params)
-                data = response.json()
+                data = await fetch_json("places", "nearbysearch", url, params)
                 
                 if data['status'] == 'OK':
                     for place in data.get('results', []):
@@ -182,11 +295,14 @@ class LocationAgent:
                         if spot and not any(s['id'] == spot['id'] for s in spots):
                             spots.append(spot)
             
+            if spots:
+                self.cache.set("places", cache_key, spots)
+            
             return spots
             
         except Exception as e:
             logger.error(f"Error searching places: {str(e)}")
-            return self._get_mock_tourist_spots(f"{latitude},{longitude}")
+            return None
     
     def _format_place_data(self, place: Dict, ref_lat: float, ref_lng: float) -> Optional[Dict[str, Any]]:
         """Format Google Places API response into our format"""
@@ -238,25 +354,9 @@ class LocationAgent:
         
         return c * r
     
-    def _extract_location_from_message(self, message: str, context: Dict[str, Any] = None) -> Optional[str]:
-        """Extract location from message or context"""
-        # Simple location extraction - could be improved with NLP
-        message_lower = message.lower()
-        
-        # Check context first
-        if context and 'location' in context:
-            return context['location']
-        
-        # Look for common location patterns
-        location_keywords = ['in ', 'at ', 'near ', 'around ', 'visit ', 'go to ']
-        for keyword in location_keywords:
-            if keyword in message_lower:
-                parts = message_lower.split(keyword)
-                if len(parts) > 1:
-                    potential_location = parts[1].split()[0:3]  # Take up to 3 words
-                    return ' '.join(potential_location).strip('.,!?')
-        
-        return None
+    def _extract_location_from_message(self, message: str, context: Dict[str, Any] = None) -> Optional[ExtractedLocation]:
+        """Extract location from context or message; gazetteer places come with coordinates"""
+        return get_location_extractor().extract(message, context)
     
     def _generate_spot_recommendations(self, spots: List[Dict[str, Any]]) -> List[str]:
         """Generate recommendations based on found spots"""
@@ -279,44 +379,4 @@ class LocationAgent:
     
     def _get_mock_tourist_spots(self, location: str) -> List[Dict[str, Any]]:
         """Return mock tourist spots when API is not available"""
-        return [
-            {
-                'id': 'mock_1',
-                'name': 'Historic Downtown',
-                'description': 'Beautiful historic district with shops and restaurants',
-                'latitude': 37.7749,
-                'longitude': -122.4194,
-                'rating': 4.5,
-                'address': 'Downtown Area',
-                'distance': 1.2,
-                'photo_url': 'https://images.unsplash.com/photo-1506905925346-21bda4d32df4',
-                'types': ['tourist_attraction'],
-                'user_ratings_total': 1250
-            },
-            {
-                'id': 'mock_2',
-                'name': 'City Museum',
-                'description': 'Local history and culture museum',
-                'latitude': 37.7849,
-                'longitude': -122.4094,
-                'rating': 4.2,
-                'address': 'Museum District',
-                'distance': 2.1,
-                'photo_url': 'https://images.unsplash.com/photo-1518837695005-2083093ee35b',
-                'types': ['museum'],
-                'user_ratings_total': 890
-            },
-            {
-                'id': 'mock_3',
-                'name': 'Scenic Overlook',
-                'description': 'Panoramic views of the city',
-                'latitude': 37.7649,
-                'longitude': -122.4294,
-                'rating': 4.7,
-                'address': 'Hilltop Drive',
-                'distance': 3.5,
-                'photo_url': 'https://images.unsplash.com/photo-1501594907352-04cda38ebc29',
-                'types': ['tourist_attraction', 'point_of_interest'],
-                'user_ratings_total': 2100
-            }
-        ]
+        return [dict(spot) for spot in MOCK_TOURIST_SPOTS]
@@ -0,0 +1,199 @@
+"""
+Location Extractor - Finds place names in chat messages with an Aho-Corasick automaton over the gazetteer
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.gazetteer import Gazetteer, Place, get_gazetteer, matches_qualifier, normalize_place_name
+
+logger = logging.getLogger(__name__)
+
+# Words that usually introduce a place ("weather in ...", "trip to ...")
+LOCATION_PREPOSITIONS = {'in', 'at', 'near', 'around', 'to', 'visit', 'visiting', 'for', 'from', 'of'}
+
+# Place names that are also everyday words; only taken right after a preposition
+AMBIGUOUS_NAMES = {'male', 'nice', 'reading', 'bath', 'split', 'mobile', 'orange', 'victoria', 'salvador'}
+
+# Words that end a free-text location phrase ("in springfield tomorrow please")
+PHRASE_STOP_WORDS = {
+    'today', 'tomorrow', 'tonight', 'now', 'right', 'this', 'next', 'weekend', 'week', 'please',
+    'and', 'or', 'for', 'with', 'during', 'on', 'in', 'at', 'like', 'then', 'is', 'be', 'will'
+}
+
+# Aliases shorter than this ("la", "sf") collide with ordinary words
+MIN_NAME_LENGTH = 3
+
+@dataclass(frozen=True)
+class ExtractedLocation:
+    """
+    A location named in a message: canonical name and coordinates when it
+    is a gazetteer place. `qualifier` is set when the words after a comma
+    did not match the gazetteer's place of that name.
+    """
+    name: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    place: Optional[Place] = None
+    qualifier: Optional[str] = None
+
+    @classmethod
+    def from_context(cls, context: Dict[str, Any]) -> "ExtractedLocation":
+        return cls(context['location'], context.get('latitude'), context.get('longitude'))
+
+class LocationExtractor:
+    """
+    Every gazetteer name and alias compiled into one Aho-Corasick automaton.
+
+    `find_all` walks the normalized message once and reports each whole-word
+    place name it contains, however many names the gazetteer holds. The best
+    match wins: one right after a location preposition, then the longest
+    ("new york city" over "york"), then the most populous. Messages with no
+    known place fall back to the words after the last preposition, cut at
+    the first time or filler word, and carry no coordinates.
+    """
+
+    def __init__(self, gazetteer: Gazetteer = None):
+        gazetteer = gazetteer or get_gazetteer()
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.terminal: Dict[int, Tuple[int, Place]] = {}
+        self.dict_link: List[int] = [0]
+
+        # Places come most populous first, so a shared name keeps the biggest place
+        for place in gazetteer.places:
+            for name in gazetteer.names(place):
+                if len(name) >= MIN_NAME_LENGTH:
+                    self._insert(name, place)
+        self._link()
+        logger.info("Location extractor compiled %s names into %s states", len(self.terminal), len(self.goto))
+
+    def _insert(self, name: str, place: Place):
+        node = 0
+        for char in name:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.dict_link.append(0)
+            node = next_node
+        self.terminal.setdefault(node, (len(name), place))
+
+    def _link(self):
+        """Breadth-first failure links, plus a link to the nearest failure state that ends a name"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.fail[child] = self.goto[fallback].get(char, 0)
+                self.dict_link[child] = target if target in self.terminal else self.dict_link[target]
+                queue.append(child)
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Place]]:
+        """(start, end, place) of every whole-word name in already-normalized text"""
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            found = node if node in self.terminal else self.dict_link[node]
+            while found:
+                length, place = self.terminal[found]
+                start, end = index - length + 1, index + 1
+                if (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " "):
+                    matches.append((start, end, place))
+                found = self.dict_link[found]
+        return matches
+
+    def places(self, message: str) -> List[Place]:
+        """Distinct gazetteer places named in a message, best match first"""
+        return [place for place, _ in self._ranked(normalize_place_name(message))]
+
+    def _ranked(self, text: str) -> List[Tuple[Place, str]]:
+        """Distinct places in normalized text, each with the name it matched, best match first"""
+        ranked = sorted(
+            ((self._score(text, start, end, place), place, text[start:end])
+             for start, end, place in self.find_all(text)),
+            key=lambda scored: scored[0], reverse=True
+        )
+        places = []
+        seen = set()
+        for score, place, name in ranked:
+            if score[0] >= 0 and place not in seen:
+                seen.add(place)
+                places.append((place, name))
+        return places
+
+    def _score(self, text: str, start: int, end: int, place: Place) -> Tuple[int, int, int]:
+        words_before = text[:start].split()
+        after_preposition = 1 if words_before and words_before[-1] in LOCATION_PREPOSITIONS else 0
+        if not after_preposition and text[start:end] in AMBIGUOUS_NAMES:
+            return -1, 0, 0
+        return after_preposition, end - start, place.population
+
+    def extract(self, message: str, context: Dict[str, Any] = None) -> Optional[ExtractedLocation]:
+        """
+        The location a message is about: context first, then the best
+        gazetteer place, then a free-text phrase. A place followed by a
+        qualifier that names another country or region ("Paris, Texas",
+        "Cambridge, MA") is returned as free text without coordinates, so
+        it is geocoded by name rather than taken as the gazetteer's place.
+        """
+        if context and context.get('location'):
+            return ExtractedLocation.from_context(context)
+        ranked = self._ranked(normalize_place_name(message))
+        if ranked:
+            place, name = ranked[0]
+            qualifier = self._qualifier(message, name)
+            # "Paris, France weather": any leading run of the words may be the qualifier
+            if qualifier and not any(matches_qualifier(place, " ".join(qualifier[:count]))
+                                     for count in range(1, len(qualifier) + 1)):
+                qualifier = " ".join(qualifier)
+                return ExtractedLocation(f"{place.name}, {qualifier}", qualifier=qualifier)
+            return ExtractedLocation(place.name, place.latitude, place.longitude, place)
+        return self._phrase_after_preposition(normalize_place_name(message))
+
+    def _qualifier(self, message: str, name: str) -> List[str]:
+        """Up to three words after a comma that follows `name` (["Texas"] in "weather in Paris, Texas tomorrow")"""
+        segments = message.split(",")
+        for segment, following in zip(segments, segments[1:]):
+            head = normalize_place_name(segment)
+            if head == name or head.endswith(" " + name):
+                words = []
+                for word in normalize_place_name(following).split()[:3]:
+                    if word in PHRASE_STOP_WORDS or word in LOCATION_PREPOSITIONS:
+                        break
+                    words.append(word)
+                return " ".join(following.split()[:len(words)]).strip(" .?!").split()
+        return []
+
+    def _phrase_after_preposition(self, text: str) -> Optional[ExtractedLocation]:
+        """Up to three words after the last preposition that is followed by any ("things to see near springfield")"""
+        words = text.split()
+        for index in range(len(words) - 2, -1, -1):
+            if words[index] in LOCATION_PREPOSITIONS:
+                phrase = []
+                for candidate in words[index + 1:index + 4]:
+                    if candidate in PHRASE_STOP_WORDS or candidate in LOCATION_PREPOSITIONS:
+                        break
+                    phrase.append(candidate)
+                if phrase:
+                    return ExtractedLocation(" ".join(phrase))
+        return None
+
+_extractor: Optional[LocationExtractor] = None
+
+def get_location_extractor() -> LocationExtractor:
+    """Return the process-wide location extractor, compiling it on first use"""
+    global _extractor
+    if _extractor is None:
+        _extractor = LocationExtractor()
+    return _extractor
@@ -0,0 +1,40 @@
+"""
+Agent Services - Process-wide location and weather agents shared by every entry point
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from .location_agent import LocationAgent
+from .weather_agent import WeatherAgent
+
+logger = logging.getLogger(__name__)
+
+_location_agent: Optional[LocationAgent] = None
+_weather_agent: Optional[WeatherAgent] = None
+_init_lock: Optional[asyncio.Lock] = None
+
+def get_location_agent() -> LocationAgent:
+    """Return the process-wide LocationAgent used by REST, MCP and ADK tools"""
+    global _location_agent
+    if _location_agent is None:
+        _location_agent = LocationAgent()
+    return _location_agent
+
+def get_weather_agent() -> WeatherAgent:
+    """Return the process-wide WeatherAgent used by REST, MCP and ADK tools"""
+    global _weather_agent
+    if _weather_agent is None:
+        _weather_agent = WeatherAgent()
+    return _weather_agent
+
+async def ensure_initialized():
+    """Initialize the shared agents once, for callers that run outside the FastAPI startup hook"""
+    global _init_lock
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+    async with _init_lock:
+        pending = [agent for agent in (get_location_agent(), get_weather_agent()) if not agent.is_ready()]
+        if pending:
+            await asyncio.gather(*(agent.initialize() for agent in pending))
@@ -8,6 +8,10 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 import json
 
+from core.canonical_location import canonical_location
+from core.metrics import timed_agent_method
+from core.tracing import span, traced
+
 from .location_agent import LocationAgent
 from .weather_agent import WeatherAgent
 
@@ -27,22 +31,25 @@ class SupervisorAgent:
     Supervisor agent that coordinates between specialized agents
     """
     
-    def __init__(self):
-        self.tourist_agent = None
-        self.weather_agent = None
+    def __init__(self, tourist_agent: LocationAgent = None, weather_agent: WeatherAgent = None):
+        # Sub-agents are normally shared with the API server; create our own only when not given
+        self.tourist_agent = tourist_agent
+        self.weather_agent = weather_agent
         self.ready = False
         
     async def initialize(self):
-        """Initialize the supervisor and its sub-agents"""
+        """Initialize the supervisor and any sub-agents that are not ready yet"""
         try:
             logger.info("Initializing Supervisor Agent...")
             
-            # Initialize sub-agents
-            self.tourist_agent = LocationAgent()
-            self.weather_agent = WeatherAgent()
+            if self.tourist_agent is None:
+                self.tourist_agent = LocationAgent()
+            if self.weather_agent is None:
+                self.weather_agent = WeatherAgent()
             
-            await self.tourist_agent.initialize()
-            await self.weather_agent.initialize()
+            pending = [agent.initialize() for agent in (self.tourist_agent, self.weather_agent) if not agent.is_ready()]
+            if pending:
+                await asyncio.gather(*pending)
             
             self.ready = True
             logger.info("Supervisor Agent initialized successfully")
@@ -55,12 +62,14 @@ class SupervisorAgent:
         """Check if the supervisor agent is ready"""
         return self.ready and self.tourist_agent.is_ready() and self.weather_agent.is_ready()
     
+    @timed_agent_method("supervisor")
+    @traced("supervisor.process_message")
     async def process_message(self, message: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Process a message and coordinate with appropriate agents
         """
         try:
-            logger.info(f"Supervisor processing message: {message}")
+            logger.info("Supervisor processing message: %s", message)
             
             if not self.is_ready():
                 return {
@@ -123,12 +132,15 @@ class SupervisorAgent:
                 "message": "I'm having trouble processing your request. Please try again."
             }
     
+    @timed_agent_method("supervisor")
+    @traced("supervisor.create_travel_plan")
+    @canonical_location
     async def create_travel_plan(self, location: str, latitude: float = None, longitude: float = None) -> TravelPlan:
         """
         Create a comprehensive travel plan by coordinating all agents
         """
         try:
-            logger.info(f"Creating travel plan for: {location}")
+            logger.info("Creating travel plan for: %s", location)
             
             if not self.is_ready():
                 raise Exception("Supervisor agent not ready")
@@ -147,14 +159,15 @@ class SupervisorAgent:
                 longitude=longitude
             )
             
-            # Generate recommendations based on combined data
-            recommendations = self._generate_recommendations(tourist_spots, weather_info)
-            
-            # Generate timing recommendations
-            best_times = self._generate_timing_recommendations(weather_info)
-            
-            # Generate travel tips
-            travel_tips = self._generate_travel_tips(tourist_spots, weather_info)
+            with span("supervisor.generate_recommendations", spots=len(tourist_spots or [])):
+                # Generate recommendations based on combined data
+                recommendations = self._generate_recommendations(tourist_spots, weather_info)
+                
+                # Generate timing recommendations
+                best_times = self._generate_timing_recommendations(weather_info)
+                
+                # Generate travel tips
+                travel_tips = self._generate_travel_tips(tourist_spots, weather_info)
             
             travel_plan = TravelPlan(
                 location=location,
@@ -165,7 +178,7 @@ class SupervisorAgent:
                 travel_tips=travel_tips
             )
             
-            logger.info(f"Travel plan created successfully for {location}")
+            logger.info("Travel plan created successfully for %s", location)
             return travel_plan.__dict__
             
         except Exception as e:
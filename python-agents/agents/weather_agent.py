@@ -7,12 +7,60 @@ import logging
 from typing import Dict, Any, List, Optional
 import os
 import json
-import requests
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from core.canonical_location import canonical_location, get_location_canonicalizer
+from core.degraded_store import get_degraded_store
+from core.metrics import timed_agent_method
+from core.reverse_geocoder import get_reverse_geocoder
+from core.tracing import traced
+from core.shared_cache import get_shared_cache, normalize_key
+from core.upstream import fetch_json
+from core.upstream_accounting import bills_to_location
+
+from .location_extractor import ExtractedLocation, get_location_extractor
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _fallback_weather_template(today: str) -> Dict[str, Any]:
+    """Fallback weather payload, built once per day so its forecast dates stay current"""
+    start = date.fromisoformat(today)
+    days = [start + timedelta(days=offset) for offset in range(3)]
+    
+    return {
+        'temperature': 18,
+        'description': 'Weather data unavailable',
+        'humidity': 65,
+        'windSpeed': 12,
+        'visibility': 10,
+        'feelsLike': 20,
+        'pressure': 1013,
+        'uvIndex': 0,
+        'sunrise': '06:30',
+        'sunset': '19:45',
+        'icon': 'cloud',
+        'hourlyForecast': [
+            {'time': '15:00', 'temperature': 19, 'icon': 'sun', 'description': 'Clear'},
+            {'time': '18:00', 'temperature': 18, 'icon': 'cloud', 'description': 'Cloudy'},
+            {'time': '21:00', 'temperature': 17, 'icon': 'cloud-sun', 'description': 'Partly Cloudy'},
+            {'time': '00:00', 'temperature': 16, 'icon': 'cloud-rain', 'description': 'Light Rain'},
+        ],
+        'dailyForecast': [
+            {'date': days[0].isoformat(), 'day_name': 'Today', 'max_temp': 20, 'min_temp': 15, 'description': 'Partly Cloudy', 'icon': 'cloud-sun'},
+            {'date': days[1].isoformat(), 'day_name': 'Tomorrow', 'max_temp': 22, 'min_temp': 16, 'description': 'Sunny', 'icon': 'sun'},
+            {'date': days[2].isoformat(), 'day_name': days[2].strftime('%A'), 'max_temp': 19, 'min_temp': 14, 'description': 'Rainy', 'icon': 'cloud-rain'},
+        ],
+        'conditions': {
+            'cloudiness': 50,
+            'rain_1h': 0,
+            'snow_1h': 0
+        },
+        'error': 'Weather API unavailable - showing fallback data'
+    }
+
 @dataclass
 class WeatherData:
     location: str
@@ -34,8 +82,11 @@ class WeatherAgent:
     
     def __init__(self):
         self.openweather_api_key = os.getenv('WEATHER_API_KEY')
-        self.weather_base_url = "https://weather.googleapis.com/v1"
-        self.geocoding_url = "https://maps.googleapis.com/maps/api/geocode/json"
+        self.weather_base_url = os.getenv('GOOGLE_WEATHER_BASE_URL', 'https://weather.googleapis.com/v1')
+        self.geocoding_url = os.getenv('GOOGLE_GEOCODING_URL', 'https://maps.googleapis.com/maps/api/geocode/json')
+        self.cache = get_shared_cache()
+        self.degraded_store = get_degraded_store()
+        self.weather_snap_km = float(os.getenv('WEATHER_SNAP_KM', 10))
         self.ready = False
         
     async def initialize(self):
@@ -57,19 +108,23 @@ class WeatherAgent:
         """Check if the weather agent is ready"""
         return self.ready
     
+    @timed_agent_method("weather")
+    @traced("weather.process_message")
     async def process_message(self, message: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process a message about weather"""
         try:
-            logger.info(f"Weather agent processing message: {message}")
+            logger.info("Weather agent processing message: %s", message)
             
             # Extract location from message or context
             location = self._extract_location_from_message(message, context)
             
             if location:
-                weather_data = await self.get_weather_info(location=location)
+                weather_data = await self.get_weather_info(
+                    location=location.name, latitude=location.latitude, longitude=location.longitude
+                )
                 return {
                     "agent": "weather",
-                    "message": f"Here's the current weather information for {location}",
+                    "message": f"Here's the current weather information for {location.name}",
                     "weather": weather_data,
                     "recommendations": self._generate_weather_recommendations(weather_data)
                 }
@@ -91,51 +146,90 @@ class WeatherAgent:
                 "message": "I'm having trouble getting weather information. Please try again."
             }
     
+    @timed_agent_method("weather")
+    @traced("weather.get_weather_info")
+    @canonical_location
+    @bills_to_location
     async def get_weather_info(self, location: str, latitude: float = None, longitude: float = None) -> Dict[str, Any]:
         """
         Get comprehensive weather information for a location
         """
         try:
-            logger.info(f"Getting weather info for: {location}")
+            logger.info("Getting weather info for: %s", location)
+            
+            weather_data = None
             
             # If we have coordinates, use them directly
             if latitude and longitude:
-                return await self._get_weather_by_coordinates(latitude, longitude, location)
-            
-            # Otherwise, geocode the location first
-            coords = await self._geocode_location(location)
-            if coords:
-                return await self._get_weather_by_coordinates(coords['lat'], coords['lon'], location)
+                weather_data = await self._get_weather_by_coordinates(latitude, longitude, location)
+            else:
+                # Otherwise, geocode the location first
+                coords = await self._geocode_location(location)
+                if coords:
+                    weather_data = await self._get_weather_by_coordinates(coords['lat'], coords['lon'], location)
             
-            # Fallback to default weather data if API is not available
-            return self._get_fallback_weather_data(location)
+            # Only real upstream data may replace the last-known-good entry
+            if weather_data and not weather_data.get('error'):
+                self.degraded_store.remember("weather", location, weather_data)
+                return weather_data
             
         except Exception as e:
             logger.error(f"Error getting weather info: {str(e)}")
-            return self._get_fallback_weather_data(location)
+        
+        # Upstream unavailable: serve last-known-good data, or fallback data for unseen locations
+        return self._get_degraded_weather_data(location)
+    
+    def _get_degraded_weather_data(self, location: str) -> Dict[str, Any]:
+        """Return the last successful weather for this location flagged as stale"""
+        last_known = self.degraded_store.recall("weather", location)
+        if last_known:
+            weather_data, age = last_known
+            logger.warning(f"Serving last-known-good weather for {location} ({age}s old)")
+            return dict(weather_data, location=location, stale=True, dataAgeSeconds=age)
+        
+        return self._get_fallback_weather_data(location)
     
+    @traced("weather.geocode_location")
     async def _geocode_location(self, location: str) -> Optional[Dict[str, float]]:
         """Convert location name to coordinates using OpenWeatherMap geocoding"""
         try:
             if not self.openweather_api_key:
                 return None
             
+            # Geocode entries are shared with the location agent and other workers
+            cache_key = normalize_key(location)
+            cached = self.cache.get("geocode", cache_key)
+            if cached:
+                return {
+                    'lat': cached['lat'],
+                    'lon': cached['lng'],
+                    'name': cached['formatted_address'],
+                    'country': cached['country']
+                }
+            
             url = f"{self.geocoding_url}"
             params = {
                 'address': location,
                 'key': self.openweather_api_key,
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await fetch_json("geocoding", "geocode", url, params)
             if data:
-                return {
+                coords = {
                     'lat': data['results'][0]['geometry']['location']['lat'],
                     'lon': data['results'][0]['geometry']['location']['lng'],
                     'name': data['results'][0]['formatted_address'] if data['results'][0]['formatted_address'] else 'Unknown',
                     'country': data['results'][0]['address_components'][-1]['long_name'] if data['results'][0]['address_components'] else 'Unknown'
                 }
+                record = {
+                    'lat': coords['lat'],
+                    'lng': coords['lon'],
+                    'formatted_address': coords['name'],
+                    'country': coords['country']
+                }
+                self.cache.set("geocode", cache_key, record)
+                get_location_canonicalizer().remember(location, dict(record, place_id=data['results'][0].get('place_id')))
+                return coords
             
             return None
             
@@ -143,11 +237,18 @@ class WeatherAgent:
             logger.error(f"Error geocoding location: {str(e)}")
             return None
     
-    async def _get_weather_by_coordinates(self, latitude: float, longitude: float, location: str) -> Dict[str, Any]:
-        """Get weather data using coordinates"""
+    async def _get_weather_by_coordinates(self, latitude: float, longitude: float, location: str) -> Optional[Dict[str, Any]]:
+        """Get weather data using coordinates, returning None when the API is unavailable or fails"""
         try:
             if not self.openweather_api_key:
-                return self._get_fallback_weather_data(location)
+                return None
+            
+            # Map pins within WEATHER_SNAP_KM of a gazetteer place share that place's forecast
+            nearest = get_reverse_geocoder().nearest(latitude, longitude, self.weather_snap_km)
+            cache_key = f"gn:{nearest.place.id}" if nearest else f"{latitude:.3f},{longitude:.3f}"
+            cached = self.cache.get("weather", cache_key)
+            if cached:
+                return dict(cached, location=location)
             
             # Get current weather
             current_url = f"{self.weather_base_url}/currentConditions:lookup"
@@ -157,9 +258,7 @@ class WeatherAgent:
                 'key': self.openweather_api_key,
             }
             
-            current_response = requests.get(current_url, params=current_params, timeout=10)
-            current_response.raise_for_status()
-            current_data = current_response.json()
+            current_data = await fetch_json("weather", "currentConditions", current_url, current_params)
             
             # Get forecast data
             forecast_url = f"{self.weather_base_url}/forecast/days:lookup"
@@ -169,19 +268,21 @@ class WeatherAgent:
                 'key': self.openweather_api_key,
             }
             
-            forecast_response = requests.get(forecast_url, params=forecast_params, timeout=10)
-            forecast_response.raise_for_status()
-            forecast_data = forecast_response.json()
+            forecast_data = await fetch_json("weather", "forecastDays", forecast_url, forecast_params)
             
             # Format the weather data
-            return self._format_weather_data(current_data, forecast_data, location)
+            weather_data = self._format_weather_data(current_data, forecast_data, location)
+            if weather_data:
+                self.cache.set("weather", cache_key, weather_data)
+            
+            return weather_data
             
         except Exception as e:
             logger.error(f"Error getting weather by coordinates: {str(e)}")
-            return self._get_fallback_weather_data(location)
+            return None
     
-    def _format_weather_data(self, current_data: Dict, forecast_data: Dict, location: str) -> Dict[str, Any]:
-        """Format OpenWeatherMap API response into our format"""
+    def _format_weather_data(self, current_data: Dict, forecast_data: Dict, location: str) -> Optional[Dict[str, Any]]:
+        """Format OpenWeatherMap API response into our format, or None if it is malformed"""
         try:
             # Current weather
             #logger.info(f"Current Data: {current_data}")
@@ -251,7 +352,7 @@ class WeatherAgent:
             
         except Exception as e:
             logger.error(f"Error formatting weather data: {str(e)}")
-            return self._get_fallback_weather_data(location)
+            return None
     
     def _map_weather_icon(self, openweather_icon: str) -> str:
         """Map OpenWeatherMap icons to our icon system"""
@@ -278,25 +379,9 @@ class WeatherAgent:
         
         return icon_mapping.get(openweather_icon, 'cloud')
     
-    def _extract_location_from_message(self, message: str, context: Dict[str, Any] = None) -> Optional[str]:
-        """Extract location from message or context"""
-        # Check context first
-        if context and 'location' in context:
-            return context['location']
-        
-        # Simple location extraction - could be improved with NLP
-        message_lower = message.lower()
-        
-        # Look for common location patterns
-        location_keywords = ['in ', 'at ', 'for ', 'weather in ', 'forecast for ', 'temperature in ']
-        for keyword in location_keywords:
-            if keyword in message_lower:
-                parts = message_lower.split(keyword)
-                if len(parts) > 1:
-                    potential_location = parts[1].split()[0:3]  # Take up to 3 words
-                    return ' '.join(potential_location).strip('.,!?')
-        
-        return None
+    def _extract_location_from_message(self, message: str, context: Dict[str, Any] = None) -> Optional[ExtractedLocation]:
+        """Extract location from context or message; gazetteer places come with coordinates"""
+        return get_location_extractor().extract(message, context)
     
     def _generate_weather_recommendations(self, weather_data: Dict[str, Any]) -> List[str]:
         """Generate recommendations based on weather conditions"""
@@ -354,34 +439,4 @@ class WeatherAgent:
         """Return fallback weather data when API is not available"""
         logger.warning(f"Using fallback weather data for {location}")
         
-        return {
-            'location': location,
-            'temperature': 18,
-            'description': 'Weather data unavailable',
-            'humidity': 65,
-            'windSpeed': 12,
-            'visibility': 10,
-            'feelsLike': 20,
-            'pressure': 1013,
-            'uvIndex': 0,
-            'sunrise': '06:30',
-            'sunset': '19:45',
-            'icon': 'cloud',
-            'hourlyForecast': [
-                {'time': '15:00', 'temperature': 19, 'icon': 'sun', 'description': 'Clear'},
-                {'time': '18:00', 'temperature': 18, 'icon': 'cloud', 'description': 'Cloudy'},
-                {'time': '21:00', 'temperature': 17, 'icon': 'cloud-sun', 'description': 'Partly Cloudy'},
-                {'time': '00:00', 'temperature': 16, 'icon': 'cloud-rain', 'description': 'Light Rain'},
-            ],
-            'dailyForecast': [
-                {'date': '2024-01-01', 'day_name': 'Today', 'max_temp': 20, 'min_temp': 15, 'description': 'Partly Cloudy', 'icon': 'cloud-sun'},
-                {'date': '2024-01-02', 'day_name': 'Tomorrow', 'max_temp': 22, 'min_temp': 16, 'description': 'Sunny', 'icon': 'sun'},
-                {'date': '2024-01-03', 'day_name': 'Wednesday', 'max_temp': 19, 'min_temp': 14, 'description': 'Rainy', 'icon': 'cloud-rain'},
-            ],
-            'conditions': {
-                'cloudiness': 50,
-                'rain_1h': 0,
-                'snow_1h': 0
-            },
-            'error': 'Weather API unavailable - showing fallback data'
-        }
+        return dict(_fallback_weather_template(datetime.now().date().isoformat()), location=location)
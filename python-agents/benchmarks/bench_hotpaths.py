@@ -0,0 +1,173 @@
+"""
+Hot-path Micro-benchmarks - Time and allocations per call of the pure data-shaping functions
+
+Usage:
+    python benchmarks/bench_hotpaths.py --output hotpaths.json
+    python benchmarks/bench_hotpaths.py --filter format_place --baseline hotpaths.json --max-regression 0.15
+
+Payloads come from the upstream stub's builders, so they have the real
+Google shapes, at 20, 60 and 500 places and 5- and 10-day forecasts. Timing
+uses timeit auto-ranging (best of --repeat). Allocation is the tracemalloc
+peak of a single call. Exits 1 when a benchmark is slower than the baseline
+by more than --max-regression.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, Dict, Any, List, Tuple
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from agents.location_agent import LocationAgent
+from agents.location_extractor import get_location_extractor
+from agents.supervisor import SupervisorAgent
+from agents.weather_agent import WeatherAgent
+from core.place_index import get_place_index
+from core.reverse_geocoder import get_reverse_geocoder
+from mcpMock.server import MCPServer
+from stubs.upstream_server import StubConfig, StubState
+
+PLACE_COUNTS = (20, 60, 500)
+EXTRACTOR_MESSAGES = {
+    "gazetteer": "what's the weather in new york city tomorrow?",
+    "free_text": "things to see near springfield this weekend please",
+}
+AUTOCOMPLETE_PREFIXES = ("s", "san", "new y")
+FORECAST_DAYS = (5, 10)
+CENTER = (48.8566, 2.3522)
+
+def run_sync(coroutine):
+    """Drive a coroutine that never suspends, without event-loop overhead"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended; it is not a pure function")
+
+def build_fixtures() -> Dict[str, Any]:
+    location_agent = LocationAgent()
+    weather_agent = WeatherAgent()
+    fixtures: Dict[str, Any] = {"places": {}, "spots": {}, "weather": {}}
+
+    for count in PLACE_COUNTS:
+        state = StubState(StubConfig(places_per_query=count, page_size=count))
+        places = state.nearbysearch({"location": f"{CENTER[0]},{CENTER[1]}", "radius": 5000})["results"]
+        fixtures["places"][count] = places
+        fixtures["spots"][count] = [location_agent._format_place_data(place, *CENTER) for place in places]
+
+    for days in FORECAST_DAYS:
+        state = StubState(StubConfig(forecast_days=days))
+        params = {"location.latitude": CENTER[0], "location.longitude": CENTER[1]}
+        current, forecast = state.current_conditions(params), state.forecast_days(params)
+        fixtures["weather"][days] = {
+            "raw": (current, forecast),
+            "formatted": weather_agent._format_weather_data(current, forecast, "Paris"),
+        }
+    return fixtures
+
+def build_cases(fixtures: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any]]]:
+    location_agent = LocationAgent()
+    weather_agent = WeatherAgent()
+    supervisor = SupervisorAgent(location_agent, weather_agent)
+    mcp_server = MCPServer()
+    weather = fixtures["weather"][5]["formatted"]
+
+    cases = []
+    for count in PLACE_COUNTS:
+        places, spots = fixtures["places"][count], fixtures["spots"][count]
+        cases += [
+            (f"location.format_place_data[{count} places]",
+             lambda places=places: [location_agent._format_place_data(place, *CENTER) for place in places]),
+            (f"location.generate_spot_recommendations[{count}]",
+             lambda spots=spots: location_agent._generate_spot_recommendations(spots)),
+            (f"supervisor.generate_recommendations[{count}]",
+             lambda spots=spots: supervisor._generate_recommendations(spots, weather)),
+            (f"supervisor.generate_travel_tips[{count}]",
+             lambda spots=spots: supervisor._generate_travel_tips(spots, weather)),
+            (f"mcp.get_travel_recommendations[{count}]",
+             lambda spots=spots: run_sync(mcp_server._handle_get_travel_recommendations(
+                 {"location": "Paris", "weather_data": weather, "tourist_spots": spots}))),
+        ]
+
+    for days in FORECAST_DAYS:
+        current, forecast = fixtures["weather"][days]["raw"]
+        formatted = fixtures["weather"][days]["formatted"]
+        cases += [
+            (f"weather.format_weather_data[{days} days]",
+             lambda current=current, forecast=forecast: weather_agent._format_weather_data(current, forecast, "Paris")),
+            (f"weather.generate_weather_recommendations[{days} days]",
+             lambda formatted=formatted: weather_agent._generate_weather_recommendations(formatted)),
+            (f"supervisor.generate_timing_recommendations[{days} days]",
+             lambda formatted=formatted: supervisor._generate_timing_recommendations(formatted)),
+        ]
+
+    extractor = get_location_extractor()
+    for kind, message in EXTRACTOR_MESSAGES.items():
+        cases.append((f"location_extractor.extract[{kind}]", lambda message=message: extractor.extract(message)))
+
+    place_index = get_place_index()
+    cases.append(("place_index.lookup", lambda: place_index.lookup("new york city")))
+    for prefix in AUTOCOMPLETE_PREFIXES:
+        # _rank is the uncached path; complete() would answer from the prefix cache after the first call
+        cases.append((f"place_index.rank[{prefix}]", lambda prefix=prefix: place_index._rank(prefix.encode())))
+
+    reverse_geocoder = get_reverse_geocoder()
+    cases.append(("reverse_geocoder.nearest", lambda: reverse_geocoder.nearest(*CENTER)))
+    return cases
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        func()  # warm caches so only steady-state allocation is measured
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"us_per_call": round(best * 1e6, 3), "peak_alloc_kib": round((peak - baseline) / 1024, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in build_cases(build_fixtures()):
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(func, args.repeat)
+        print(f"{name:<52} {results[name]['us_per_call']:>12.3f} us  {results[name]['peak_alloc_kib']:>10.2f} KiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before and result["us_per_call"] > before["us_per_call"] * (1 + args.max_regression):
+                regressions.append(f"{name}: {before['us_per_call']}us -> {result['us_per_call']}us")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Startup Benchmark - Tracks import time and cold-start time of the agent server
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+
+Every measurement runs in a fresh interpreter so module caches never hide the
+real cold-start cost an autoscaled pod pays.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List, Optional
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each probe prints the elapsed seconds of the step it measures
+PROBES = {
+    "import_main": (
+        "import time; t = time.perf_counter(); import main; "
+        "print(time.perf_counter() - t)"
+    ),
+    "startup_event": (
+        "import asyncio, time, main; t = time.perf_counter(); "
+        "asyncio.run(main.startup_event()); print(time.perf_counter() - t)"
+    ),
+    "import_adk_package": (
+        "import time; t = time.perf_counter(); import agents.Supervisor; "
+        "print(time.perf_counter() - t)"
+    ),
+    "resolve_adk_root_agent": (
+        "import time, agents.Supervisor as s; t = time.perf_counter(); s.root_agent; "
+        "print(time.perf_counter() - t)"
+    ),
+    # A worker that only ever delegates to googleMapsAgent
+    "adk_maps_path": (
+        "import time, agents.Supervisor as s; t = time.perf_counter(); s.root_agent; "
+        "from agents.Supervisor.sub_agents import get_sub_agent_registry; "
+        "get_sub_agent_registry().get('googleMapsAgent'); print(time.perf_counter() - t)"
+    ),
+    # What every worker paid when the supervisor imported all sub-agents eagerly
+    "adk_all_sub_agents": (
+        "import time, agents.Supervisor as s; t = time.perf_counter(); s.root_agent; "
+        "from agents.Supervisor.sub_agents import SUB_AGENTS, get_sub_agent_registry; "
+        "[get_sub_agent_registry().get(name) for name in SUB_AGENTS]; print(time.perf_counter() - t)"
+    ),
+}
+
+def run_probe(code: str) -> Optional[float]:
+    """Run one probe in a fresh interpreter, returning seconds or None on failure"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=SERVER_DIR,
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def top_imports(limit: int) -> List[Dict[str, Any]]:
+    """Slowest modules (cumulative microseconds) reported by -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self_us | cumulative_us | module"
+        _, cumulative_us, module = line.split("|", 2)
+        rows.append({"module": module.strip(), "cumulative_us": int(cumulative_us)})
+    rows.sort(key=lambda row: row["cumulative_us"], reverse=True)
+    return rows[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {"runs": args.runs, "probes": {}}
+    for name, code in PROBES.items():
+        samples = [run_probe(code) for _ in range(args.runs)]
+        samples = [sample for sample in samples if sample is not None]
+        if not samples:
+            results["probes"][name] = None
+            print(f"{name:<24} unavailable")
+            continue
+        results["probes"][name] = {
+            "median_ms": round(statistics.median(samples) * 1000, 2),
+            "min_ms": round(min(samples) * 1000, 2),
+            "max_ms": round(max(samples) * 1000, 2),
+        }
+        print(f"{name:<24} median={results['probes'][name]['median_ms']}ms")
+
+    maps_path, all_agents = results["probes"].get("adk_maps_path"), results["probes"].get("adk_all_sub_agents")
+    if maps_path and all_agents:
+        results["lazy_sub_agents_saved_ms"] = round(all_agents["median_ms"] - maps_path["median_ms"], 2)
+        print(f"{'lazy_sub_agents_saved':<24} {results['lazy_sub_agents_saved_ms']}ms "
+              f"(tripPlannerAgent and bookingAgent never built)")
+
+    results["slowest_imports"] = top_imports(args.top)
+    for row in results["slowest_imports"]:
+        print(f"  {row['cumulative_us'] / 1000:>9.2f}ms  {row['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Tool Compaction Benchmark - Estimated prompt tokens of googleMapsAgent tool results, raw versus compacted
+
+Usage:
+    python benchmarks/bench_tool_compaction.py --cities Paris,Rome,Tokyo
+    python benchmarks/bench_tool_compaction.py --max-results 20 --budget 400 --output compaction.json
+
+Each tool is called for every city against the local upstream stub, and
+its result is measured as the model would receive it without and with the
+ToolOutputCompactor. Tokens are the compactor's estimate (compact JSON,
+about four characters per token), which is what the budget is enforced on.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, Any
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from stubs.upstream_server import StubConfig, agent_environment, start_stub_server
+
+async def benchmark(args) -> Dict[str, Any]:
+    from agents.Supervisor.sub_agents.googleMapsAgent import tools as maps_tools
+    from agents.Supervisor.tool_compaction import ToolOutputCompactor, estimate_tokens
+
+    compactor = ToolOutputCompactor(budget=args.budget)
+    totals: Dict[str, Dict[str, float]] = {}
+    for city in args.cities.split(","):
+        geocoded = await maps_tools.geocode_location(city)
+        calls = {
+            "geocode_location": geocoded,
+            "find_tourist_spots": await maps_tools.find_tourist_spots(
+                city, geocoded["latitude"], geocoded["longitude"], args.radius_km, args.max_results
+            ),
+            "get_weather_info": await maps_tools.get_weather_info(city, geocoded["latitude"], geocoded["longitude"]),
+        }
+        for name, result in calls.items():
+            started = time.perf_counter()
+            compact = compactor.after_tool_callback(SimpleNamespace(name=name), {}, None, result) or result
+            elapsed_us = (time.perf_counter() - started) * 1e6
+            tool = totals.setdefault(name, {"calls": 0, "raw_tokens": 0, "compact_tokens": 0, "compaction_us": 0.0})
+            tool["calls"] += 1
+            tool["raw_tokens"] += estimate_tokens(result)
+            tool["compact_tokens"] += estimate_tokens(compact)
+            tool["compaction_us"] += elapsed_us
+
+    report = {}
+    for name, tool in totals.items():
+        calls = tool["calls"]
+        report[name] = {
+            "raw_tokens_per_call": round(tool["raw_tokens"] / calls),
+            "compact_tokens_per_call": round(tool["compact_tokens"] / calls),
+            "saved_per_call": round((tool["raw_tokens"] - tool["compact_tokens"]) / calls),
+            "saved_pct": round(100 * (1 - tool["compact_tokens"] / max(tool["raw_tokens"], 1)), 1),
+            "compaction_us_per_call": round(tool["compaction_us"] / calls, 1),
+        }
+        print(f"{name:<20} raw={report[name]['raw_tokens_per_call']:>5} "
+              f"compact={report[name]['compact_tokens_per_call']:>5} "
+              f"saved={report[name]['saved_per_call']:>5} ({report[name]['saved_pct']}%) "
+              f"in {report[name]['compaction_us_per_call']}us")
+    return {"budget": args.budget, "max_results": args.max_results, "tools": report}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", default="Paris,Rome,Tokyo")
+    parser.add_argument("--max-results", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=5)
+    parser.add_argument("--budget", type=int, default=800, help="Token budget per tool result")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    stub_server, stub_url = start_stub_server(StubConfig())
+    os.environ.update(agent_environment(stub_url))
+    os.environ["SHARED_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="compaction-"), "cache.sqlite3")
+    try:
+        report = asyncio.run(benchmark(args))
+    finally:
+        stub_server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
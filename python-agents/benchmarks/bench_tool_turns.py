@@ -0,0 +1,148 @@
+"""
+Tool Turn Benchmark - Multi-city ADK tool turns, sequential versus concurrent execution
+
+Usage:
+    python benchmarks/bench_tool_turns.py --cities Paris,Rome,Tokyo --runs 10
+    python benchmarks/bench_tool_turns.py --stub-latency-ms 150 --warm --output turns.json
+
+A stand-in model replays what gemini-2.0-flash emits for "weather and sights
+for these cities": one turn of geocode calls (repeating one city, as models
+do), then one turn with a spots and a weather call per city. The driver
+mirrors ADK's loop, awaiting each function call of a turn in order. In
+"sequential" mode the plain tools are called; in "concurrent" mode the
+googleMapsAgent TurnToolExecutor sees each model response first. Upstream
+calls go to the local stub; the shared cache is cleared before every
+conversation unless --warm is given.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, Any, List
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from stubs.upstream_server import StubConfig, agent_environment, start_stub_server
+
+def function_call(name: str, **args) -> SimpleNamespace:
+    return SimpleNamespace(function_call=SimpleNamespace(name=name, args=args))
+
+class StandInModel:
+    """Deterministic replacement for the LLM: emits the function calls of each turn"""
+
+    def __init__(self, cities: List[str]):
+        self.cities = cities
+
+    def geocode_turn(self) -> SimpleNamespace:
+        parts = [function_call("geocode_location", location_name=city) for city in self.cities]
+        parts.append(function_call("geocode_location", location_name=self.cities[0]))
+        return SimpleNamespace(content=SimpleNamespace(parts=parts))
+
+    def lookup_turn(self, coordinates: Dict[str, Dict[str, float]]) -> SimpleNamespace:
+        parts = []
+        for city in self.cities:
+            lat, lng = coordinates[city]["latitude"], coordinates[city]["longitude"]
+            parts.append(function_call("find_tourist_spots", location_name=city, latitude=lat, longitude=lng,
+                                       radius_km=5, max_results=10))
+            parts.append(function_call("get_weather_info", location_name=city, latitude=lat, longitude=lng))
+        return SimpleNamespace(content=SimpleNamespace(parts=parts))
+
+async def run_turn(response, tools: Dict[str, Any], executor, context) -> List[Any]:
+    """What ADK does with one model response: callbacks, then each call in order"""
+    if executor is not None:
+        executor.after_model_callback(context, response)
+    results = []
+    for part in response.content.parts:
+        call = part.function_call
+        if executor is not None:
+            results.append(await tools[call.name](tool_context=context, **call.args))
+        else:
+            results.append(await tools[call.name](**call.args))
+    return results
+
+async def run_conversation(model: StandInModel, tools: Dict[str, Any], executor, run_id: str) -> Dict[str, float]:
+    context = SimpleNamespace(invocation_id=run_id)
+    timings = {}
+
+    started = time.perf_counter()
+    geocoded = await run_turn(model.geocode_turn(), tools, executor, context)
+    timings["geocode_turn_ms"] = (time.perf_counter() - started) * 1000
+    coordinates = dict(zip(model.cities, geocoded))
+
+    started = time.perf_counter()
+    await run_turn(model.lookup_turn(coordinates), tools, executor, context)
+    timings["lookup_turn_ms"] = (time.perf_counter() - started) * 1000
+
+    if executor is not None:
+        executor.after_model_callback(context, SimpleNamespace(content=None))  # final text turn
+    timings["conversation_ms"] = timings["geocode_turn_ms"] + timings["lookup_turn_ms"]
+    return timings
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    return {
+        key: round(statistics.median(sample[key] for sample in samples), 2)
+        for key in samples[0]
+    }
+
+async def benchmark(args) -> Dict[str, Any]:
+    from agents.Supervisor.sub_agents.googleMapsAgent import tools as maps_tools
+    from agents.Supervisor.turn_executor import TurnToolExecutor
+    from agents.services import ensure_initialized
+    from core.shared_cache import get_shared_cache
+
+    await ensure_initialized()
+    plain = [maps_tools.find_tourist_spots, maps_tools.get_weather_info, maps_tools.geocode_location]
+    executor = TurnToolExecutor(plain)
+    modes = {
+        "sequential": ({tool.__name__: tool for tool in plain}, None),
+        "concurrent": ({tool.__name__: tool for tool in executor.tools}, executor),
+    }
+
+    model = StandInModel(args.cities.split(","))
+    results = {}
+    for mode, (tools, turn_executor) in modes.items():
+        samples = []
+        for run in range(args.runs):
+            if not args.warm:
+                get_shared_cache().clear()
+            samples.append(await run_conversation(model, tools, turn_executor, f"{mode}-{run}"))
+        results[mode] = summarize(samples)
+        print(f"{mode:<11} geocode={results[mode]['geocode_turn_ms']}ms "
+              f"lookup={results[mode]['lookup_turn_ms']}ms total={results[mode]['conversation_ms']}ms")
+
+    speedup = results["sequential"]["conversation_ms"] / max(results["concurrent"]["conversation_ms"], 1e-9)
+    print(f"speedup x{speedup:.2f}, deduplicated calls: {executor.stats['deduplicated']}")
+    return {"results": results, "speedup": round(speedup, 2), "executor": executor.stats}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", default="Paris,Rome,Tokyo")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--stub-latency-ms", type=float, default=80.0)
+    parser.add_argument("--warm", action="store_true", help="Keep the shared cache between conversations")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    stub_server, stub_url = start_stub_server(
+        StubConfig.from_dict({"default": {"latency": {"median_ms": args.stub_latency_ms}}})
+    )
+    os.environ.update(agent_environment(stub_url))
+    os.environ["SHARED_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="toolturns-"), "cache.sqlite3")
+    try:
+        report = asyncio.run(benchmark(args))
+    finally:
+        stub_server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
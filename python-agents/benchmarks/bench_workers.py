@@ -0,0 +1,71 @@
+"""
+Worker Scaling Benchmark - Measures server throughput from 1 to N worker processes
+
+Usage:
+    python benchmarks/bench_workers.py --max-workers 4 --concurrency 32 --duration 10
+
+Each step launches ``main.py`` in production mode on a free port, waits for
+``/health``, then drives the chosen endpoint with a thread pool for the given
+duration and reports requests/s and latency percentiles.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Any
+
+from loadgen import drive_load, free_port, wait_until_healthy
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_step(workers: int, args) -> Dict[str, Any]:
+    port = free_port()
+    env = dict(os.environ,
+               PYTHON_SERVER_ENV="production",
+               PYTHON_SERVER_WORKERS=str(workers),
+               PYTHON_SERVER_PORT=str(port),
+               PYTHON_SERVER_HOST="127.0.0.1",
+               PYTHON_SERVER_PRELOAD="true" if args.preload else "false")
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=SERVER_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_healthy(base_url)
+        cities = args.locations.split(",")
+        payload_for = lambda i: {"location": cities[i % len(cities)]}
+        drive_load(base_url, args.endpoint, payload_for, args.concurrency, min(2.0, args.duration))  # warm-up
+        result = drive_load(base_url, args.endpoint, payload_for, args.concurrency, args.duration)
+        result["workers"] = workers
+        return result
+    finally:
+        process.terminate()
+        process.wait(timeout=15)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--endpoint", default="/api/tourist-spots")
+    parser.add_argument("--locations", default="Paris,London,Tokyo,New York,Rome")
+    parser.add_argument("--preload", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for workers in range(1, args.max_workers + 1):
+        result = run_step(workers, args)
+        results.append(result)
+        print(f"workers={workers:<3} rps={result['requests_per_second']:<10} "
+              f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
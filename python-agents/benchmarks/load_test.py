@@ -0,0 +1,225 @@
+"""
+End-to-end Load Test - Latency SLO report for every FastAPI endpoint
+
+Usage:
+    python benchmarks/load_test.py --concurrency 1,8,32 --duration 10 --output results.json
+    python benchmarks/load_test.py --target uvicorn --workers 4 --slo benchmarks/slo.json
+    python benchmarks/load_test.py --baseline main.json --max-regression 0.2
+
+The app runs in-process (uvicorn in a background thread) or as a separate
+uvicorn process, always against the local upstream stub, with a fresh shared
+cache per run. For each endpoint and concurrency level it reports requests/s,
+p50/p95/p99, a latency histogram and the shared-cache hit rate. Results are
+stored as JSON tagged with the current git commit. The exit status is 1 when
+an SLO from --slo is violated or p95 regresses against --baseline.
+
+The stub answers far faster than Google's published rate limits allow, so
+the per-API limits are lifted for the run (explicit RATE_LIMIT_* variables
+still win) and the numbers measure the app rather than time spent queued
+for a token. --production-rate-limits keeps the real limits.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, List, Tuple
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from core.rate_limiter import DEFAULT_LIMITS
+from loadgen import drive_load, free_port, get_json, wait_until_healthy
+from stubs.upstream_server import StubConfig, agent_environment, start_stub_server
+
+CITIES = [
+    "Paris", "London", "Tokyo", "New York", "Rome", "Barcelona", "Sydney", "San Francisco",
+    "Berlin", "Lisbon", "Prague", "Vienna", "Amsterdam", "Istanbul", "Bangkok", "Seoul",
+]
+
+ENDPOINTS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "/api/tourist-spots": lambda i: {"location": CITIES[i % len(CITIES)], "radius_km": 5.0, "max_results": 20},
+    "/api/weather": lambda i: {"location": CITIES[i % len(CITIES)]},
+    "/api/agent-message": lambda i: {
+        "message": (f"What is the weather in {CITIES[i % len(CITIES)]}" if i % 2
+                    else f"Which tourist attractions should I visit in {CITIES[i % len(CITIES)]}"),
+        "agent_type": "supervisor",
+    },
+    "/api/travel-plan": lambda i: {"location": CITIES[i % len(CITIES)]},
+}
+
+# Tokens per second and burst for every API when the limits are lifted
+UNLIMITED_RATE = "1000000"
+
+def start_in_process(port: int) -> Callable[[], None]:
+    """Run the app with uvicorn in a daemon thread of this process"""
+    import uvicorn
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+    return stop
+
+def start_uvicorn(port: int, workers: int) -> Callable[[], None]:
+    """Run the app as a separate production-mode process"""
+    env = dict(os.environ,
+               PYTHON_SERVER_ENV="production",
+               PYTHON_SERVER_WORKERS=str(workers),
+               PYTHON_SERVER_PORT=str(port),
+               PYTHON_SERVER_HOST="127.0.0.1")
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def stop():
+        process.terminate()
+        process.wait(timeout=15)
+    return stop
+
+def cache_counters(base_url: str) -> Dict[str, Dict[str, int]]:
+    try:
+        return get_json(f"{base_url}/api/cache/stats")["stats"]
+    except Exception:
+        return {}
+
+def hit_rate_delta(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, float]:
+    """Hit rate per cache namespace over one measurement step"""
+    rates = {}
+    for namespace, counters in after.items():
+        previous = before.get(namespace, {})
+        hits = counters.get("hits", 0) - previous.get("hits", 0)
+        misses = counters.get("misses", 0) - previous.get("misses", 0)
+        if hits + misses:
+            rates[namespace] = round(hits / (hits + misses), 4)
+    return rates
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR,
+                              capture_output=True, text=True).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+def check_slos(results: List[Dict[str, Any]], slos: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    SLO file format: {"<endpoint>": {"p95_ms": 250, "p99_ms": 500, "min_rps": 50,
+    "max_error_rate": 0.01, "concurrency": 8}}. Without "concurrency" the SLO
+    applies to every level measured.
+    """
+    violations = []
+    for result in results:
+        slo = slos.get(result["endpoint"])
+        if not slo or ("concurrency" in slo and slo["concurrency"] != result["concurrency"]):
+            continue
+        label = f"{result['endpoint']} @c{result['concurrency']}"
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if metric in slo and result[metric] > slo[metric]:
+                violations.append(f"{label}: {metric} {result[metric]} > {slo[metric]}")
+        if "min_rps" in slo and result["requests_per_second"] < slo["min_rps"]:
+            violations.append(f"{label}: rps {result['requests_per_second']} < {slo['min_rps']}")
+        if "max_error_rate" in slo and result["error_rate"] > slo["max_error_rate"]:
+            violations.append(f"{label}: error rate {result['error_rate']} > {slo['max_error_rate']}")
+    return violations
+
+def check_regressions(results: List[Dict[str, Any]], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """p95 that grew by more than `max_regression` (fraction) against the same step of a baseline run"""
+    previous: Dict[Tuple[str, int], Dict[str, Any]] = {
+        (row["endpoint"], row["concurrency"]): row for row in baseline.get("results", [])
+    }
+    regressions = []
+    for result in results:
+        before = previous.get((result["endpoint"], result["concurrency"]))
+        if before and before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{result['endpoint']} @c{result['concurrency']}: p95 {before['p95_ms']}ms -> "
+                f"{result['p95_ms']}ms (baseline {baseline.get('commit', '?')})"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for --target uvicorn")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency sweep")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step")
+    parser.add_argument("--stub-config", help="JSON StubConfig for the upstream stub")
+    parser.add_argument("--stub-latency-ms", type=float, default=80.0)
+    parser.add_argument("--slo", help="JSON file with per-endpoint SLOs")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--production-rate-limits", action="store_true",
+                        help="Keep the published per-API rate limits instead of lifting them for the stub")
+    args = parser.parse_args()
+
+    if args.stub_config:
+        with open(args.stub_config) as f:
+            stub_config = StubConfig.from_dict(json.load(f))
+    else:
+        stub_config = StubConfig.from_dict({"default": {"latency": {"median_ms": args.stub_latency_ms}}})
+    stub_server, stub_url = start_stub_server(stub_config)
+
+    # Agents read these when main is imported or the server process starts
+    os.environ.update(agent_environment(stub_url))
+    os.environ["SHARED_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "cache.sqlite3")
+    if not args.production_rate_limits:
+        for api in DEFAULT_LIMITS:
+            os.environ.setdefault(f"RATE_LIMIT_{api.upper()}_RPS", UNLIMITED_RATE)
+            os.environ.setdefault(f"RATE_LIMIT_{api.upper()}_BURST", UNLIMITED_RATE)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    stop = start_in_process(port) if args.target == "inprocess" else start_uvicorn(port, args.workers)
+
+    results = []
+    try:
+        wait_until_healthy(base_url)
+        for endpoint in args.endpoints.split(","):
+            for concurrency in (int(level) for level in args.concurrency.split(",")):
+                before = cache_counters(base_url)
+                result = drive_load(base_url, endpoint, ENDPOINTS[endpoint], concurrency, args.duration)
+                result.update(endpoint=endpoint, concurrency=concurrency,
+                              cache_hit_rates=hit_rate_delta(before, cache_counters(base_url)))
+                results.append(result)
+                print(f"{endpoint:<22} c={concurrency:<4} rps={result['requests_per_second']:<9} "
+                      f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                      f"errors={result['errors']} hits={result['cache_hit_rates']}")
+    finally:
+        stop()
+        stub_server.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {"target": args.target, "workers": args.workers, "duration": args.duration,
+                   "stub_latency_ms": args.stub_latency_ms,
+                   "production_rate_limits": args.production_rate_limits},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if args.slo:
+        with open(args.slo) as f:
+            failures += check_slos(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += check_regressions(results, json.load(f), args.max_regression)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
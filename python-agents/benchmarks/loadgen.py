@@ -0,0 +1,103 @@
+"""
+Load Generator - Shared closed-loop HTTP load driver for the benchmark scripts
+"""
+
+import json
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_healthy(base_url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+def get_json(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read())
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def histogram(samples: List[float]) -> Dict[str, int]:
+    """Count of samples per latency bucket, keyed by the bucket's upper bound"""
+    counts = {f"le_{bound}ms": 0 for bound in HISTOGRAM_BUCKETS_MS}
+    counts["gt_5000ms"] = 0
+    for sample in samples:
+        ms = sample * 1000
+        for bound in HISTOGRAM_BUCKETS_MS:
+            if ms <= bound:
+                counts[f"le_{bound}ms"] += 1
+                break
+        else:
+            counts["gt_5000ms"] += 1
+    return counts
+
+def drive_load(base_url: str, endpoint: str, payload_for: Callable[[int], Dict[str, Any]],
+               concurrency: int, duration: float) -> Dict[str, Any]:
+    """
+    Closed-loop load: `concurrency` threads each send POSTs back to back for
+    `duration` seconds. `payload_for(i)` builds the body of the i-th request.
+    """
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def worker(worker_id: int):
+        nonlocal errors
+        index = worker_id
+        while time.time() < stop_at:
+            body = json.dumps(payload_for(index)).encode()
+            index += concurrency
+            request = urllib.request.Request(
+                f"{base_url}{endpoint}", data=body,
+                headers={"Content-Type": "application/json"}, method="POST"
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+            except Exception:
+                with lock:
+                    errors += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for worker_id in range(concurrency):
+            pool.submit(worker, worker_id)
+
+    total = len(latencies) + errors
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "requests_per_second": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "histogram": histogram(latencies),
+    }
@@ -0,0 +1,174 @@
+"""
+Canonical Locations - Maps every spelling of a place to one name, id and coordinates before cache lookups
+"""
+
+import functools
+import inspect
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from core.gazetteer import matches_qualifier
+from core.metrics import get_metrics_registry
+from core.place_index import PlaceIndex, get_place_index
+from core.reverse_geocoder import ReverseGeocoder, get_reverse_geocoder, is_placeholder_location
+from core.shared_cache import get_shared_cache, normalize_key
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class CanonicalLocation:
+    name: str
+    key: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    address: Optional[str] = None
+    country: Optional[str] = None
+    source: str = "text"
+
+class LocationCanonicalizer:
+    """
+    Resolves a free-form location to its canonical form, in order:
+
+    1. the gazetteer's place index, by name or alias ("PARIS!", " paris ",
+       "Paris, France" all become "Paris" with id gn:<id> and coordinates),
+       without touching the network. A qualifier naming another country or
+       region ("Paris, Texas") skips the gazetteer;
+    2. the alias table, where every name geocoded upstream is recorded
+       against its Google place id and formatted address, shared by all
+       workers through the shared cache;
+    3. otherwise the name itself, whitespace-trimmed, keyed by its
+       normalized text.
+
+    Coordinate-only locations (a map pin sent as "", "Current Location" or
+    "48.85,2.35") are named after the nearest gazetteer place instead, by
+    the reverse geocoder, and keep their exact coordinates; beyond its range
+    they fall back to the coordinates rounded to about a kilometre.
+
+    Agents then look up and store geocode, last-known-good and billing
+    entries under one name per place instead of one per spelling, and skip
+    geocoding when the canonical form has coordinates.
+    """
+
+    def __init__(self, place_index: PlaceIndex = None, reverse_geocoder: ReverseGeocoder = None):
+        self.place_index = place_index or get_place_index()
+        self.reverse_geocoder = reverse_geocoder or get_reverse_geocoder()
+        self.cache = get_shared_cache()
+        self.stats = {
+            "lookups": 0, "gazetteer": 0, "alias": 0, "text": 0, "reverse": 0, "coordinates": 0, "collapsed": 0
+        }
+        registry = get_metrics_registry()
+        self.resolved = registry.counter(
+            "location_canonicalization_total", "Location names canonicalized, by where the canonical form came from",
+            ("source",)
+        )
+        self.collapsed = registry.counter(
+            "location_canonicalization_collapsed_total",
+            "Lookups whose canonical name differs from the name given, so they now share cache entries"
+        )
+
+    def canonicalize(self, location: str, count: bool = True) -> CanonicalLocation:
+        """Canonical form of a location; count=False for lookups that only label a response"""
+        key = normalize_key(location)
+        canonical = self._lookup(location, key)
+        if not count:
+            return canonical
+        self._count(canonical)
+        if " ".join(location.lower().split()) != canonical.name.lower():
+            self.stats["collapsed"] += 1
+            self.collapsed.inc()
+        return canonical
+
+    def from_coordinates(self, latitude: float, longitude: float, count: bool = True) -> CanonicalLocation:
+        """Canonical form of a coordinate-only location, named after the nearest gazetteer place"""
+        nearest = self.reverse_geocoder.nearest(latitude, longitude)
+        if nearest:
+            place = nearest.place
+            canonical = CanonicalLocation(place.name, f"gn:{place.id}", latitude, longitude,
+                                          place.display_name, place.country, "reverse")
+        else:
+            name = f"{latitude:.2f},{longitude:.2f}"
+            canonical = CanonicalLocation(name, name, latitude, longitude, source="coordinates")
+        if count:
+            self._count(canonical)
+        return canonical
+
+    def label(self, location: Optional[str], latitude: float = None, longitude: float = None) -> str:
+        """Canonical name to show for a request's location, without counting a lookup"""
+        if is_placeholder_location(location) and latitude is not None and longitude is not None:
+            return self.from_coordinates(latitude, longitude, count=False).name
+        return self.canonicalize(location, count=False).name if location else ""
+
+    def _count(self, canonical: CanonicalLocation):
+        self.stats["lookups"] += 1
+        self.stats[canonical.source] += 1
+        self.resolved.inc(canonical.source)
+
+    def _lookup(self, location: str, key: str) -> CanonicalLocation:
+        place = self.place_index.lookup(key)
+        if not place and "," in location:
+            # "Paris, France" -> "Paris", but "Paris, Texas" is left to the geocoder: the head only
+            # stands for the place when every qualifier names its country or region
+            head, *qualifiers = location.split(",")
+            place = self.place_index.lookup(head)
+            if place and not all(matches_qualifier(place, qualifier) for qualifier in qualifiers):
+                place = None
+        if place:
+            return CanonicalLocation(place.name, f"gn:{place.id}", place.latitude, place.longitude,
+                                     place.display_name, place.country, "gazetteer")
+
+        alias = self.cache.get("alias", key) if key else None
+        if alias:
+            return CanonicalLocation(alias["name"], alias["key"], alias["lat"], alias["lng"],
+                                     alias["name"], alias.get("country"), "alias")
+        return CanonicalLocation(" ".join(location.split()), key)
+
+    def remember(self, location: str, record: Dict[str, Any]):
+        """Record an upstream geocode result as the canonical form of `location` and every later spelling of it"""
+        place_id = record.get('place_id')
+        key = normalize_key(location)
+        if not place_id or not key or self.place_index.lookup(key):
+            return
+        self.cache.set("alias", key, {
+            "name": record.get('formatted_address') or location,
+            "key": f"gp:{place_id}",
+            "lat": record['lat'],
+            "lng": record['lng'],
+            "country": record.get('country'),
+        })
+
+    def hit_rates(self) -> Dict[str, Any]:
+        lookups = self.stats["lookups"]
+        unresolved = self.stats["text"] + self.stats["coordinates"]
+        return dict(self.stats, resolved_rate=round((lookups - unresolved) / lookups, 4) if lookups else 0.0)
+
+_canonicalizer: Optional[LocationCanonicalizer] = None
+
+def get_location_canonicalizer() -> LocationCanonicalizer:
+    """Return the process-wide location canonicalizer"""
+    global _canonicalizer
+    if _canonicalizer is None:
+        _canonicalizer = LocationCanonicalizer()
+    return _canonicalizer
+
+def canonical_location(func):
+    """
+    Decorator replacing an agent method's `location` with its canonical name,
+    filling in missing coordinates, and naming coordinate-only locations
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        arguments = bound.arguments
+        latitude, longitude = arguments.get("latitude"), arguments.get("longitude")
+        if latitude is not None and longitude is not None and is_placeholder_location(arguments.get("location")):
+            arguments["location"] = get_location_canonicalizer().from_coordinates(latitude, longitude).name
+        elif arguments.get("location"):
+            canonical = get_location_canonicalizer().canonicalize(arguments["location"])
+            arguments["location"] = canonical.name
+            if canonical.latitude is not None and not (arguments.get("latitude") and arguments.get("longitude")):
+                arguments["latitude"], arguments["longitude"] = canonical.latitude, canonical.longitude
+        return await func(*bound.args, **bound.kwargs)
+    return wrapper
@@ -0,0 +1,122 @@
+"""
+Circuit Breaker - Fails fast on unhealthy upstream endpoints and tracks their latency
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+class CircuitBreaker:
+    """
+    Per-endpoint breaker.
+
+    The circuit opens after `failure_threshold` consecutive failures, where a
+    call slower than `slow_call_seconds` also counts as a failure. While open,
+    callers are rejected immediately so they can serve their degraded path.
+    After `reset_seconds` a single probe call is let through (half-open); its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_seconds: float = None,
+                 slow_call_seconds: float = None, window: int = 200):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+        self.reset_seconds = reset_seconds or float(os.getenv('CIRCUIT_RESET_SECONDS', 30))
+        self.slow_call_seconds = slow_call_seconds or float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 3))
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self.latencies = deque(maxlen=window)
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream right now"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def release_probe(self):
+        """Let another probe through when the half-open probe never reached the upstream"""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        if latency > self.slow_call_seconds:
+            self.record_failure(f"slow call ({latency:.2f}s)")
+            return
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self.state = CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self, reason: str = "error"):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} failures ({reason})")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile (seconds) over the recent window"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    def hedge_delay(self, default: float, min_samples: int = 20) -> float:
+        """p95-based delay before sending a hedged request"""
+        if len(self.latencies) < min_samples:
+            return default
+        return max(0.05, self.percentile(95))
+
+    def metrics(self) -> Dict[str, Any]:
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for an upstream endpoint"""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+def circuit_metrics() -> Dict[str, Any]:
+    return {name: breaker.metrics() for name, breaker in _breakers.items()}
@@ -0,0 +1,56 @@
+"""
+Degraded-Mode Store - Keeps the last successful upstream response per location
+"""
+
+import logging
+import os
+import time
+from typing import Any, Optional, Tuple
+
+from core.shared_cache import get_shared_cache, normalize_key
+
+logger = logging.getLogger(__name__)
+
+# How long a last-known-good response may be served during an outage
+LKG_TTL_SECONDS = int(os.getenv('LKG_TTL_SECONDS', 7 * 24 * 3600))
+
+class LastKnownGoodStore:
+    """
+    Last-known-good responses, shared by all workers through the shared cache.
+
+    Agents `remember` every successful result and `recall` it when the
+    upstream fails, so an outage serves slightly stale real data for places we
+    have seen before instead of generic mock data.
+    """
+
+    def __init__(self, ttl: int = LKG_TTL_SECONDS):
+        self.cache = get_shared_cache()
+        self.ttl = ttl
+        self.served = 0
+
+    def remember(self, kind: str, location: str, value: Any):
+        if not location or not value:
+            return
+        self.cache.set(f"lkg_{kind}", normalize_key(location), {
+            "stored_at": time.time(),
+            "value": value
+        }, ttl=self.ttl)
+
+    def recall(self, kind: str, location: str) -> Optional[Tuple[Any, int]]:
+        """Return (value, age in seconds) or None when the location was never seen"""
+        if not location:
+            return None
+        entry = self.cache.get(f"lkg_{kind}", normalize_key(location))
+        if not entry:
+            return None
+        self.served += 1
+        return entry["value"], int(time.time() - entry["stored_at"])
+
+_store: Optional[LastKnownGoodStore] = None
+
+def get_degraded_store() -> LastKnownGoodStore:
+    """Return the process-wide last-known-good store"""
+    global _store
+    if _store is None:
+        _store = LastKnownGoodStore()
+    return _store
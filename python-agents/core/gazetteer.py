@@ -0,0 +1,163 @@
+"""
+Gazetteer - Local table of named places with coordinates, loaded from a GeoNames-format dump
+"""
+
+import logging
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.tsv")
+
+@dataclass(frozen=True)
+class Place:
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    country: str
+    population: int
+    aliases: Tuple[str, ...] = ()
+    admin1: str = ""
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+# Country names by ISO code, for qualifiers such as "Valencia, Venezuela"
+COUNTRY_NAMES = {
+    'AE': 'United Arab Emirates', 'AM': 'Armenia', 'AR': 'Argentina', 'AT': 'Austria', 'AU': 'Australia',
+    'AZ': 'Azerbaijan', 'BD': 'Bangladesh', 'BE': 'Belgium', 'BG': 'Bulgaria', 'BO': 'Bolivia',
+    'BR': 'Brazil', 'CA': 'Canada', 'CH': 'Switzerland', 'CL': 'Chile', 'CN': 'China', 'CO': 'Colombia',
+    'CR': 'Costa Rica', 'CU': 'Cuba', 'CZ': 'Czechia', 'DE': 'Germany', 'DK': 'Denmark', 'EC': 'Ecuador',
+    'EE': 'Estonia', 'EG': 'Egypt', 'ES': 'Spain', 'ET': 'Ethiopia', 'FI': 'Finland', 'FR': 'France',
+    'GB': 'United Kingdom', 'GE': 'Georgia', 'GH': 'Ghana', 'GR': 'Greece', 'HK': 'Hong Kong',
+    'HR': 'Croatia', 'HU': 'Hungary', 'ID': 'Indonesia', 'IE': 'Ireland', 'IL': 'Israel', 'IN': 'India',
+    'IQ': 'Iraq', 'IR': 'Iran', 'IS': 'Iceland', 'IT': 'Italy', 'JO': 'Jordan', 'JP': 'Japan',
+    'KE': 'Kenya', 'KH': 'Cambodia', 'KR': 'South Korea', 'KZ': 'Kazakhstan', 'LB': 'Lebanon',
+    'LK': 'Sri Lanka', 'LT': 'Lithuania', 'LU': 'Luxembourg', 'LV': 'Latvia', 'MA': 'Morocco',
+    'MG': 'Madagascar', 'MM': 'Myanmar', 'MN': 'Mongolia', 'MO': 'Macao', 'MT': 'Malta', 'MU': 'Mauritius',
+    'MV': 'Maldives', 'MX': 'Mexico', 'MY': 'Malaysia', 'NG': 'Nigeria', 'NL': 'Netherlands', 'NO': 'Norway',
+    'NP': 'Nepal', 'NZ': 'New Zealand', 'OM': 'Oman', 'PA': 'Panama', 'PE': 'Peru', 'PH': 'Philippines',
+    'PK': 'Pakistan', 'PL': 'Poland', 'PR': 'Puerto Rico', 'PT': 'Portugal', 'QA': 'Qatar', 'RO': 'Romania',
+    'RS': 'Serbia', 'RU': 'Russia', 'RW': 'Rwanda', 'SA': 'Saudi Arabia', 'SE': 'Sweden', 'SG': 'Singapore',
+    'SI': 'Slovenia', 'SN': 'Senegal', 'TH': 'Thailand', 'TN': 'Tunisia', 'TR': 'Turkey', 'TW': 'Taiwan',
+    'TZ': 'Tanzania', 'UA': 'Ukraine', 'US': 'United States', 'UY': 'Uruguay', 'UZ': 'Uzbekistan',
+    'VA': 'Vatican City', 'VE': 'Venezuela', 'VN': 'Vietnam', 'ZA': 'South Africa', 'ZW': 'Zimbabwe',
+}
+
+# Other names people write for a country
+COUNTRY_ALIASES = {
+    'usa': 'US', 'united states of america': 'US', 'america': 'US', 'uk': 'GB', 'great britain': 'GB',
+    'britain': 'GB', 'england': 'GB', 'scotland': 'GB', 'wales': 'GB', 'northern ireland': 'GB',
+    'uae': 'AE', 'czech republic': 'CZ', 'holland': 'NL', 'the netherlands': 'NL', 'korea': 'KR',
+    'republic of korea': 'KR', 'turkiye': 'TR', 'russian federation': 'RU', 'viet nam': 'VN',
+}
+
+# US state names by GeoNames admin1 code (postal codes for the US)
+US_STATE_NAMES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia', 'FL': 'Florida',
+    'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa',
+    'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi', 'MO': 'Missouri',
+    'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada', 'NH': 'New Hampshire', 'NJ': 'New Jersey',
+    'NM': 'New Mexico', 'NY': 'New York', 'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio',
+    'OK': 'Oklahoma', 'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont',
+    'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+}
+
+def normalize_place_name(text: str) -> str:
+    """Lowercase, accent-free, punctuation-free, single-spaced form of a place name or message"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return " ".join(re.sub(r"[^\w]+", " ", text.replace("'", "")).split())
+
+def matches_qualifier(place: Place, qualifier: str) -> bool:
+    """
+    Whether a qualifier written after a place name ("Paris, France",
+    "Austin, TX") names that place's country or admin1 region, by code or
+    by name. "Paris, Texas" does not qualify the Paris in France.
+    """
+    qualifier = normalize_place_name(qualifier)
+    if not qualifier:
+        return True
+    country, admin1 = place.country.lower(), place.admin1.lower()
+    if qualifier in (country, admin1) or COUNTRY_ALIASES.get(qualifier, "").lower() == country:
+        return True
+    names = {COUNTRY_NAMES.get(place.country, "")}
+    if place.country == "US":
+        names.add(US_STATE_NAMES.get(place.admin1, ""))
+    return qualifier in {normalize_place_name(name) for name in names if name}
+
+def load_places(path: str) -> List[Place]:
+    """
+    Parse a GeoNames `cities*.txt` style file: tab-separated, with name,
+    asciiname, comma-separated alternatenames, latitude, longitude, country
+    code, admin1 code and population in columns 2-6, 9, 11 and 15. Lines
+    starting with '#' are comments.
+    """
+    places = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            columns = line.rstrip("\n").split("\t")
+            try:
+                aliases = {columns[2]} | {alias for alias in columns[3].split(",") if alias}
+                aliases.discard(columns[1])
+                places.append(Place(
+                    id=int(columns[0]),
+                    name=columns[1],
+                    latitude=float(columns[4]),
+                    longitude=float(columns[5]),
+                    country=columns[8],
+                    population=int(columns[14] or 0),
+                    aliases=tuple(sorted(aliases)),
+                    admin1=columns[10],
+                ))
+            except (IndexError, ValueError):
+                logger.debug("Skipping malformed gazetteer line: %s", line[:80])
+    return places
+
+class Gazetteer:
+    """
+    All places of the gazetteer file, most populous first.
+
+    GAZETTEER_PATH points at the file (defaults to the bundled
+    data/gazetteer.tsv, a few hundred popular destinations); a GeoNames
+    cities15000.txt dump can be used as-is. GAZETTEER_MIN_POPULATION drops
+    smaller places when loading a large dump.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH)
+        min_population = int(os.getenv('GAZETTEER_MIN_POPULATION', 0))
+        try:
+            places = load_places(self.path)
+        except OSError as e:
+            logger.error(f"Could not load gazetteer {self.path}: {str(e)}")
+            places = []
+        self.places = sorted(
+            (place for place in places if place.population >= min_population),
+            key=lambda place: place.population, reverse=True
+        )
+        logger.info("Gazetteer loaded %s places from %s", len(self.places), self.path)
+
+    def names(self, place: Place) -> List[str]:
+        """Every normalized name a place is known by"""
+        return sorted({normalize_place_name(name) for name in (place.name, *place.aliases)} - {""})
+
+_gazetteer: Optional[Gazetteer] = None
+
+def get_gazetteer() -> Gazetteer:
+    """Return the process-wide gazetteer, loading it on first use"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,229 @@
+"""
+Log Pipeline - Non-blocking, sampled, structured logging with per-request correlation IDs
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from typing import Dict, Any, Optional
+
+from core.tracing import current_trace_id
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Google API keys travel as `key=` query parameters and end up in requests' error messages
+_SECRET_PATTERN = re.compile(r"((?:key|apikey|api_key)=)[^&\s'\"]+", re.IGNORECASE)
+
+def redact(text: str) -> str:
+    return _SECRET_PATTERN.sub(r"\1REDACTED", text)
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Parse LOG_SAMPLING, e.g. "agents.location_agent=0.1,core.upstream=0.5" """
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+class ContextFilter(logging.Filter):
+    """
+    Runs in the caller before enqueueing: stamps the correlation and trace IDs from the
+    current context, then drops a sampled fraction of INFO/DEBUG records from
+    noisy loggers. Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, sampling: Dict[str, float]):
+        super().__init__()
+        self.sampling = sampling
+        self.dropped: Dict[str, int] = {}
+        self._rates: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._rates.get(name)
+        if rate is None:
+            rate, prefix = 1.0, name
+            while prefix:
+                if prefix in self.sampling:
+                    rate = self.sampling[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._rates[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            rate = self._rate(record.name)
+            if rate < 1.0 and random.random() >= rate:
+                self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+                return False
+        record.request_id = request_id_var.get()
+        record.trace_id = current_trace_id()
+        return True
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the record untouched. The stock QueueHandler renders the message
+    in the caller's thread so the record can be pickled; our queue is
+    in-process, so %-formatting, exception rendering and JSON encoding all
+    happen on the listener thread instead of the event loop.
+
+    The listener thread is per process: it starts with the first record, and
+    a forked child (gunicorn preload imports main in the master) gets a fresh
+    queue and starts its own, since threads do not survive fork. Records that
+    find the queue full are dropped and counted in `dropped`, with a line on
+    stderr at the first drop and every 1000th after it.
+    """
+
+    def __init__(self, queue_size: int, *outputs: logging.Handler):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.queue_size = queue_size
+        self.outputs = outputs
+        self.dropped = 0
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._pid = os.getpid()
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self._listener = None
+        self._pid = os.getpid()
+        self._start_lock = threading.Lock()
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self._listener is None:
+                listener = logging.handlers.QueueListener(self.queue, *self.outputs, respect_handler_level=True)
+                listener.start()
+                self._listener = listener
+
+    def stop(self):
+        """Drain and stop this process's listener"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self._listener is None:
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                sys.stderr.write(f"log queue full: {self.dropped} records dropped so far\n")
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with secrets redacted"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        if record.exc_info:
+            entry["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+class RedactingFormatter(logging.Formatter):
+    """Plain-text format for local development, with secrets redacted"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        return redact(super().format(record))
+
+_handler: Optional[LazyQueueHandler] = None
+_context_filter: Optional[ContextFilter] = None
+
+def configure_logging():
+    """
+    Route all logging through a bounded queue to a listener thread.
+
+    LOG_LEVEL sets the root level, LOG_FORMAT is json (default) or text,
+    LOG_SAMPLING keeps only a fraction of INFO/DEBUG records per logger
+    prefix and LOG_QUEUE_SIZE bounds the queue (records are dropped and
+    counted rather than blocking the event loop when it is full).
+    """
+    global _handler, _context_filter
+    if _handler is not None:
+        return
+
+    if os.getenv('LOG_FORMAT', 'json').lower() == 'text':
+        formatter = RedactingFormatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+    else:
+        formatter = JsonFormatter()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(formatter)
+
+    _handler = LazyQueueHandler(int(os.getenv('LOG_QUEUE_SIZE', 10000)), output)
+    _context_filter = ContextFilter(parse_sampling(os.getenv('LOG_SAMPLING', '')))
+    _handler.addFilter(_context_filter)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    atexit.register(_handler.stop)
+
+def sampling_stats() -> Dict[str, Any]:
+    if _context_filter is None:
+        return {}
+    return {
+        "rates": _context_filter.sampling,
+        "dropped": dict(_context_filter.dropped),
+        "queue_dropped": _handler.dropped,
+    }
+
+class CorrelationIdMiddleware:
+    """Plain ASGI middleware binding X-Request-ID (or a fresh one) to the request's logs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", ()):
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,144 @@
+"""
+Event Loop Monitor - Samples event-loop lag and captures the stack of blocking calls
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Any, Optional
+
+from core.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Upper bounds (seconds) of the lag histogram buckets
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes a sleeping sampler coroutine.
+
+    A watchdog thread notices when the sampler's heartbeat goes stale for more
+    than `threshold` seconds and snapshots the loop thread's stack at that
+    moment, which points straight at the blocking call (for example a sync
+    `requests.get` inside an `async def`). With debug enabled the offending
+    call site and full stack are logged, and asyncio's slow-callback warnings
+    are turned on as well.
+    """
+
+    def __init__(self, interval: float = None, threshold: float = None, debug: bool = None):
+        self.interval = interval or float(os.getenv('LOOP_LAG_INTERVAL_MS', 50)) / 1000
+        self.threshold = threshold or float(os.getenv('LOOP_LAG_THRESHOLD_MS', 100)) / 1000
+        self.debug = debug if debug is not None else os.getenv('LOOP_LAG_DEBUG', 'false').lower() == 'true'
+        registry = get_metrics_registry()
+        self.lag = registry.histogram(
+            "event_loop_lag_seconds", "How late the event loop woke the lag sampler", buckets=LAG_BUCKETS
+        ).labels()
+        self.stall_counter = registry.counter(
+            "event_loop_stalls_total", "Event loop blocks longer than the stall threshold"
+        ).labels()
+        self.lag_max = 0.0
+        self.stalls: deque = deque(maxlen=50)
+        self._heartbeat = time.monotonic()
+        self._captured_heartbeat = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start sampling the running loop; call from inside the loop (e.g. startup)"""
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        if self.debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+        self._task = loop.create_task(self._sample())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+        logger.info(f"Event loop lag monitor started (threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _sample(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._observe(max(0.0, time.monotonic() - expected))
+
+    def _observe(self, lag: float):
+        self.lag.observe(lag)
+        self.lag_max = max(self.lag_max, lag)
+
+    def _watch(self):
+        """Watchdog thread: snapshot the loop thread while it is blocked"""
+        while not self._stop.wait(self.interval / 2):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self.interval
+            if stalled_for < self.threshold or heartbeat == self._captured_heartbeat:
+                continue
+            self._captured_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._record_stall(stalled_for, traceback.extract_stack(frame))
+
+    def _record_stall(self, stalled_for: float, stack: traceback.StackSummary):
+        call_site = self._call_site(stack)
+        self.stall_counter.inc()
+        self.stalls.append({
+            "at": time.time(),
+            "stalled_ms": round(stalled_for * 1000, 1),
+            "call_site": call_site,
+            "stack": [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in stack[-12:]],
+        })
+        if self.debug:
+            logger.warning(
+                f"Event loop blocked for >{stalled_for * 1000:.0f}ms at {call_site}\n"
+                + "".join(stack.format()[-12:])
+            )
+        else:
+            logger.warning(f"Event loop blocked for >{stalled_for * 1000:.0f}ms at {call_site}")
+
+    @staticmethod
+    def _call_site(stack: traceback.StackSummary) -> str:
+        """Innermost frame that belongs to this project rather than a library"""
+        for entry in reversed(stack):
+            if entry.filename.startswith(SERVER_DIR) and not entry.filename.endswith("loop_monitor.py"):
+                return f"{os.path.relpath(entry.filename, SERVER_DIR)}:{entry.lineno} in {entry.name}"
+        entry = stack[-1]
+        return f"{entry.filename}:{entry.lineno} in {entry.name}"
+
+    def metrics(self) -> Dict[str, Any]:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(LAG_BUCKETS + (float("inf"),), self.lag.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else f"{bound * 1000:g}ms"] = cumulative
+        return {
+            "samples": self.lag.count,
+            "avg_lag_ms": round(self.lag.sum / self.lag.count * 1000, 3) if self.lag.count else 0.0,
+            "max_lag_ms": round(self.lag_max * 1000, 3),
+            "histogram": buckets,
+            "stall_count": int(self.stall_counter.value),
+            "threshold_ms": self.threshold * 1000,
+            "recent_stalls": list(self.stalls)[-10:],
+        }
+
+_monitor: Optional[EventLoopLagMonitor] = None
+
+def get_loop_monitor() -> EventLoopLagMonitor:
+    """Return the process-wide event loop lag monitor"""
+    global _monitor
+    if _monitor is None:
+        _monitor = EventLoopLagMonitor()
+    return _monitor
@@ -0,0 +1,230 @@
+"""
+Metrics - Prometheus-style counters and histograms with a text exposition endpoint
+"""
+
+import functools
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) suited to request, agent and upstream latencies
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds (bytes) for response sizes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values) -> Any:
+        """Child series for these label values, created on first use"""
+        child = self.children.get(values)
+        if child is None:
+            child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            lines += self._render_child(_format_labels(self.labelnames, values), values, child)
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, *values, amount: float = 1.0):
+        self.labels(*values).inc(amount)
+
+    def _render_child(self, labels: str, values: Tuple[str, ...], child: _CounterChild) -> List[str]:
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, *values):
+        self.labels(*values).observe(value)
+
+    def _render_child(self, labels: str, values: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            bucket_labels = _format_labels(self.labelnames, values, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+# A collector returns (name, type, help, [(labels dict, value), ...]) for values read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]]]
+
+class MetricsRegistry:
+    """
+    Holds every metric of the process and renders the Prometheus text format.
+
+    Updates are plain attribute and list-slot increments with no locks. Almost
+    all of them happen on the event-loop thread; the rare update from a worker
+    thread can at worst lose one increment, which is an acceptable trade for
+    keeping instrumentation off the hot path's critical section.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Collector] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self.metrics.values()):
+            lines += metric.render()
+        for collector in self.collectors:
+            try:
+                for name, kind, documentation, samples in collector():
+                    lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+                    for labels, value in samples:
+                        names = tuple(labels)
+                        rendered = _format_labels(names, tuple(labels[key] for key in names))
+                        lines.append(f"{name}{rendered} {_format_value(value)}")
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+_registry: Optional[MetricsRegistry] = None
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
+
+def agent_method_histogram() -> Histogram:
+    return get_metrics_registry().histogram(
+        "agent_method_duration_seconds", "Latency of agent entry points", ("agent", "method", "outcome")
+    )
+
+def timed_agent_method(agent: str):
+    """Decorator recording an async agent method's latency under agent_method_duration_seconds"""
+    def decorator(func):
+        histogram = agent_method_histogram()
+        ok, error = histogram.labels(agent, func.__name__, "ok"), histogram.labels(agent, func.__name__, "error")
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                error.observe(time.perf_counter() - started)
+                raise
+            ok.observe(time.perf_counter() - started)
+            return result
+        return wrapper
+    return decorator
+
+class HTTPMetricsMiddleware:
+    """
+    Plain ASGI middleware recording latency, status and response bytes per
+    route template (not raw path, so path parameters do not explode series).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        registry = get_metrics_registry()
+        self.duration = registry.histogram(
+            "http_request_duration_seconds", "Latency of HTTP requests", ("method", "route", "status")
+        )
+        self.response_bytes = registry.histogram(
+            "http_response_size_bytes", "Size of HTTP response bodies", ("method", "route"), SIZE_BUCKETS
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status, size = 500, 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            self.duration.observe(time.perf_counter() - started, scope["method"], template, str(status))
+            self.response_bytes.observe(size, scope["method"], template)
@@ -0,0 +1,226 @@
+"""
+Place Index - Memory-mapped, sorted index of gazetteer names for offline geocoding and prefix autocomplete
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from core.gazetteer import DEFAULT_GAZETTEER_PATH, Gazetteer, Place, get_gazetteer, normalize_place_name
+from core.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TAPI"
+VERSION = 2
+HEADER = struct.Struct("<4sII")
+
+def default_index_path(gazetteer_path: str) -> str:
+    """Index file in the temp directory, named after the gazetteer file's path, size and mtime"""
+    try:
+        stat = os.stat(gazetteer_path)
+        source = f"{os.path.abspath(gazetteer_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        source = gazetteer_path
+    source += f":{os.getenv('GAZETTEER_MIN_POPULATION', 0)}:{VERSION}"
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"travelagent_places_{digest}.idx")
+
+def build_index(gazetteer: Gazetteer, path: str) -> int:
+    """
+    Write every (normalized name, place) pair of the gazetteer to `path`,
+    sorted by name bytes and then most populous first. Layout: a header
+    (magic, version, row count), count + 1 native uint32 row offsets, then
+    one "key\\tname\\tcountry\\tlat\\tlng\\tpopulation\\tid\\tadmin1" line per row.
+    The file is written aside and renamed so concurrent workers never map a
+    half-written index.
+    """
+    rows = sorted(
+        ((name.encode("utf-8"), place) for place in gazetteer.places for name in gazetteer.names(place)),
+        key=lambda row: (row[0], -row[1].population)
+    )
+    offsets = array("I", [0])
+    lines = []
+    for key, place in rows:
+        line = b"\t".join((
+            key, place.name.encode("utf-8"), place.country.encode("utf-8"),
+            repr(place.latitude).encode(), repr(place.longitude).encode(),
+            str(place.population).encode(), str(place.id).encode(), place.admin1.encode("utf-8")
+        )) + b"\n"
+        lines.append(line)
+        offsets.append(offsets[-1] + len(line))
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(rows)))
+        f.write(offsets.tobytes())
+        f.write(b"".join(lines))
+    os.replace(temp_path, path)
+    return len(rows)
+
+class PlaceIndex:
+    """
+    Gazetteer names in one sorted, memory-mapped file.
+
+    The file is built once per gazetteer version (PLACE_INDEX_PATH, or a
+    file in the temp directory named after the gazetteer) and every worker
+    maps the same pages, so a large GeoNames dump costs the page cache once
+    rather than a dict per process. Rows are found by binary search over
+    the offset table:
+
+    - `lookup` resolves an exact name or alias to its most populous place,
+      the offline geocoder used before any network call;
+    - `complete` returns the places whose names start with a prefix, ranked
+      exact match first and then by population. Results for the most
+      recently and frequently typed prefixes are kept in an LRU of
+      AUTOCOMPLETE_CACHE_SIZE entries; a prefix scans at most
+      PLACE_INDEX_MAX_SCAN rows.
+    """
+
+    def __init__(self, path: str = None, gazetteer: Gazetteer = None):
+        gazetteer_path = gazetteer.path if gazetteer else os.getenv('GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH)
+        self.path = path or os.getenv('PLACE_INDEX_PATH') or default_index_path(gazetteer_path)
+        self.max_results = int(os.getenv('AUTOCOMPLETE_MAX_RESULTS', 20))
+        self.max_scan = int(os.getenv('PLACE_INDEX_MAX_SCAN', 20000))
+        self.cache_size = int(os.getenv('AUTOCOMPLETE_CACHE_SIZE', 512))
+        self.prefix_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"lookups": 0, "lookup_hits": 0, "completions": 0, "cache_hits": 0}
+
+        if not self._valid(self.path):
+            started = time.perf_counter()
+            count = build_index(gazetteer or get_gazetteer(), self.path)
+            logger.info("Built place index %s with %s names in %.1fms",
+                        self.path, count, (time.perf_counter() - started) * 1000)
+
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, self.count = HEADER.unpack_from(self._map)
+        offsets_end = HEADER.size + 4 * (self.count + 1)
+        self.offsets = memoryview(self._map)[HEADER.size:offsets_end].cast("I")
+        self.data_start = offsets_end
+
+        registry = get_metrics_registry()
+        self.requests = registry.counter(
+            "place_autocomplete_requests_total", "Autocomplete requests, by whether the prefix cache answered",
+            ("cache",)
+        )
+
+    @staticmethod
+    def _valid(path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+            return magic == MAGIC and version == VERSION
+        except (OSError, struct.error):
+            return False
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _row(self, index: int) -> bytes:
+        return self._map[self.data_start + self.offsets[index]:self.data_start + self.offsets[index + 1] - 1]
+
+    def _key(self, index: int) -> bytes:
+        start = self.data_start + self.offsets[index]
+        return self._map[start:self._map.find(b"\t", start)]
+
+    def _lower_bound(self, key: bytes) -> int:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _place(self, index: int) -> Place:
+        row = self._row(index).decode("utf-8")
+        _, name, country, latitude, longitude, population, place_id, admin1 = row.split("\t")
+        return Place(int(place_id), name, float(latitude), float(longitude), country, int(population), admin1=admin1)
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """The most populous place known by this exact name or alias"""
+        key = normalize_place_name(name).encode("utf-8")
+        self.stats["lookups"] += 1
+        if not key:
+            return None
+        index = self._lower_bound(key)
+        if index < self.count and self._key(index) == key:
+            self.stats["lookup_hits"] += 1
+            return self._place(index)
+        return None
+
+    def complete(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Up to `limit` places with a name starting with `prefix`, exact match first, then most populous"""
+        key = normalize_place_name(prefix)
+        limit = max(1, min(limit, self.max_results))
+        self.stats["completions"] += 1
+        if not key:
+            return []
+
+        suggestions = self.prefix_cache.get(key)
+        if suggestions is not None:
+            self.prefix_cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            self.requests.inc("hit")
+            return suggestions[:limit]
+        self.requests.inc("miss")
+
+        suggestions = self._rank(key.encode("utf-8"))
+        self.prefix_cache[key] = suggestions
+        if len(self.prefix_cache) > self.cache_size:
+            self.prefix_cache.popitem(last=False)
+        return suggestions[:limit]
+
+    def _rank(self, prefix: bytes) -> List[Dict[str, Any]]:
+        start = self._lower_bound(prefix)
+        # UTF-8 never contains 0xff, so this bounds every key starting with the prefix
+        end = min(self._lower_bound(prefix + b"\xff"), start + self.max_scan)
+        best: Dict[bytes, tuple] = {}
+        for index in range(start, end):
+            key, _, _, _, _, population, place_id, _ = self._row(index).split(b"\t")
+            score = (key == prefix, int(population), -len(key))
+            if place_id not in best or score > best[place_id][0]:
+                best[place_id] = (score, index)
+
+        ranked = sorted(best.values(), reverse=True)[:self.max_results]
+        suggestions = []
+        for _, index in ranked:
+            place = self._place(index)
+            suggestions.append({
+                "id": f"gn:{place.id}",
+                "name": place.name,
+                "display_name": place.display_name,
+                "country": place.country,
+                "latitude": place.latitude,
+                "longitude": place.longitude,
+                "population": place.population,
+                "matched": self._key(index).decode("utf-8"),
+            })
+        return suggestions
+
+    def metrics(self) -> Dict[str, Any]:
+        completions = self.stats["completions"]
+        return dict(
+            self.stats,
+            names=self.count,
+            cached_prefixes=len(self.prefix_cache),
+            cache_hit_rate=round(self.stats["cache_hits"] / completions, 4) if completions else 0.0,
+        )
+
+_place_index: Optional[PlaceIndex] = None
+
+def get_place_index() -> PlaceIndex:
+    """Return the process-wide place index, building its file on first use if needed"""
+    global _place_index
+    if _place_index is None:
+        _place_index = PlaceIndex()
+    return _place_index
@@ -0,0 +1,243 @@
+"""
+Request Profiler - On-demand sampling profiler scoped to individual async requests
+"""
+
+import asyncio
+import contextvars
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_active_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(SERVER_DIR):
+        filename = os.path.relpath(filename, SERVER_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}"
+
+class ProfileSession:
+    """Samples collected for one request and every task it spawned"""
+
+    def __init__(self, method: str, path: str, root: asyncio.Task):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self._started = time.perf_counter()
+        self.tasks: Set[asyncio.Task] = {root}
+        self.stacks: Counter = Counter()
+        self.running_samples = 0
+        self.waiting_samples = 0
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+
+    def report(self, interval: float, top: int = 25) -> Dict[str, Any]:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started": self.started,
+            "duration_ms": self.duration_ms,
+            "interval_ms": interval * 1000,
+            "samples": self.running_samples + self.waiting_samples,
+            "running_samples": self.running_samples,
+            "waiting_samples": self.waiting_samples,
+            "top_self": [{"frame": frame, "samples": count} for frame, count in self_counts.most_common(top)],
+            "top_total": [{"frame": frame, "samples": count} for frame, count in total_counts.most_common(top)],
+            "folded": [f"{stack} {count}" for stack, count in self.stacks.most_common()],
+        }
+
+class RequestProfiler:
+    """
+    Wall-clock sampling profiler that attributes samples to requests, not threads.
+
+    cProfile cannot be switched on for one request because every request
+    shares the event-loop thread. Instead a sampler thread wakes every
+    PROFILE_INTERVAL_MS while at least one profiled request is in flight. If
+    the loop is currently running one of the request's tasks, the loop
+    thread's stack is recorded ("running"); for each of the request's
+    suspended tasks the coroutine await chain is recorded ("waiting", e.g. in
+    an upstream call). Tasks the request spawns are picked up by a task
+    factory installed only while a profile is active, so unprofiled requests
+    pay nothing.
+
+    Profiling is triggered by the PROFILE_HEADER request header, whose value
+    must equal PROFILE_TOKEN (the header is ignored while no token is
+    configured), or by PROFILE_SAMPLE_RATE. The same token guards the admin
+    endpoints: stored profiles, traces and upstream usage.
+    """
+
+    def __init__(self):
+        self.header = os.getenv('PROFILE_HEADER', 'x-profile').lower().encode("latin-1")
+        self.token = os.getenv('PROFILE_TOKEN', '')
+        self.sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))
+        self.interval = float(os.getenv('PROFILE_INTERVAL_MS', 5)) / 1000
+        self.max_profiles = int(os.getenv('PROFILE_STORE_MAX', 20))
+        self.profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.active: Dict[str, ProfileSession] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._previous_factory = None
+        self._sampler: Optional[threading.Thread] = None
+
+    def authorized(self, value: Optional[str]) -> bool:
+        """Whether a presented token matches PROFILE_TOKEN; always False while none is configured"""
+        return bool(self.token) and value is not None and hmac.compare_digest(value.encode(), self.token.encode())
+
+    def should_profile(self, headers) -> bool:
+        for key, value in headers:
+            if key == self.header:
+                return self.authorized(value.decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def begin(self, method: str, path: str) -> ProfileSession:
+        loop = asyncio.get_running_loop()
+        session = ProfileSession(method, path, asyncio.current_task())
+        if not self.active:
+            self._loop, self._loop_thread_id = loop, threading.get_ident()
+            self._previous_factory = loop.get_task_factory()
+            loop.set_task_factory(self._task_factory)
+        self.active[session.id] = session
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+            self._sampler.start()
+        return session
+
+    def end(self, session: ProfileSession):
+        session.duration_ms = round((time.perf_counter() - session._started) * 1000, 3)
+        self.active.pop(session.id, None)
+        if not self.active and self._loop is not None:
+            self._loop.set_task_factory(self._previous_factory)
+        self.profiles[session.id] = session.report(self.interval)
+        while len(self.profiles) > self.max_profiles:
+            self.profiles.popitem(last=False)
+        logger.info(f"Profiled {session.method} {session.path} in {session.duration_ms}ms as {session.id}")
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        session = _active_session.get()
+        if session is not None:
+            session.tasks.add(task)
+        return task
+
+    def _sample_loop(self):
+        while self.active:
+            time.sleep(self.interval)
+            try:
+                self._sample()
+            except Exception as e:
+                logger.debug(f"Profiler sample failed: {str(e)}")
+
+    def _sample(self):
+        current = asyncio.current_task(self._loop)
+        loop_frame = sys._current_frames().get(self._loop_thread_id)
+        for session in list(self.active.values()):
+            for task in list(session.tasks):
+                if task.done():
+                    continue
+                if task is current and loop_frame is not None:
+                    stack = self._running_stack(loop_frame, task)
+                    session.running_samples += 1
+                else:
+                    stack = self._awaiting_stack(task)
+                    session.waiting_samples += 1
+                if stack:
+                    session.stacks[";".join(stack)] += 1
+
+    @staticmethod
+    def _running_stack(frame, task: asyncio.Task) -> List[str]:
+        """Loop-thread stack trimmed to start at the task's own coroutine"""
+        root_code = getattr(task.get_coro(), "cr_code", None)
+        frames = []
+        while frame is not None:
+            frames.append(frame.f_code)
+            if frame.f_code is root_code:
+                break
+            frame = frame.f_back
+        return [_frame_label(code) for code in reversed(frames)]
+
+    @staticmethod
+    def _awaiting_stack(task: asyncio.Task) -> List[str]:
+        """Where a suspended task is parked, following the coroutine await chain"""
+        stack, awaitable = [], task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                stack.append("<awaiting future>" if "Future" in type(awaitable).__name__ else f"<awaiting {type(awaitable).__name__}>")
+                break
+            stack.append(_frame_label(frame.f_code))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return stack
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        return [
+            {key: profile[key] for key in ("id", "method", "path", "status_code", "started", "duration_ms", "samples")}
+            for profile in reversed(self.profiles.values())
+        ]
+
+_profiler: Optional[RequestProfiler] = None
+
+def get_profiler() -> RequestProfiler:
+    """Return the process-wide request profiler"""
+    global _profiler
+    if _profiler is None:
+        _profiler = RequestProfiler()
+    return _profiler
+
+class ProfilingMiddleware:
+    """Plain ASGI middleware profiling requests that carry the trigger header or are sampled"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        profiler = get_profiler()
+        # Reading stored profiles sends the token too, but is never worth a profile itself
+        if (scope["type"] != "http" or scope["path"].startswith("/api/admin/profiles")
+                or not profiler.should_profile(scope.get("headers", ()))):
+            await self.app(scope, receive, send)
+            return
+
+        session = profiler.begin(scope["method"], scope["path"])
+        token = _active_session.set(session)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                session.status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", session.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active_session.reset(token)
+            profiler.end(session)
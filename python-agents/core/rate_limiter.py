@@ -0,0 +1,221 @@
+"""
+Rate Limiter - Per-API token buckets with priority queues and daily quota accounting
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """Lower values are served first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    PREFETCH = 2
+
+# Published Google limits (requests per second, burst, requests per day)
+DEFAULT_LIMITS = {
+    "places": {"requests_per_second": 10, "burst": 10, "requests_per_day": 100000},
+    "geocoding": {"requests_per_second": 50, "burst": 50, "requests_per_day": 100000},
+    "weather": {"requests_per_second": 10, "burst": 10, "requests_per_day": 100000},
+}
+
+# Longest time (seconds) a caller waits in the queue before falling back
+DEFAULT_MAX_WAIT = {
+    Priority.INTERACTIVE: 2.0,
+    Priority.BACKGROUND: 5.0,
+    Priority.PREFETCH: 5.0,
+}
+
+# Priority of the upstream calls made by the current task; prefetchers override it
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+@contextmanager
+def use_priority(priority: Priority):
+    """Run the enclosed upstream calls at the given priority"""
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_token(self) -> float:
+        self.refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+class ApiLimiter:
+    """Token bucket, priority wait queue and daily quota for one upstream API"""
+
+    def __init__(self, name: str, requests_per_second: float, burst: float, requests_per_day: int):
+        self.name = name
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.daily_quota = requests_per_day
+        self.day = self._today()
+        self.used_today = 0
+        self.granted = 0
+        self.rejected = {"queue_timeout": 0, "quota_exhausted": 0}
+        self.wait_seconds_total = 0.0
+        self._waiters: List = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    def _quota_available(self) -> bool:
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+        return self.used_today < self.daily_quota
+
+    def _grant(self, waited: float):
+        self.used_today += 1
+        self.granted += 1
+        self.wait_seconds_total += waited
+
+    async def acquire(self, priority: Priority, max_wait: float) -> bool:
+        """Wait for a token in priority order; False means the caller should fall back"""
+        if not self._quota_available():
+            self.rejected["quota_exhausted"] += 1
+            return False
+
+        # Fast path: nobody is queued ahead of us and a token is available
+        if not self._waiters and self.bucket.try_take():
+            self._grant(0.0)
+            return True
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        try:
+            await asyncio.wait_for(future, timeout=max_wait)
+            self._grant(time.monotonic() - started)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected["queue_timeout"] += 1
+            logger.warning(f"Rate limit wait exceeded {max_wait}s for {self.name} ({priority.name})")
+            return False
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is free right now, without queueing"""
+        if self._waiters or not self._quota_available() or not self.bucket.try_take():
+            return False
+        self._grant(0.0)
+        return True
+
+    async def _dispatch(self):
+        """Hand out tokens to queued callers, highest priority first"""
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.bucket.try_take():
+                heapq.heappop(self._waiters)
+                future.set_result(True)
+            else:
+                await asyncio.sleep(self.bucket.seconds_until_token())
+
+    def metrics(self) -> Dict[str, Any]:
+        self._quota_available()
+        queued = {p.name.lower(): 0 for p in Priority}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                queued[Priority(priority).name.lower()] += 1
+        self.bucket.refill()
+        return {
+            "requests_per_second": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "tokens_available": round(self.bucket.tokens, 2),
+            "queued": queued,
+            "granted": self.granted,
+            "rejected": dict(self.rejected),
+            "avg_wait_ms": round(self.wait_seconds_total / self.granted * 1000, 2) if self.granted else 0.0,
+            "daily_quota": self.daily_quota,
+            "used_today": self.used_today,
+            "quota_remaining": max(0, self.daily_quota - self.used_today),
+            "day": self.day,
+        }
+
+class RateLimiter:
+    """
+    Registry of per-API limiters shared by every agent in the process.
+
+    Limits are the published per-project values split evenly across worker
+    processes (PYTHON_SERVER_WORKERS), so N workers together stay within them.
+    Override per API with RATE_LIMIT_<API>_RPS / _BURST / _DAILY.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, float]] = None):
+        workers = max(1, int(os.getenv("PYTHON_SERVER_WORKERS", "1")))
+        self.max_wait = {
+            priority: float(os.getenv(f"RATE_LIMIT_MAX_WAIT_{priority.name}", default))
+            for priority, default in DEFAULT_MAX_WAIT.items()
+        }
+        self.limiters: Dict[str, ApiLimiter] = {}
+        for api, config in (limits or DEFAULT_LIMITS).items():
+            prefix = f"RATE_LIMIT_{api.upper()}"
+            rps = float(os.getenv(f"{prefix}_RPS", config["requests_per_second"])) / workers
+            burst = float(os.getenv(f"{prefix}_BURST", config["burst"])) / workers
+            daily = int(os.getenv(f"{prefix}_DAILY", config["requests_per_day"])) // workers
+            self.limiters[api] = ApiLimiter(api, rps, max(1.0, burst), daily)
+
+    async def acquire(self, api: str, priority: Priority = None) -> bool:
+        """Take a token for `api`, waiting at most the bounded time for the priority"""
+        limiter = self.limiters.get(api)
+        if limiter is None:
+            return True
+        priority = priority if priority is not None else request_priority.get()
+        return await limiter.acquire(priority, self.max_wait[priority])
+
+    def try_acquire(self, api: str) -> bool:
+        """Non-blocking acquire, used for optional extra calls such as hedges"""
+        limiter = self.limiters.get(api)
+        return limiter.try_acquire() if limiter else True
+
+    def metrics(self) -> Dict[str, Any]:
+        return {api: limiter.metrics() for api, limiter in self.limiters.items()}
+
+_rate_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -0,0 +1,124 @@
+"""
+Traffic Recorder - Record/replay of upstream API traffic to an on-disk fixture store
+
+Modes (UPSTREAM_MODE):
+    live    - talk to the real upstream (default)
+    record  - talk to the upstream and append every request/response pair to the store
+    replay  - never touch the network; answer from the store
+
+The store (UPSTREAM_FIXTURES, a directory) holds gzip-compressed JSON-lines
+files, one per recording process. API keys are stripped from every recorded
+request. Replay either reproduces the original latency of each response
+(UPSTREAM_REPLAY_TIMING=original) or answers at full speed (fast).
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+REDACTED_PARAMS = ("key", "api_key", "apikey", "access_token")
+
+class FixtureMissing(Exception):
+    """Raised in replay mode when no recording matches a request"""
+
+def _redact(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: ("REDACTED" if name.lower() in REDACTED_PARAMS else value) for name, value in params.items()}
+
+def fixture_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """Stable lookup key for a request; credentials never take part in it"""
+    material = {name: str(value) for name, value in params.items() if name.lower() not in REDACTED_PARAMS}
+    return hashlib.sha1(f"{endpoint}|{json.dumps(material, sort_keys=True)}".encode()).hexdigest()[:20]
+
+class TrafficRecorder:
+    """Records upstream responses or serves them back, depending on the mode"""
+
+    def __init__(self, mode: str = None, path: str = None, timing: str = None):
+        self.mode = (mode or os.getenv('UPSTREAM_MODE', 'live')).lower()
+        self.path = path or os.getenv('UPSTREAM_FIXTURES', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'upstream'))
+        self.original_timing = (timing or os.getenv('UPSTREAM_REPLAY_TIMING', 'fast')).lower() == 'original'
+        self._lock = threading.Lock()
+        self._fixtures: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+
+    def record(self, endpoint: str, url: str, params: Dict[str, Any], response: requests.Response, elapsed: float):
+        """Append one request/response pair to this process's fixture file"""
+        entry = {
+            "key": fixture_key(endpoint, params),
+            "endpoint": endpoint,
+            "url": url.split("?", 1)[0],
+            "params": _redact(params),
+            "status": response.status_code,
+            "elapsed": round(elapsed, 4),
+            "content_type": response.headers.get("Content-Type", "application/json"),
+            "body": response.text,
+        }
+        line = (json.dumps(entry, separators=(',', ':')) + "\n").encode()
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with gzip.open(os.path.join(self.path, f"recording-{os.getpid()}.jsonl.gz"), "ab") as f:
+                f.write(line)
+            self.recorded += 1
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._fixtures is None:
+            fixtures = defaultdict(list)
+            for file_path in sorted(glob.glob(os.path.join(self.path, "*.jsonl.gz"))):
+                with gzip.open(file_path, "rt") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            fixtures[entry["key"]].append(entry)
+            self._fixtures = fixtures
+            logger.info(f"Loaded {sum(len(v) for v in fixtures.values())} upstream fixtures from {self.path}")
+        return self._fixtures
+
+    def replay(self, endpoint: str, url: str, params: Dict[str, Any]) -> Tuple[requests.Response, float]:
+        """Return the recorded response for a request, cycling through repeats in order"""
+        key = fixture_key(endpoint, params)
+        with self._lock:
+            entries = self._load().get(key)
+            if not entries:
+                self.missing += 1
+                raise FixtureMissing(f"No recorded {endpoint} response for {_redact(params)}")
+            entry = entries[self._cursor[key] % len(entries)]
+            self._cursor[key] += 1
+            self.replayed += 1
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = entry["body"].encode()
+        response.headers["Content-Type"] = entry["content_type"]
+        response.url = entry["url"]
+        response.encoding = "utf-8"
+        return response, entry["elapsed"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "missing": self.missing,
+        }
+
+_recorder: Optional[TrafficRecorder] = None
+
+def get_recorder() -> TrafficRecorder:
+    """Return the process-wide traffic recorder"""
+    global _recorder
+    if _recorder is None:
+        _recorder = TrafficRecorder()
+    return _recorder
@@ -0,0 +1,112 @@
+"""
+Reverse Geocoder - Nearest gazetteer place to a coordinate, from a k-d tree over the unit sphere
+"""
+
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from core.gazetteer import Gazetteer, Place, get_gazetteer
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# What map clients send as the location of a dropped pin or GPS fix
+PLACEHOLDER_LOCATIONS = {
+    'current location', 'my location', 'dropped pin', 'selected location', 'map location',
+    'pin', 'unknown', 'here'
+}
+
+COORDINATE_PATTERN = re.compile(r"^\s*\(?\s*-?\d+(\.\d+)?\s*,\s*-?\d+(\.\d+)?\s*\)?\s*$")
+
+def is_placeholder_location(location: Optional[str]) -> bool:
+    """True when a location string names no place: empty, a placeholder, or "lat,lng" text"""
+    if not location or not location.strip():
+        return True
+    return location.strip().lower() in PLACEHOLDER_LOCATIONS or bool(COORDINATE_PATTERN.match(location))
+
+def _unit_vector(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(latitude), math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+@dataclass(frozen=True)
+class NearestPlace:
+    place: Place
+    distance_km: float
+
+class ReverseGeocoder:
+    """
+    Maps a coordinate to the closest gazetteer place without network.
+
+    Places are points on the unit sphere, where straight-line (chord)
+    distance orders places exactly as great-circle distance does, so a
+    plain 3-d k-d tree answers nearest-neighbour queries with no special
+    cases at the antimeridian or the poles. A query visits O(log n) nodes:
+    microseconds for the bundled gazetteer, tens of microseconds for a full
+    GeoNames cities or POI dump loaded through GAZETTEER_PATH.
+
+    Nothing is returned beyond REVERSE_GEOCODE_MAX_KM (default 50 km), so
+    a pin in the ocean is not labelled with the nearest coastal city.
+    """
+
+    def __init__(self, gazetteer: Gazetteer = None):
+        gazetteer = gazetteer or get_gazetteer()
+        self.max_km = float(os.getenv('REVERSE_GEOCODE_MAX_KM', 50))
+        points = [(_unit_vector(place.latitude, place.longitude), place) for place in gazetteer.places]
+        self.size = len(points)
+        self.root = self._build(points, 0)
+        logger.info("Reverse geocoder indexed %s places", self.size)
+
+    def _build(self, points: List[tuple], axis: int) -> Optional[tuple]:
+        """Node tuples of (point, place, axis, left, right), split at the median of each axis in turn"""
+        if not points:
+            return None
+        points.sort(key=lambda item: item[0][axis])
+        middle = len(points) // 2
+        point, place = points[middle]
+        next_axis = (axis + 1) % 3
+        return (point, place, axis,
+                self._build(points[:middle], next_axis), self._build(points[middle + 1:], next_axis))
+
+    def nearest(self, latitude: float, longitude: float, max_km: float = None) -> Optional[NearestPlace]:
+        """The closest place within `max_km` (REVERSE_GEOCODE_MAX_KM by default), or None"""
+        if self.root is None or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None
+        target = _unit_vector(latitude, longitude)
+        best_place, best_distance = None, math.inf
+        # (node, lower bound on the squared distance from the target to any place under it)
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound >= best_distance:
+                continue
+            point, place, axis, left, right = node
+            distance = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if distance < best_distance:
+                best_place, best_distance = place, distance
+            offset = target[axis] - point[axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            # Searched after the near side, once the best distance is tight enough to rule it out
+            if far is not None:
+                stack.append((far, offset * offset))
+            if near is not None:
+                stack.append((near, bound))
+
+        chord = math.sqrt(best_distance)
+        distance_km = 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_KM
+        if distance_km > (self.max_km if max_km is None else max_km):
+            return None
+        return NearestPlace(best_place, round(distance_km, 3))
+
+_reverse_geocoder: Optional[ReverseGeocoder] = None
+
+def get_reverse_geocoder() -> ReverseGeocoder:
+    """Return the process-wide reverse geocoder, building its tree on first use"""
+    global _reverse_geocoder
+    if _reverse_geocoder is None:
+        _reverse_geocoder = ReverseGeocoder()
+    return _reverse_geocoder
@@ -0,0 +1,225 @@
+"""
+Shared Cache - Cross-worker cache tier backed by a local SQLite database in WAL mode
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from core.gazetteer import normalize_place_name
+
+logger = logging.getLogger(__name__)
+
+# Default time-to-live (seconds) per cache namespace
+DEFAULT_TTLS = {
+    "geocode": 30 * 24 * 3600,   # place coordinates practically never change
+    "alias": 30 * 24 * 3600,     # location spelling -> canonical place
+    "places": 24 * 3600,         # nearby attractions
+    "weather": 10 * 60,          # matches the upstream update frequency
+}
+
+def normalize_key(location: str) -> str:
+    """Case-, accent-, punctuation- and whitespace-insensitive cache key for a location name"""
+    return normalize_place_name(location)
+
+class SharedCache:
+    """
+    Key/value cache shared by every worker process on the host.
+
+    Entries live in a single SQLite file opened in WAL mode so that readers in
+    one worker never block writers in another. Each process lazily opens its
+    own connections, which keeps the cache safe to use after a pre-fork.
+
+    Callers run on the event loop, so nothing here waits on SQLite's write
+    lock there: a bounded in-process L1 (SHARED_CACHE_L1_SIZE entries, each
+    kept at most SHARED_CACHE_L1_TTL seconds so other workers' writes show
+    through) answers repeated reads, and writes land in the L1 at once and
+    reach SQLite through a background writer thread with its own connection.
+    L1 misses read SQLite on a separate connection with a short busy timeout;
+    in WAL mode reads do not wait for writers, and a busy read is a miss.
+    """
+
+    def __init__(self, path: str = None, ttls: Dict[str, int] = None):
+        self.path = path or os.getenv(
+            'SHARED_CACHE_PATH',
+            os.path.join(tempfile.gettempdir(), 'travelagent_cache.sqlite3')
+        )
+        self.enabled = os.getenv('SHARED_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttls = dict(DEFAULT_TTLS)
+        for namespace in self.ttls:
+            env_ttl = os.getenv(f"CACHE_TTL_{namespace.upper()}")
+            if env_ttl:
+                self.ttls[namespace] = int(env_ttl)
+        self.ttls.update(ttls or {})
+        self.l1_size = int(os.getenv('SHARED_CACHE_L1_SIZE', 2048))
+        self.l1_ttl = float(os.getenv('SHARED_CACHE_L1_TTL', 60))
+        self.read_timeout = float(os.getenv('SHARED_CACHE_READ_TIMEOUT', 0.05))
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._l1: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._writes_queue: Optional[queue.SimpleQueue] = None
+        self._writer_pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _open(self, timeout: float) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this process's read connection, opening it on first use"""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = self._open(self.read_timeout)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _writer(self) -> queue.SimpleQueue:
+        """Return this process's write queue, starting its writer thread on first use"""
+        if self._writes_queue is None or self._writer_pid != os.getpid():
+            self._writes_queue = queue.SimpleQueue()
+            self._writer_pid = os.getpid()
+            threading.Thread(
+                target=self._write_loop, args=(self._writes_queue,), name="shared-cache-writer", daemon=True
+            ).start()
+        return self._writes_queue
+
+    def _write_loop(self, writes: queue.SimpleQueue):
+        conn = None
+        while True:
+            statement, params, done = writes.get()
+            try:
+                conn = conn or self._open(5)
+                if statement:
+                    conn.execute(statement, params)
+                    self._writes += 1
+                    if self._writes % 500 == 0:
+                        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            except Exception as e:
+                logger.error(f"Error writing shared cache: {str(e)}")
+            finally:
+                if done:
+                    done.set()
+
+    def initialize(self):
+        """Create the database file and schema ahead of forking workers"""
+        if not self.enabled:
+            return
+        self._open(5).close()
+        logger.info(f"Shared cache ready at {self.path}")
+
+    def _record(self, namespace: str, outcome: str):
+        counters = self.stats.setdefault(namespace, {"hits": 0, "misses": 0, "writes": 0})
+        counters[outcome] += 1
+
+    def _remember(self, entry_key: Tuple[str, str], expires_at: float, payload: str):
+        with self._lock:
+            self._l1[entry_key] = (min(expires_at, time.time() + self.l1_ttl), payload)
+            self._l1.move_to_end(entry_key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired"""
+        if not self.enabled:
+            return None
+        try:
+            entry_key = (namespace, key)
+            with self._lock:
+                entry = self._l1.get(entry_key)
+                if entry and entry[0] <= time.time():
+                    del self._l1[entry_key]
+                    entry = None
+            if entry:
+                self._record(namespace, "hits")
+                return json.loads(entry[1])
+
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row and row[1] > time.time():
+                self._remember(entry_key, row[1], row[0])
+                self._record(namespace, "hits")
+                return json.loads(row[0])
+            self._record(namespace, "misses")
+            return None
+
+        except Exception as e:
+            logger.error(f"Error reading shared cache: {str(e)}")
+            self._record(namespace, "misses")
+            return None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: int = None):
+        """Store a JSON-serializable value for every worker to read"""
+        if not self.enabled:
+            return
+        try:
+            ttl = ttl if ttl is not None else self.ttls.get(namespace, 300)
+            payload = json.dumps(value, separators=(',', ':'))
+            expires_at = time.time() + ttl
+            self._remember((namespace, key), expires_at, payload)
+            self._writer().put((
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, payload, expires_at), None
+            ))
+            self._record(namespace, "writes")
+
+        except Exception as e:
+            logger.error(f"Error writing shared cache: {str(e)}")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every write queued so far has reached SQLite"""
+        if not self.enabled or self._writes_queue is None or self._writer_pid != os.getpid():
+            return True
+        done = threading.Event()
+        self._writes_queue.put((None, (), done))
+        return done.wait(timeout)
+
+    def clear(self, namespace: str = None):
+        """Drop every entry, or only the entries of one namespace"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if namespace:
+                for entry_key in [entry_key for entry_key in self._l1 if entry_key[0] == namespace]:
+                    del self._l1[entry_key]
+            else:
+                self._l1.clear()
+        done = threading.Event()
+        if namespace:
+            self._writer().put(("DELETE FROM cache WHERE namespace = ?", (namespace,), done))
+        else:
+            self._writer().put(("DELETE FROM cache", (), done))
+        done.wait(5)
+
+    def hit_rates(self) -> Dict[str, float]:
+        """Hit rate per namespace as seen by this process"""
+        rates = {}
+        for namespace, counters in self.stats.items():
+            lookups = counters["hits"] + counters["misses"]
+            rates[namespace] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        return rates
+
+_shared_cache: Optional[SharedCache] = None
+
+def get_shared_cache() -> SharedCache:
+    """Return the process-wide shared cache instance"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SharedCache()
+    return _shared_cache
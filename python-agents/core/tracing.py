@@ -0,0 +1,234 @@
+"""
+Tracing - Request-scoped spans with W3C traceparent propagation and local export
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "traceparent"
+
+class Span:
+    """One timed operation; spans of a request share a trace_id"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "_started", "duration_ms",
+                 "attributes", "status")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class _NoopSpan:
+    """Stands in for a span when the request is not sampled"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return (trace_id, parent span_id, sampled) from a W3C traceparent header"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[1] == "0" * 32:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 0x01)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+def format_traceparent(span: Span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to the configured exporter.
+
+    A request is traced when the caller's traceparent has the sampled flag
+    set, or else with probability TRACE_SAMPLE_RATE. Unsampled requests only
+    pay for one ContextVar lookup per instrumented call. Finished spans go to
+    an in-memory ring buffer (TRACE_EXPORTER=memory), to a JSON-lines file
+    written by a background thread (TRACE_EXPORTER=file, TRACE_FILE), or
+    nowhere (none).
+    """
+
+    def __init__(self, sample_rate: float = None, exporter: str = None, path: str = None):
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv('TRACE_SAMPLE_RATE', 0.0))
+        self.exporter = (exporter or os.getenv('TRACE_EXPORTER', 'memory')).lower()
+        self.path = path or os.getenv('TRACE_FILE', 'traces.jsonl')
+        self.buffer: deque = deque(maxlen=int(os.getenv('TRACE_BUFFER_SPANS', 10000)))
+        self.exported = 0
+        self._queue: Optional[queue.SimpleQueue] = None
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes) -> Optional[Span]:
+        """Root span for an incoming request, or None when it is not sampled"""
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = f"{random.getrandbits(128):032x}", None, False
+        if self.exporter == "none" or not (sampled or random.random() < self.sample_rate):
+            return None
+        return Span(trace_id, parent_id, name, attributes)
+
+    def export(self, span: Span):
+        self.exported += 1
+        if self.exporter == "memory":
+            self.buffer.append(span.to_dict())
+        elif self.exporter == "file":
+            if self._queue is None:
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._write_spans, name="trace-writer", daemon=True).start()
+            self._queue.put(span.to_dict())
+
+    def _write_spans(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                f.write(json.dumps(self._queue.get(), default=str) + "\n")
+                while not self._queue.empty():
+                    f.write(json.dumps(self._queue.get(), default=str) + "\n")
+                f.flush()
+
+    def traces(self, trace_id: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Spans from the in-memory buffer grouped by trace, newest first"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for span in reversed(self.buffer):
+            if trace_id and span["trace_id"] != trace_id:
+                continue
+            if span["trace_id"] not in grouped and len(grouped) >= limit:
+                continue
+            grouped.setdefault(span["trace_id"], []).append(span)
+        return [
+            {"trace_id": tid, "spans": sorted(spans, key=lambda s: s["start"])}
+            for tid, spans in grouped.items()
+        ]
+
+@contextmanager
+def activate(root: Span) -> Iterator[Span]:
+    """Make `root` the current span for the enclosed block and export it afterwards"""
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        _current_span.reset(token)
+        root.finish()
+        get_tracer().export(root)
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """Child span of the current span; a no-op outside a sampled trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    with activate(Span(parent.trace_id, parent.span_id, name, attributes)) as child:
+        yield child
+
+def traced(name: str):
+    """Decorator wrapping an async function in a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return await func(*args, **kwargs)
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+class TracingMiddleware:
+    """
+    Plain ASGI middleware opening the root span of each sampled request from
+    the incoming traceparent header and echoing traceparent on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                header = value.decode("latin-1")
+                break
+        root = get_tracer().start_trace(f"{scope['method']} {scope['path']}", header, path=scope["path"])
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("status_code", message["status"])
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"traceparent", format_traceparent(root).encode("latin-1"))
+                ]
+            await send(message)
+
+        with activate(root):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if getattr(route, "path", None):
+                    root.name = f"{scope['method']} {route.path}"
@@ -0,0 +1,161 @@
+"""
+Upstream HTTP - Single choke point for calls to the Google APIs
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Any, Optional
+
+import requests
+
+from core.circuit_breaker import HALF_OPEN, CircuitOpenError, get_circuit_breaker
+from core.metrics import SIZE_BUCKETS, get_metrics_registry
+from core.rate_limiter import get_rate_limiter
+from core.recorder import FixtureMissing, get_recorder
+from core.tracing import span
+from core.upstream_accounting import get_upstream_accounting
+
+logger = logging.getLogger(__name__)
+
+# Default per-call timeout (seconds) for every upstream request
+DEFAULT_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT_SECONDS', 10))
+
+# Send a second, identical GET when the first is slower than the endpoint's p95
+HEDGING_ENABLED = os.getenv('UPSTREAM_HEDGING', 'false').lower() == 'true'
+HEDGE_DEFAULT_DELAY = float(os.getenv('UPSTREAM_HEDGE_DELAY_SECONDS', 1.0))
+
+UPSTREAM_DURATION = get_metrics_registry().histogram(
+    "upstream_request_duration_seconds", "Latency of Google API calls", ("api", "endpoint", "status")
+)
+UPSTREAM_BYTES = get_metrics_registry().histogram(
+    "upstream_response_size_bytes", "Size of Google API response bodies", ("api", "endpoint"), SIZE_BUCKETS
+)
+
+class RateLimitExceeded(Exception):
+    """Raised when no upstream token became available within the bounded wait"""
+
+def _counts_as_failure(error: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx say the upstream is unhealthy; other 4xx do not"""
+    if isinstance(error, FixtureMissing):
+        return False
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return True
+
+async def _get(api: str, endpoint: str, url: str, params: Dict[str, Any], timeout: Optional[float],
+               hedge: bool = False) -> Dict[str, Any]:
+    recorder = get_recorder()
+    started = time.monotonic()
+    with span("http.get", api=api, endpoint=endpoint, mode=recorder.mode) as http_span:
+        try:
+            if recorder.mode == "replay":
+                response, elapsed = recorder.replay(endpoint, url, params)
+                if recorder.original_timing:
+                    await asyncio.sleep(elapsed)
+            else:
+                # Billed once sent, even if it times out or a hedge wins and we stop waiting
+                accounting = get_upstream_accounting()
+                accounting.record_call(api, endpoint, hedge=hedge)
+                try:
+                    response = await asyncio.to_thread(requests.get, url, params=params, timeout=timeout)
+                except asyncio.CancelledError:
+                    accounting.record_outcome(api, endpoint, "cancelled")
+                    raise
+                except requests.Timeout:
+                    accounting.record_outcome(api, endpoint, "timeout")
+                    raise
+                except Exception as e:
+                    accounting.record_outcome(api, endpoint, type(e).__name__)
+                    raise
+                accounting.record_outcome(api, endpoint, str(response.status_code))
+                if recorder.mode == "record":
+                    await asyncio.to_thread(recorder.record, endpoint, url, params, response, time.monotonic() - started)
+        except Exception as e:
+            UPSTREAM_DURATION.observe(time.monotonic() - started, api, endpoint, type(e).__name__)
+            raise
+
+        UPSTREAM_DURATION.observe(time.monotonic() - started, api, endpoint, str(response.status_code))
+        UPSTREAM_BYTES.observe(len(response.content), api, endpoint)
+        http_span.set_attribute("status_code", response.status_code)
+        http_span.set_attribute("bytes", len(response.content))
+    response.raise_for_status()
+    return response.json()
+
+async def _hedged_get(api: str, endpoint: str, delay: float, url: str, params: Dict[str, Any],
+                      timeout: Optional[float]) -> Dict[str, Any]:
+    """Race the primary call against a hedge sent after `delay` seconds"""
+    primary = asyncio.create_task(_get(api, endpoint, url, params, timeout))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not get_rate_limiter().try_acquire(api):
+        return await primary
+
+    logger.info("Sending hedged request to %s after %.3fs", api, delay)
+    pending = {primary, asyncio.create_task(_get(api, endpoint, url, params, timeout, hedge=True))}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
+
+async def fetch_json(api: str, endpoint: str, url: str, params: Dict[str, Any],
+                     timeout: Optional[float] = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """
+    GET a Google API endpoint and return the decoded JSON body.
+
+    The call is rejected at once while the endpoint's circuit is open, then
+    waits for a rate-limit token and runs the blocking `requests` call in a
+    worker thread so the event loop keeps serving.
+    In replay mode the fixture is served directly, with no circuit, rate
+    limit, quota or hedging involved.
+    """
+    with span(f"upstream.{api}.{endpoint}") as call_span:
+        return await _fetch_json(api, endpoint, url, params, timeout, call_span)
+
+async def _fetch_json(api: str, endpoint: str, url: str, params: Dict[str, Any],
+                      timeout: Optional[float], call_span: Any) -> Dict[str, Any]:
+    if get_recorder().mode == "replay":
+        # Fixtures cost no quota and say nothing about the upstream's health
+        return await _get(api, endpoint, url, params, timeout)
+
+    breaker = get_circuit_breaker(endpoint)
+    if not breaker.allow_request():
+        call_span.set_attribute("rejected", "circuit_open")
+        raise CircuitOpenError(f"{endpoint} circuit is open")
+
+    # Only this call may settle a half-open circuit's probe
+    probe = breaker.state == HALF_OPEN
+    try:
+        waited = time.monotonic()
+        if not await get_rate_limiter().acquire(api):
+            call_span.set_attribute("rejected", "rate_limited")
+            raise RateLimitExceeded(f"{api} rate limit reached")
+        call_span.set_attribute("rate_limit_wait_ms", round((time.monotonic() - waited) * 1000, 3))
+
+        started = time.monotonic()
+        try:
+            if HEDGING_ENABLED:
+                data = await _hedged_get(api, endpoint, breaker.hedge_delay(HEDGE_DEFAULT_DELAY), url, params, timeout)
+            else:
+                data = await _get(api, endpoint, url, params, timeout)
+        except Exception as e:
+            if _counts_as_failure(e):
+                breaker.record_failure(type(e).__name__)
+            else:
+                breaker.record_success(time.monotonic() - started)
+            raise
+    except BaseException:
+        # Refused by the rate limiter or cancelled: without this the circuit stays half-open for good
+        if probe:
+            breaker.release_probe()
+        raise
+
+    breaker.record_success(time.monotonic() - started)
+    return data
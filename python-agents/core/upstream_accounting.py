@@ -0,0 +1,184 @@
+"""
+Upstream Accounting - Counts billable Google API calls by endpoint, destination and cause
+"""
+
+import functools
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+
+from core.metrics import get_metrics_registry
+from core.rate_limiter import Priority, get_rate_limiter, request_priority
+from core.shared_cache import get_shared_cache, normalize_key
+
+logger = logging.getLogger(__name__)
+
+# Who the call was made for, from the rate limiter's request priority
+TRIGGERS = {
+    Priority.INTERACTIVE: "user",
+    Priority.BACKGROUND: "background",
+    Priority.PREFETCH: "prefetch",
+}
+
+# Distinct destinations tracked individually; the rest are folded into "other"
+MAX_DESTINATIONS = int(os.getenv('UPSTREAM_ACCOUNTING_MAX_DESTINATIONS', 1000))
+
+billing_destination: ContextVar[Optional[str]] = ContextVar("billing_destination", default=None)
+
+@contextmanager
+def use_destination(location: Optional[str]):
+    """Attribute the enclosed upstream calls to a destination"""
+    token = billing_destination.set(normalize_key(location) if location else None)
+    try:
+        yield
+    finally:
+        billing_destination.reset(token)
+
+def bills_to_location(func):
+    """Decorator attributing an agent method's upstream calls to its `location` argument"""
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        location = kwargs.get("location", args[0] if args else None)
+        with use_destination(location):
+            return await func(self, *args, **kwargs)
+    return wrapper
+
+def _load_prices() -> Dict[str, float]:
+    """UPSTREAM_PRICE_PER_1000_<ENDPOINT> in USD, e.g. UPSTREAM_PRICE_PER_1000_GEOCODE=5"""
+    prefix = "UPSTREAM_PRICE_PER_1000_"
+    prices = {}
+    for name, value in os.environ.items():
+        if name.startswith(prefix):
+            try:
+                prices[name[len(prefix):].lower()] = float(value)
+            except ValueError:
+                logger.warning("Ignoring non-numeric %s=%s", name, value)
+    return prices
+
+class UpstreamAccounting:
+    """
+    Counts every request actually sent to Google (live or record mode; replayed
+    fixtures are free) and every photo URL handed to clients, which Google
+    bills when the browser loads it.
+
+    Each call is labelled with its trigger (user, background, prefetch) and
+    reason: "cache_miss" when the shared cache was consulted first,
+    "uncached" when caching is disabled and "hedge" for the duplicate of a
+    hedged request. A call is counted when it is sent, since Google bills
+    it whether or not we wait for the answer; how it ended (status code,
+    timeout, error or cancelled) is counted separately by `record_outcome`.
+    Destinations are kept here rather than on /metrics to keep Prometheus
+    label cardinality bounded.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.calls: Counter = Counter()
+        self.outcomes: Counter = Counter()
+        self.destinations: Dict[str, Counter] = {}
+        self.photo_urls: Counter = Counter()
+        self.prices = _load_prices()
+        registry = get_metrics_registry()
+        self.calls_metric = registry.counter(
+            "upstream_billable_calls_total", "Billable Google API calls",
+            ("api", "endpoint", "trigger", "reason")
+        )
+        self.outcomes_metric = registry.counter(
+            "upstream_call_outcomes_total", "How billable Google API calls ended",
+            ("api", "endpoint", "outcome")
+        )
+        self.photos_metric = registry.counter(
+            "upstream_photo_urls_issued_total", "Place photo URLs returned to clients (billed per load)"
+        )
+
+    def record_call(self, api: str, endpoint: str, hedge: bool = False):
+        trigger = TRIGGERS.get(request_priority.get(), "user")
+        if hedge:
+            reason = "hedge"
+        else:
+            reason = "cache_miss" if get_shared_cache().enabled else "uncached"
+        self.calls[(api, endpoint, trigger, reason)] += 1
+        self.calls_metric.inc(api, endpoint, trigger, reason)
+        self._destination(billing_destination.get())[endpoint] += 1
+
+    def record_outcome(self, api: str, endpoint: str, outcome: str):
+        self.outcomes[(api, endpoint, outcome)] += 1
+        self.outcomes_metric.inc(api, endpoint, outcome)
+
+    def record_photo_urls(self, count: int):
+        if count:
+            self.photo_urls[billing_destination.get() or "unknown"] += count
+            self.photos_metric.inc(amount=count)
+            self._destination(billing_destination.get())["photo"] += count
+
+    def _destination(self, name: Optional[str]) -> Counter:
+        name = name or "unknown"
+        counts = self.destinations.get(name)
+        if counts is None:
+            if len(self.destinations) >= MAX_DESTINATIONS:
+                name = "other"
+            counts = self.destinations.setdefault(name, Counter())
+        return counts
+
+    def report(self, top: int = 50) -> Dict[str, Any]:
+        by_endpoint: Counter = Counter()
+        by_api: Counter = Counter()
+        by_trigger: Counter = Counter()
+        by_reason: Counter = Counter()
+        by_outcome: Counter = Counter()
+        for (_, _, outcome), count in self.outcomes.items():
+            by_outcome[outcome] += count
+        for (api, endpoint, trigger, reason), count in self.calls.items():
+            by_endpoint[endpoint] += count
+            by_api[api] += count
+            by_trigger[trigger] += count
+            by_reason[reason] += count
+        photo_loads = sum(self.photo_urls.values())
+
+        costs = {
+            endpoint: round(count * self.prices[endpoint] / 1000, 4)
+            for endpoint, count in list(by_endpoint.items()) + [("photo", photo_loads)]
+            if endpoint in self.prices
+        }
+        destinations = sorted(self.destinations.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        quota = {
+            api: {
+                "daily_quota": limits["daily_quota"],
+                "used_today": limits["used_today"],
+                "quota_remaining": limits["quota_remaining"],
+                "percent_used": round(100 * limits["used_today"] / limits["daily_quota"], 2)
+                if limits["daily_quota"] else None,
+            }
+            for api, limits in get_rate_limiter().metrics().items()
+        }
+        cache = get_shared_cache()
+        return {
+            "since": self.started,
+            "total_calls": sum(self.calls.values()),
+            "by_api": dict(by_api),
+            "by_endpoint": dict(by_endpoint),
+            "by_trigger": dict(by_trigger),
+            "by_reason": dict(by_reason),
+            "by_outcome": dict(by_outcome),
+            "photo_urls_issued": photo_loads,
+            "estimated_cost_usd": costs,
+            "top_destinations": [
+                {"destination": name, "billable": sum(counts.values()), "by_endpoint": dict(counts)}
+                for name, counts in destinations[:top]
+            ],
+            "cache_hits": {namespace: counters["hits"] for namespace, counters in cache.stats.items()},
+            "quota": quota,
+        }
+
+_accounting: Optional[UpstreamAccounting] = None
+
+def get_upstream_accounting() -> UpstreamAccounting:
+    """Return the process-wide upstream call accounting"""
+    global _accounting
+    if _accounting is None:
+        _accounting = UpstreamAccounting()
+    return _accounting
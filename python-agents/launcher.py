@@ -0,0 +1,70 @@
+"""
+Production launcher - Runs the agent server with multiple worker processes
+"""
+
+import logging
+import os
+
+from core.shared_cache import get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+def run_production(host: str, port: int, workers: int, preload: bool = False, app_path: str = "main:app"):
+    """
+    Serve the app with N worker processes that share one on-disk cache tier.
+
+    With preload enabled the app is imported once in the master process before
+    forking (gunicorn ``preload_app``), so workers start from a warm interpreter
+    and share read-only memory pages. Without gunicorn installed the launcher
+    falls back to uvicorn's own multi-process supervisor.
+    """
+    # Workers size their share of the upstream rate limits from this
+    os.environ["PYTHON_SERVER_WORKERS"] = str(workers)
+
+    # Create the cache file and WAL journal once, before any worker races for it
+    get_shared_cache().initialize()
+
+    if preload:
+        try:
+            from gunicorn.app.base import BaseApplication
+
+            class PreloadedApplication(BaseApplication):
+                def __init__(self, application, options: dict):
+                    self.application = application
+                    self.options = options
+                    super().__init__()
+
+                def load_config(self):
+                    for key, value in self.options.items():
+                        self.cfg.set(key, value)
+
+                def load(self):
+                    return self.application
+
+            module_name, app_name = app_path.split(":")
+            module = __import__(module_name)
+            application = getattr(module, app_name)
+
+            logger.info(f"Starting {workers} preloaded gunicorn workers on {host}:{port}")
+            PreloadedApplication(application, {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                "loglevel": "info",
+            }).run()
+            return
+
+        except ImportError:
+            logger.warning("gunicorn not installed - preload unavailable, starting uvicorn workers")
+
+    import uvicorn
+
+    logger.info(f"Starting {workers} uvicorn workers on {host}:{port}")
+    uvicorn.run(
+        app_path,
+        host=host,
+        port=port,
+        workers=workers,
+        log_level="info"
+    )
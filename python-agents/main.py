@@ -5,23 +5,37 @@ Multi-agent system for travel planning using LangGraph and MCP protocol
 
 import asyncio
 import logging
+import time
 from typing import Dict, Any, List
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 
 from agents.supervisor import SupervisorAgent
-from agents.location_agent import LocationAgent
-from agents.weather_agent import WeatherAgent
+from agents.services import get_location_agent, get_weather_agent
+from agents.hybrid_router import HybridRouter
 from mcpMock.server import MCPServer
+from core.rate_limiter import get_rate_limiter
+from core.circuit_breaker import circuit_metrics
+from core.recorder import get_recorder
+from core.shared_cache import get_shared_cache
+from core.canonical_location import get_location_canonicalizer
+from core.place_index import get_place_index
+from core.loop_monitor import get_loop_monitor
+from core.metrics import HTTPMetricsMiddleware, get_metrics_registry
+from core.tracing import TracingMiddleware, get_tracer
+from core.profiler import ProfilingMiddleware, get_profiler
+from core.log_pipeline import CorrelationIdMiddleware, configure_logging, sampling_stats
+from core.upstream_accounting import get_upstream_accounting
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging - queued JSON records, formatted off the event loop
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -40,6 +54,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, status and response size for /metrics
+app.add_middleware(HTTPMetricsMiddleware)
+
+# Request-scoped spans, continuing the caller's traceparent when present
+app.add_middleware(TracingMiddleware)
+
+# Opt-in per-request sampling profiler (trigger header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+# Correlation ID for every log record of a request (X-Request-ID)
+app.add_middleware(CorrelationIdMiddleware)
+
 # Pydantic models for API requests
 class LocationRequest(BaseModel):
     location: str
@@ -63,10 +89,11 @@ class AgentMessageRequest(BaseModel):
     agent_type: str = "supervisor"
     context: Dict[str, Any] = {}
 
-# Initialize agents
-supervisor_agent = SupervisorAgent()
-location_agent = LocationAgent()
-weather_agent = WeatherAgent()
+# Initialize agents - the supervisor coordinates the same instances the endpoints use
+location_agent = get_location_agent()
+weather_agent = get_weather_agent()
+supervisor_agent = SupervisorAgent(tourist_agent=location_agent, weather_agent=weather_agent)
+hybrid_router = HybridRouter(supervisor_agent)
 mcp_server = MCPServer()
 
 # Agent registry
@@ -81,16 +108,31 @@ async def startup_event():
     """Initialize agents and MCP server on startup"""
     logger.info("Starting TravelAgent Pro Agent Server...")
     
-    # Initialize MCP server
-    await mcp_server.initialize()
+    # Initialize the MCP server and the shared agents concurrently
+    await asyncio.gather(
+        mcp_server.initialize(),
+        location_agent.initialize(),
+        weather_agent.initialize()
+    )
     
-    # Initialize agents
+    # Supervisor reuses the already-initialized sub-agents
     await supervisor_agent.initialize()
-    await location_agent.initialize()
-    await weather_agent.initialize()
+    
+    # Map the place index (building it if the gazetteer changed) before the first keystroke
+    get_place_index()
+    
+    # Watch for blocking calls on the event loop
+    if os.getenv("LOOP_LAG_MONITOR", "true").lower() == "true":
+        get_loop_monitor().start()
     
     logger.info("All agents initialized successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background monitors and let queued cache writes reach SQLite"""
+    get_loop_monitor().stop()
+    get_shared_cache().flush()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -117,7 +159,7 @@ async def health_check():
 async def get_tourist_spots(request: TouristSpotsRequest):
     """Get tourist spots for a location"""
     try:
-        logger.info(f"Getting tourist spots for: {request.location}")
+        logger.info("Getting tourist spots for: %s", request.location)
         
         # Use tourist agent to find spots
         spots = await location_agent.find_tourist_spots(
@@ -130,7 +172,7 @@ async def get_tourist_spots(request: TouristSpotsRequest):
         
         return {
             "success": True,
-            "location": request.location,
+            "location": get_location_canonicalizer().label(request.location, request.latitude, request.longitude),
             "spots": spots,
             "count": len(spots)
         }
@@ -143,7 +185,7 @@ async def get_tourist_spots(request: TouristSpotsRequest):
 async def get_weather(request: WeatherRequest):
     """Get weather information for a location"""
     try:
-        logger.info(f"Getting weather for: {request.location}")
+        logger.info("Getting weather for: %s", request.location)
         
         # Use weather agent to get weather data
         weather_data = await weather_agent.get_weather_info(
@@ -154,7 +196,7 @@ async def get_weather(request: WeatherRequest):
         
         return {
             "success": True,
-            "location": request.location,
+            "location": get_location_canonicalizer().label(request.location, request.latitude, request.longitude),
             "weather": weather_data
         }
         
@@ -166,15 +208,18 @@ async def get_weather(request: WeatherRequest):
 async def send_agent_message(request: AgentMessageRequest):
     """Send a message to an agent"""
     try:
-        logger.info(f"Sending message to {request.agent_type} agent: {request.message}")
+        logger.info("Sending message to %s agent: %s", request.agent_type, request.message)
         
         if request.agent_type not in agents:
             raise HTTPException(status_code=400, detail=f"Unknown agent type: {request.agent_type}")
         
         agent = agents[request.agent_type]
         
-        # Process message through agent
-        response = await agent.process_message(request.message, request.context)
+        # Supervisor messages go through the hybrid router so simple ones skip the LLM
+        if request.agent_type == "supervisor":
+            response = await hybrid_router.handle(request.message, request.context)
+        else:
+            response = await agent.process_message(request.message, request.context)
         
         return {
             "success": True,
@@ -190,7 +235,7 @@ async def send_agent_message(request: AgentMessageRequest):
 async def create_travel_plan(request: LocationRequest):
     """Create a comprehensive travel plan using all agents"""
     try:
-        logger.info(f"Creating travel plan for: {request.location}")
+        logger.info("Creating travel plan for: %s", request.location)
         
         # Use supervisor to coordinate agents
         travel_plan = await supervisor_agent.create_travel_plan(
@@ -201,7 +246,7 @@ async def create_travel_plan(request: LocationRequest):
         
         return {
             "success": True,
-            "location": request.location,
+            "location": get_location_canonicalizer().label(request.location, request.latitude, request.longitude),
             "plan": travel_plan
         }
         
@@ -222,18 +267,158 @@ async def get_mcp_resources():
         logger.error(f"Error getting MCP resources: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/upstream/limits")
+async def get_upstream_limits():
+    """Get rate-limit, daily quota and circuit-breaker state per upstream API"""
+    return {
+        "success": True,
+        "limits": get_rate_limiter().metrics(),
+        "circuits": circuit_metrics(),
+        "recorder": get_recorder().stats()
+    }
+
+@app.get("/api/locations/autocomplete")
+async def autocomplete_locations(q: str, limit: int = 8):
+    """Get ranked place suggestions for a partially typed location from the local place index"""
+    started = time.perf_counter()
+    suggestions = get_place_index().complete(q, limit)
+    return {
+        "success": True,
+        "query": q,
+        "suggestions": suggestions,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get shared-cache counters and hit rates per namespace, and how location names were canonicalized"""
+    cache = get_shared_cache()
+    return {
+        "success": True,
+        "stats": cache.stats,
+        "hit_rates": cache.hit_rates(),
+        "canonicalization": get_location_canonicalizer().hit_rates(),
+        "place_index": get_place_index().metrics()
+    }
+
+def _collect_runtime_metrics():
+    """Gauges read at scrape time from the limiter, breakers and shared cache"""
+    limits = get_rate_limiter().metrics()
+    yield ("upstream_rate_limit_tokens", "gauge", "Rate-limit tokens currently available",
+           [({"api": api}, m["tokens_available"]) for api, m in limits.items()])
+    yield ("upstream_rate_limit_granted_total", "counter", "Rate-limit tokens granted",
+           [({"api": api}, m["granted"]) for api, m in limits.items()])
+    yield ("upstream_rate_limit_rejected_total", "counter", "Calls rejected by the rate limiter",
+           [({"api": api, "reason": reason}, count)
+            for api, m in limits.items() for reason, count in m["rejected"].items()])
+    yield ("upstream_quota_remaining", "gauge", "Daily upstream quota left for this process",
+           [({"api": api}, m["quota_remaining"]) for api, m in limits.items()])
+    circuits = circuit_metrics()
+    yield ("upstream_circuit_open", "gauge", "1 while the endpoint's circuit is not closed",
+           [({"endpoint": name}, 0 if m["state"] == "closed" else 1) for name, m in circuits.items()])
+    yield ("upstream_circuit_rejected_total", "counter", "Calls rejected by an open circuit",
+           [({"endpoint": name}, m["rejected"]) for name, m in circuits.items()])
+    yield ("log_records_sampled_out_total", "counter", "INFO/DEBUG records dropped by LOG_SAMPLING",
+           [({"logger": name}, count) for name, count in sampling_stats().get("dropped", {}).items()])
+    yield ("log_records_queue_dropped_total", "counter", "Records dropped because the log queue was full",
+           [({}, sampling_stats().get("queue_dropped", 0))])
+    stats = get_shared_cache().stats
+    yield ("shared_cache_lookups_total", "counter", "Shared cache lookups by result",
+           [({"namespace": ns, "result": result}, counters[key])
+            for ns, counters in stats.items() for result, key in (("hit", "hits"), ("miss", "misses"))])
+
+get_metrics_registry().add_collector(_collect_runtime_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, agent, MCP tool and upstream metrics"""
+    return PlainTextResponse(get_metrics_registry().render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/router/stats")
+async def get_router_stats():
+    """Fast-path hit rate and estimated latency saved by the hybrid router"""
+    return {"success": True, "router": hybrid_router.stats()}
+
+def require_admin_token(request: Request):
+    """Admit admin requests (traces, upstream usage, profiles) carrying PROFILE_TOKEN in the profiling header"""
+    profiler = get_profiler()
+    if not profiler.token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set PROFILE_TOKEN")
+    if not profiler.authorized(request.headers.get(profiler.header.decode("latin-1"))):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/api/traces", dependencies=[Depends(require_admin_token)])
+async def get_traces(trace_id: str = None, limit: int = 20):
+    """Get recent sampled traces from the in-memory collector"""
+    tracer = get_tracer()
+    return {
+        "success": True,
+        "exporter": tracer.exporter,
+        "sample_rate": tracer.sample_rate,
+        "traces": tracer.traces(trace_id=trace_id, limit=limit)
+    }
+
+@app.get("/api/admin/upstream-usage", dependencies=[Depends(require_admin_token)])
+async def get_upstream_usage(top: int = 50):
+    """Get billable upstream calls by API, endpoint, cause and destination, with quota headroom"""
+    return {
+        "success": True,
+        "usage": get_upstream_accounting().report(top=top)
+    }
+
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin_token)])
+async def list_profiles():
+    """List stored request profiles, newest first"""
+    return {
+        "success": True,
+        "profiles": get_profiler().list_profiles()
+    }
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin_token)])
+async def get_profile(profile_id: str, format: str = "json"):
+    """Get one request profile; format=folded returns flamegraph-ready collapsed stacks"""
+    profile = get_profiler().profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+    if format == "folded":
+        return PlainTextResponse("\n".join(profile["folded"]) + "\n")
+    return {
+        "success": True,
+        "profile": profile
+    }
+
+@app.get("/api/loop/lag")
+async def get_loop_lag():
+    """Get event-loop lag histogram and recently captured blocking call sites"""
+    return {
+        "success": True,
+        "lag": get_loop_monitor().metrics()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     
     port = int(os.getenv("PYTHON_SERVER_PORT", 8000))
     host = os.getenv("PYTHON_SERVER_HOST", "0.0.0.0")
     
-    logger.info(f"Starting server on {host}:{port}")
+    environment = os.getenv("PYTHON_SERVER_ENV", "development")
     
-    uvicorn.run(
-        "main:app",
-        host=host,
-        port=port,
-        reload=True,
-        log_level="info"
-    )
+    logger.info(f"Starting server on {host}:{port} ({environment})")
+    
+    if environment == "production":
+        from launcher import run_production
+        
+        run_production(
+            host=host,
+            port=port,
+            workers=int(os.getenv("PYTHON_SERVER_WORKERS", os.cpu_count() or 1)),
+            preload=os.getenv("PYTHON_SERVER_PRELOAD", "false").lower() == "true"
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            reload=True,
+            log_level="info"
+        )
@@ -10,9 +10,19 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import os
+import time
+
+from core.canonical_location import get_location_canonicalizer
+from core.metrics import get_metrics_registry
+from core.rate_limiter import DEFAULT_LIMITS
+from core.tracing import span
 
 logger = logging.getLogger(__name__)
 
+TOOL_DURATION = get_metrics_registry().histogram(
+    "mcp_tool_duration_seconds", "Latency of MCP call_tool per tool", ("tool", "outcome")
+)
+
 @dataclass
 class MCPResource:
     """Represents an MCP resource"""
@@ -81,6 +91,16 @@ class MCPServer:
     
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Call a tool with the given arguments"""
+        started = time.perf_counter()
+        with span(f"mcp.{name}") as tool_span:
+            result = await self._dispatch_tool(name, arguments)
+            outcome = "error" if isinstance(result, dict) and "error" in result else "ok"
+            tool_span.set_attribute("outcome", outcome)
+        TOOL_DURATION.observe(time.perf_counter() - started, name if name in self.tools else "unknown", outcome)
+        return result
+    
+    async def _dispatch_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Route a tool call to its handler"""
         try:
             if name not in self.tools:
                 raise ValueError(f"Tool '{name}' not found")
@@ -121,8 +141,8 @@ class MCPServer:
                 "version": "v1",
                 "capabilities": ["nearby_search", "text_search", "place_details"],
                 "rate_limits": {
-                    "requests_per_second": 10,
-                    "requests_per_day": 100000
+                    "requests_per_second": DEFAULT_LIMITS["places"]["requests_per_second"],
+                    "requests_per_day": DEFAULT_LIMITS["places"]["requests_per_day"]
                 }
             }
         )
@@ -340,12 +360,10 @@ class MCPServer:
         """Handle find_tourist_spots tool call"""
         try:
             # Import here to avoid circular imports
-            from ..agents.tourist_agent import TouristAgent
-            
-            tourist_agent = TouristAgent()
-            await tourist_agent.initialize()
+            from agents.services import ensure_initialized, get_location_agent
             
-            spots = await tourist_agent.find_tourist_spots(
+            await ensure_initialized()
+            spots = await get_location_agent().find_tourist_spots(
                 location=arguments["location"],
                 latitude=arguments.get("latitude"),
                 longitude=arguments.get("longitude"),
@@ -357,7 +375,9 @@ class MCPServer:
                 "success": True,
                 "spots": spots,
                 "tool": "find_tourist_spots",
-                "location": arguments["location"]
+                "location": get_location_canonicalizer().label(
+                    arguments["location"], arguments.get("latitude"), arguments.get("longitude")
+                )
             }
             
         except Exception as e:
@@ -368,12 +388,10 @@ class MCPServer:
         """Handle get_weather_data tool call"""
         try:
             # Import here to avoid circular imports
-            from ..agents.weather_agent import WeatherAgent
+            from agents.services import ensure_initialized, get_weather_agent
             
-            weather_agent = WeatherAgent()
-            await weather_agent.initialize()
-            
-            weather_data = await weather_agent.get_weather_info(
+            await ensure_initialized()
+            weather_data = await get_weather_agent().get_weather_info(
                 location=arguments["location"],
                 latitude=arguments.get("latitude"),
                 longitude=arguments.get("longitude")
@@ -383,7 +401,9 @@ class MCPServer:
                 "success": True,
                 "weather": weather_data,
                 "tool": "get_weather_data",
-                "location": arguments["location"]
+                "location": get_location_canonicalizer().label(
+                    arguments["location"], arguments.get("latitude"), arguments.get("longitude")
+                )
             }
             
         except Exception as e:
@@ -393,19 +413,22 @@ class MCPServer:
     async def _handle_geocode_location(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle geocode_location tool call"""
         try:
-            # Simple geocoding implementation
-            # In a real implementation, this would use a geocoding service
+            # Import here to avoid circular imports
+            from agents.services import ensure_initialized, get_location_agent
+            
             location = arguments["location"]
+            await ensure_initialized()
+            result = await get_location_agent().geocode(location)
+            if not result:
+                return {"error": f"Could not geocode '{location}'", "tool": "geocode_location"}
             
-            # Mock geocoding response
             return {
                 "success": True,
-                "latitude": 0.0,
-                "longitude": 0.0,
-                "formatted_address": location,
-                "place_id": f"mock_place_id_{hash(location)}",
-                "tool": "geocode_location",
-                "note": "Mock geocoding - integrate with real service"
+                "latitude": result["lat"],
+                "longitude": result["lng"],
+                "formatted_address": result.get("formatted_address", location),
+                "country": result.get("country"),
+                "tool": "geocode_location"
             }
             
         except Exception as e:
@@ -448,7 +471,7 @@ class MCPServer:
     async def _handle_get_travel_recommendations(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get_travel_recommendations tool call"""
         try:
-            location = arguments["location"]
+            location = get_location_canonicalizer().canonicalize(arguments["location"]).name
             weather_data = arguments.get("weather_data", {})
             tourist_spots = arguments.get("tourist_spots", [])
             
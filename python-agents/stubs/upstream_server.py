@@ -0,0 +1,407 @@
+"""
+Upstream Stub Server - Offline stand-in for the Google Places, Geocoding and Weather APIs
+
+Usage:
+    python -m stubs.upstream_server --port 9100 --latency-ms 80 --error-rate 0.01
+    python -m stubs.upstream_server --config stub.json
+
+Point the agents at it with the environment variables printed on startup.
+Responses mimic the real payload shapes closely enough to exercise
+`_format_place_data` and `_format_weather_data`, and are deterministic per
+location so repeated runs produce comparable numbers.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ("nearbysearch", "geocode", "currentConditions", "forecastDays", "photo")
+
+# A few well-known cities so geocoding common names returns real coordinates
+KNOWN_CITIES = {
+    "paris": (48.8566, 2.3522, "Paris, France", "France"),
+    "london": (51.5074, -0.1278, "London, UK", "United Kingdom"),
+    "tokyo": (35.6762, 139.6503, "Tokyo, Japan", "Japan"),
+    "new york": (40.7128, -74.0060, "New York, NY, USA", "United States"),
+    "rome": (41.9028, 12.4964, "Rome, Metropolitan City of Rome Capital, Italy", "Italy"),
+    "san francisco": (37.7749, -122.4194, "San Francisco, CA, USA", "United States"),
+    "sydney": (-33.8688, 151.2093, "Sydney NSW, Australia", "Australia"),
+    "barcelona": (41.3874, 2.1686, "Barcelona, Spain", "Spain"),
+}
+
+CONDITIONS = [
+    ("CLEAR", "Sunny"), ("PARTLY_CLOUDY", "Partly cloudy"), ("CLOUDY", "Cloudy"),
+    ("LIGHT_RAIN", "Light rain"), ("RAIN", "Rain"), ("SNOW", "Snow"),
+]
+
+PLACE_TYPES = [
+    ["tourist_attraction", "point_of_interest", "establishment"],
+    ["museum", "tourist_attraction", "point_of_interest", "establishment"],
+    ["park", "tourist_attraction", "point_of_interest", "establishment"],
+    ["church", "place_of_worship", "point_of_interest", "establishment"],
+]
+
+@dataclass
+class LatencySpec:
+    """Latency distribution: fixed, uniform or lognormal (milliseconds)"""
+    distribution: str = "lognormal"
+    median_ms: float = 80.0
+    sigma: float = 0.5
+    min_ms: float = 20.0
+    max_ms: float = 200.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            return self.median_ms / 1000
+        if self.distribution == "uniform":
+            return rng.uniform(self.min_ms, self.max_ms) / 1000
+        return rng.lognormvariate(math.log(max(self.median_ms, 0.001)), self.sigma) / 1000
+
+@dataclass
+class EndpointSpec:
+    latency: LatencySpec = field(default_factory=LatencySpec)
+    error_rate: float = 0.0          # fraction answered with HTTP 503
+    throttle_rate: float = 0.0       # fraction answered with HTTP 429
+
+@dataclass
+class StubConfig:
+    endpoints: Dict[str, EndpointSpec] = field(default_factory=lambda: {name: EndpointSpec() for name in ENDPOINTS})
+    places_per_query: int = 60       # total results available across pages
+    page_size: int = 20              # Places API returns at most 20 per page
+    forecast_days: int = 10
+    padding_bytes: int = 0           # extra text per place to grow payloads
+    seed: int = 42
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StubConfig":
+        config = cls(**{key: value for key, value in data.items() if key not in ("endpoints", "default")})
+        default = data.get("default", {})
+        for name in ENDPOINTS:
+            spec = dict(default, **data.get("endpoints", {}).get(name, {}))
+            latency = LatencySpec(**spec.pop("latency", {}))
+            config.endpoints[name] = EndpointSpec(latency=latency, **spec)
+        return config
+
+def _digest(*parts: Any) -> int:
+    return int(hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:12], 16)
+
+def _geocode(address: str) -> Tuple[float, float, str, str]:
+    key = " ".join(address.lower().replace(",", " ").split())
+    for name, city in KNOWN_CITIES.items():
+        if key.startswith(name):
+            return city
+    digest = _digest(key)
+    lat = (digest % 140000) / 1000 - 70
+    lng = ((digest >> 20) % 360000) / 1000 - 180
+    return lat, lng, address.title(), "Stubland"
+
+class StubState:
+    """Config plus per-endpoint request counters shared by handler threads"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counts = {name: 0 for name in ENDPOINTS}
+        self.errors = {name: 0 for name in ENDPOINTS}
+
+    def decide(self, endpoint: str) -> Tuple[float, Optional[int]]:
+        """Pick this request's latency and optional error status"""
+        spec = self.config.endpoints[endpoint]
+        with self.lock:
+            self.counts[endpoint] += 1
+            delay = spec.latency.sample(self.rng)
+            roll = self.rng.random()
+        if roll < spec.error_rate:
+            status = 503
+        elif roll < spec.error_rate + spec.throttle_rate:
+            status = 429
+        else:
+            return delay, None
+        with self.lock:
+            self.errors[endpoint] += 1
+        return delay, status
+
+    # Payload builders
+
+    def nearbysearch(self, params: Dict[str, str]) -> Dict[str, Any]:
+        config = self.config
+        if "pagetoken" in params:
+            center, kind, offset = params["pagetoken"].split("|")
+            offset = int(offset)
+        else:
+            center, kind, offset = params.get("location", "0,0"), params.get("type", "tourist_attraction"), 0
+        lat, lng = (float(v) for v in center.split(","))
+        radius_deg = float(params.get("radius", 5000)) / 111_000
+
+        results = []
+        for index in range(offset, min(offset + config.page_size, config.places_per_query)):
+            digest = _digest(center, kind, index)
+            place_lat = lat + ((digest % 2001) / 1000 - 1) * radius_deg / 2
+            place_lng = lng + (((digest >> 12) % 2001) / 1000 - 1) * radius_deg / 2
+            place = {
+                "business_status": "OPERATIONAL",
+                "geometry": {
+                    "location": {"lat": place_lat, "lng": place_lng},
+                    "viewport": {
+                        "northeast": {"lat": place_lat + 0.0013, "lng": place_lng + 0.0013},
+                        "southwest": {"lat": place_lat - 0.0013, "lng": place_lng - 0.0013},
+                    },
+                },
+                "icon": "https://maps.gstatic.com/mapfiles/place_api/icons/v1/png_71/generic_business-71.png",
+                "icon_background_color": "#7B9EB0",
+                "icon_mask_base_uri": "https://maps.gstatic.com/mapfiles/place_api/icons/v2/generic_pinlet",
+                "name": f"Stub {kind.replace('_', ' ').title()} {index + 1}",
+                "opening_hours": {"open_now": bool(digest % 2)},
+                "photos": [{
+                    "height": 3024,
+                    "width": 4032,
+                    "html_attributions": ["<a href=\"https://maps.google.com/maps/contrib/0\">Stub Contributor</a>"],
+                    "photo_reference": f"stub-photo-{digest:x}" + "A" * 120,
+                }],
+                "place_id": f"ChIJstub{digest:012x}",
+                "plus_code": {"compound_code": "STUB+00", "global_code": "8FW4STUB+00"},
+                "rating": round(3.5 + (digest % 15) / 10, 1),
+                "reference": f"ChIJstub{digest:012x}",
+                "scope": "GOOGLE",
+                "types": PLACE_TYPES[digest % len(PLACE_TYPES)],
+                "user_ratings_total": digest % 50000,
+                "vicinity": f"{digest % 300} Stub Street",
+            }
+            if digest % 3 == 0:
+                place["price_level"] = digest % 4
+            if config.padding_bytes:
+                place["editorial_summary"] = {"overview": "x" * config.padding_bytes}
+            results.append(place)
+
+        payload = {"html_attributions": [], "results": results, "status": "OK" if results else "ZERO_RESULTS"}
+        next_offset = offset + config.page_size
+        if next_offset < config.places_per_query:
+            payload["next_page_token"] = f"{center}|{kind}|{next_offset}"
+        return payload
+
+    def geocode(self, params: Dict[str, str]) -> Dict[str, Any]:
+        address = params.get("address", "")
+        if not address.strip():
+            return {"results": [], "status": "ZERO_RESULTS"}
+        lat, lng, formatted, country = _geocode(address)
+        return {
+            "results": [{
+                "address_components": [
+                    {"long_name": formatted.split(",")[0], "short_name": formatted.split(",")[0], "types": ["locality", "political"]},
+                    {"long_name": country, "short_name": country[:2].upper(), "types": ["country", "political"]},
+                ],
+                "formatted_address": formatted,
+                "geometry": {
+                    "location": {"lat": lat, "lng": lng},
+                    "location_type": "APPROXIMATE",
+                    "viewport": {
+                        "northeast": {"lat": lat + 0.1, "lng": lng + 0.1},
+                        "southwest": {"lat": lat - 0.1, "lng": lng - 0.1},
+                    },
+                },
+                "place_id": f"ChIJgeo{_digest(formatted):012x}",
+                "types": ["locality", "political"],
+            }],
+            "status": "OK",
+        }
+
+    def _condition(self, *seed: Any) -> Dict[str, Any]:
+        kind, text = CONDITIONS[_digest(*seed) % len(CONDITIONS)]
+        return {
+            "iconBaseUri": f"https://maps.gstatic.com/weather/v1/{kind.lower()}",
+            "description": {"text": text, "languageCode": "en"},
+            "type": kind,
+        }
+
+    def current_conditions(self, params: Dict[str, str]) -> Dict[str, Any]:
+        lat = float(params.get("location.latitude", 0))
+        lng = float(params.get("location.longitude", 0))
+        digest = _digest(round(lat, 2), round(lng, 2))
+        temperature = round(30 - abs(lat) / 3 + (digest % 80) / 10, 1)
+        return {
+            "currentTime": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "timeZone": {"id": "Etc/UTC"},
+            "isDaytime": True,
+            "weatherCondition": self._condition(round(lat, 2), round(lng, 2)),
+            "temperature": {"degrees": temperature, "unit": "CELSIUS"},
+            "feelsLikeTemperature": {"degrees": round(temperature - 1.5, 1), "unit": "CELSIUS"},
+            "dewPoint": {"degrees": round(temperature - 8, 1), "unit": "CELSIUS"},
+            "relativeHumidity": 30 + digest % 65,
+            "uvIndex": digest % 11,
+            "precipitation": {
+                "probability": {"percent": digest % 100, "type": "RAIN"},
+                "qpf": {"quantity": (digest % 30) / 10, "unit": "MILLIMETERS"},
+                "snowQpf": {"quantity": 0, "unit": "MILLIMETERS"},
+            },
+            "thunderstormProbability": digest % 20,
+            "airPressure": {"meanSeaLevelMillibars": 990 + digest % 40},
+            "wind": {
+                "direction": {"degrees": digest % 360, "cardinal": "NORTH"},
+                "speed": {"value": digest % 40, "unit": "KILOMETERS_PER_HOUR"},
+                "gust": {"value": digest % 60, "unit": "KILOMETERS_PER_HOUR"},
+            },
+            "visibility": {"distance": 5 + digest % 15, "unit": "KILOMETERS"},
+            "cloudCover": digest % 100,
+        }
+
+    def forecast_days(self, params: Dict[str, str]) -> Dict[str, Any]:
+        lat = float(params.get("location.latitude", 0))
+        lng = float(params.get("location.longitude", 0))
+        days = min(int(params.get("days", self.config.forecast_days)), self.config.forecast_days)
+        start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        forecast = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            digest = _digest(round(lat, 2), round(lng, 2), offset)
+            high = round(30 - abs(lat) / 3 + (digest % 80) / 10, 1)
+            forecast.append({
+                "interval": {
+                    "startTime": day.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "endTime": (day + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                },
+                "displayDate": {"year": day.year, "month": day.month, "day": day.day},
+                "daytimeForecast": {"weatherCondition": self._condition(lat, lng, offset, "day"), "relativeHumidity": digest % 100},
+                "nighttimeForecast": {"weatherCondition": self._condition(lat, lng, offset, "night"), "relativeHumidity": digest % 100},
+                "maxTemperature": {"degrees": high, "unit": "CELSIUS"},
+                "minTemperature": {"degrees": round(high - 4 - digest % 6, 1), "unit": "CELSIUS"},
+                "sunEvents": {
+                    "sunriseTime": (day + timedelta(hours=6, minutes=digest % 60)).isoformat().replace("+00:00", "Z"),
+                    "sunsetTime": (day + timedelta(hours=18, minutes=digest % 60)).isoformat().replace("+00:00", "Z"),
+                },
+            })
+        return {"forecastDays": forecast, "timeZone": {"id": "Etc/UTC"}}
+
+def _route(path: str) -> Optional[str]:
+    if path.endswith("nearbysearch/json"):
+        return "nearbysearch"
+    if path.endswith("geocode/json"):
+        return "geocode"
+    if path.endswith("currentConditions:lookup"):
+        return "currentConditions"
+    if path.endswith("days:lookup"):
+        return "forecastDays"
+    if path.endswith("/photo"):
+        return "photo"
+    return None
+
+def _make_handler(state: StubState):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+            if parsed.path == "/__stats":
+                return self._send(200, {"requests": state.counts, "errors": state.errors, "config": asdict(state.config)})
+
+            endpoint = _route(parsed.path)
+            if endpoint is None:
+                return self._send(404, {"error": {"code": 404, "message": f"Unknown stub path {parsed.path}"}})
+
+            delay, error_status = state.decide(endpoint)
+            time.sleep(delay)
+            if error_status:
+                return self._send(error_status, {"error": {"code": error_status, "status": "UNAVAILABLE" if error_status == 503 else "RESOURCE_EXHAUSTED"}})
+
+            if endpoint == "nearbysearch":
+                body = state.nearbysearch(params)
+            elif endpoint == "geocode":
+                body = state.geocode(params)
+            elif endpoint == "currentConditions":
+                body = state.current_conditions(params)
+            elif endpoint == "forecastDays":
+                body = state.forecast_days(params)
+            else:
+                return self._send(200, b"\x89PNG stub", content_type="image/png")
+            self._send(200, body)
+
+        def _send(self, status: int, body: Any, content_type: str = "application/json"):
+            payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return StubHandler
+
+def agent_environment(base_url: str) -> Dict[str, str]:
+    """Environment variables that point both agents at a stub server"""
+    return {
+        "GOOGLE_MAPS_API_KEY": "stub-key",
+        "WEATHER_API_KEY": "stub-key",
+        "GOOGLE_MAPS_BASE_URL": f"{base_url}/maps/api/place",
+        "GOOGLE_GEOCODING_URL": f"{base_url}/maps/api/geocode/json",
+        "GOOGLE_WEATHER_BASE_URL": f"{base_url}/v1",
+    }
+
+def start_stub_server(config: StubConfig = None, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub in a daemon thread; returns the server and its base URL"""
+    server = ThreadingHTTPServer((host, port), _make_handler(StubState(config or StubConfig())))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--config", help="JSON file with StubConfig fields and per-endpoint overrides")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Median (or fixed) latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--places", type=int, default=60, help="Results available per nearby search")
+    parser.add_argument("--forecast-days", type=int, default=10)
+    parser.add_argument("--padding-bytes", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.config:
+        with open(args.config) as f:
+            config = StubConfig.from_dict(json.load(f))
+    else:
+        config = StubConfig.from_dict({
+            "places_per_query": args.places,
+            "forecast_days": args.forecast_days,
+            "padding_bytes": args.padding_bytes,
+            "seed": args.seed,
+            "default": {
+                "latency": {"distribution": args.latency, "median_ms": args.latency_ms,
+                            "sigma": args.latency_sigma, "min_ms": args.latency_ms / 2,
+                            "max_ms": args.latency_ms * 2},
+                "error_rate": args.error_rate,
+                "throttle_rate": args.throttle_rate,
+            },
+        })
+
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(StubState(config)))
+    base_url = f"http://{args.host}:{server.server_port}"
+    print(f"Upstream stub listening on {base_url}")
+    for key, value in agent_environment(base_url).items():
+        print(f"export {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ const { storage } = require('./storage');
 const { setupAuth, authenticateJWT, optionalAuth } = require('./auth');
 const { z } = require('zod');
 const { Console } = require('console');
+const crypto = require('crypto');
 
 const LocationSearchSchema = z.object({
   location: z.string().min(1),
@@ -30,6 +31,19 @@ const AgentMessageSchema = z.object({
   agentType: z.enum(['tourist', 'weather', 'supervisor']).optional(),
 });
 
+// Headers for calls to the Python agent server. An incoming W3C traceparent is
+// forwarded so agent spans join the caller's trace; otherwise a fresh trace id
+// is sent unsampled and the agent server applies its own sampling rate.
+function agentServerHeaders(req) {
+  const incoming = req.get('traceparent');
+  const traceparent = incoming ||
+    `00-${crypto.randomBytes(16).toString('hex')}-${crypto.randomBytes(8).toString('hex')}-00`;
+  return {
+    'Content-Type': 'application/json',
+    'traceparent': traceparent,
+  };
+}
+
 async function registerRoutes(app) {
   // Setup authentication
   setupAuth(app);
@@ -56,9 +70,7 @@ async function registerRoutes(app) {
         if (validatedData.searchType === 'tourist' || validatedData.searchType === 'both') {
           const touristResponse = await fetch(`${pythonServerUrl}/api/tourist-spots`, {
             method: 'POST',
-            headers: {
-              'Content-Type': 'application/json',
-            },
+            headers: agentServerHeaders(req),
             body: JSON.stringify({
               location: validatedData.location,
               latitude: validatedData.latitude,
@@ -76,9 +88,7 @@ async function registerRoutes(app) {
         if (validatedData.searchType === 'weather' || validatedData.searchType === 'both') {
           const weatherResponse = await fetch(`${pythonServerUrl}/api/weather`, {
             method: 'POST',
-            headers: {
-              'Content-Type': 'application/json',
-            },
+            headers: agentServerHeaders(req),
             body: JSON.stringify({
               location: validatedData.location,
               latitude: validatedData.latitude,
@@ -184,9 +194,7 @@ async function registerRoutes(app) {
         const pythonServerUrl = process.env.PYTHON_SERVER_URL || 'http://localhost:8000';
         const response = await fetch(`${pythonServerUrl}/api/agent-message`, {
           method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
+          headers: agentServerHeaders(req),
           body: JSON.stringify({
             message: validatedData.message,
             agent_type: validatedData.agentType || 'supervisor',
@@ -310,6 +318,29 @@ async function registerRoutes(app) {
     }
   });
 
+  // Location autocomplete, answered from the Python agent's local place index
+  app.get('/api/locations/autocomplete', optionalAuth, async (req, res) => {
+    try {
+      const pythonServerUrl = process.env.PYTHON_SERVER_URL || 'http://localhost:8000';
+      const params = new URLSearchParams({
+        q: String(req.query.q || ''),
+        limit: String(req.query.limit || 8),
+      });
+      const response = await fetch(`${pythonServerUrl}/api/locations/autocomplete?${params}`, {
+        headers: agentServerHeaders(req),
+      });
+
+      if (response.ok) {
+        const data = await response.json();
+        return res.json({ suggestions: data.suggestions });
+      }
+      res.json({ suggestions: [] });
+    } catch (error) {
+      console.log('Python autocomplete service not available');
+      res.json({ suggestions: [] });
+    }
+  });
+
   // Weather API route (placeholder for external API integration)
   app.get('/api/weather/:location', optionalAuth, async (req, res) => {
     try {
@@ -320,9 +351,7 @@ async function registerRoutes(app) {
         const pythonServerUrl = process.env.PYTHON_SERVER_URL || 'http://localhost:8000';
         const response = await fetch(`${pythonServerUrl}/api/weather`, {
           method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
+          headers: agentServerHeaders(req),
           body: JSON.stringify({ location }),
         });
         